@@ -61,6 +61,16 @@ export class PackageGenerator {
             
             archive.append(fileContent, { name: filePath });
         }
+
+        // The trainer reads run_config.json from its working directory (see training/run_config.py)
+        archive.append(this.getRunConfig(userConfig), { name: 'training/run_config.json' });
+    }
+
+    getRunConfig(config) {
+        return JSON.stringify({
+            total_timesteps: parseInt(config.trainingSteps, 10),
+            maze_rooms: parseInt(config.mazeRooms, 10)
+        }, null, 2) + '\n';
     }
     
     customizeFile(content, config, filename) {
@@ -3,11 +3,241 @@ from tkinter import ttk, scrolledtext
 import subprocess
 import threading
 import queue
+import collections
+import json
 import os
 import sys
 import time
+import traceback
 from pathlib import Path
 
+from supervisor import Supervisor, default_processes, GAME_URL
+
+# Each log tab keeps only its newest lines; the full output is written to LOG_DIR
+MAX_LOG_LINES = 5000
+LOG_DIR = os.path.join("training", "logs", "control_panel")
+# Queue polling: fast while output is backed up, slower and slower while idle
+POLL_MIN_MS = 20
+POLL_MS = 100
+POLL_MAX_MS = 500
+MAX_LINES_PER_TICK = 2000
+# Dashboard charts keep at most this many min/max buckets per line, however long the run
+MAX_CHART_BUCKETS = 300
+# Supervised process -> (log tab, status label text)
+PROCESS_LOGS = {"trainer": "python", "game-server": "game", "game-client": "game"}
+STATE_STYLES = {
+    "starting": ("STARTING", '#f39c12'),
+    "ready": ("RUNNING", '#2ecc71'),
+    "backoff": ("RESTARTING", '#e67e22'),
+    "finished": ("FINISHED", '#3498db'),
+    "stopped": ("STOPPED", '#e74c3c'),
+}
+
+class LogView:
+    """
+    A read-only ScrolledText capped at its last `max_lines` lines. Text is
+    appended from any thread and reaches the widget in one insert per `flush`;
+    lines that scroll out of the cap before a flush are never rendered.
+    """
+    def __init__(self, widget, max_lines=MAX_LOG_LINES):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.pending = collections.deque(maxlen=max_lines)
+
+    def append(self, text):
+        self.pending.append(text)
+
+    def flush(self):
+        """Insert everything pending (Tk thread only)."""
+        if not self.pending:
+            return
+        chunks = []
+        while self.pending:
+            chunks.append(self.pending.popleft())
+        widget = self.widget
+        # Only follow the output if the user hasn't scrolled up to read something
+        at_bottom = widget.yview()[1] >= 0.999
+        widget.config(state='normal')
+        widget.insert(tk.END, ''.join(chunks))
+        lines = int(widget.index('end-1c').split('.')[0])
+        if lines > self.max_lines:
+            widget.delete('1.0', f'{lines - self.max_lines + 1}.0')
+        if at_bottom:
+            widget.see(tk.END)
+        widget.config(state='disabled')
+
+    def clear(self):
+        self.pending.clear()
+        self.widget.config(state='normal')
+        self.widget.delete('1.0', tk.END)
+        self.widget.config(state='disabled')
+
+class MinMaxSeries:
+    """
+    A time series kept as at most `capacity` buckets of consecutive points,
+    each remembering its lowest and highest point. When the buckets run out,
+    neighbours are merged and every bucket covers twice as many points, so
+    memory and drawing cost stay fixed while spikes and dips stay visible.
+    """
+    def __init__(self, capacity=MAX_CHART_BUCKETS):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.buckets = []  # [point count, (x, y) of the min, (x, y) of the max]
+        self.stride = 1
+        self.last = None
+
+    def append(self, x, y):
+        self.last = (x, y)
+        if self.buckets and self.buckets[-1][0] < self.stride:
+            bucket = self.buckets[-1]
+            bucket[0] += 1
+            if y < bucket[1][1]:
+                bucket[1] = (x, y)
+            if y >= bucket[2][1]:
+                bucket[2] = (x, y)
+            return
+        self.buckets.append([1, (x, y), (x, y)])
+        if len(self.buckets) > self.capacity:
+            self.buckets = [self._merge(self.buckets[i:i + 2]) for i in range(0, len(self.buckets), 2)]
+            self.stride *= 2
+
+    @staticmethod
+    def _merge(buckets):
+        return [sum(b[0] for b in buckets),
+                min((b[1] for b in buckets), key=lambda point: point[1]),
+                max((b[2] for b in buckets), key=lambda point: point[1])]
+
+    def points(self):
+        """Every bucket's min and max in time order, ending at the newest point."""
+        points = []
+        for _, low, high in self.buckets:
+            points.extend(sorted({low, high}))
+        if self.last is not None and points[-1] != self.last:
+            points.append(self.last)
+        return points
+
+class Chart:
+    """Line chart of one or more MinMaxSeries on a Tk canvas, rescaled to the canvas on every redraw."""
+    def __init__(self, parent, title, colors, value_format="{:.1f}"):
+        self.canvas = tk.Canvas(parent, bg='#1e1e1e', highlightthickness=0)
+        self.title = title
+        self.colors = colors
+        self.value_format = value_format
+        self.series = {name: MinMaxSeries() for name in colors}
+        self.dirty = True
+        self.canvas.bind('<Configure>', lambda event: self.redraw())
+
+    def add(self, name, x, y):
+        self.series[name].append(x, y)
+        self.dirty = True
+
+    def clear(self):
+        for series in self.series.values():
+            series.clear()
+        self.dirty = True
+
+    def redraw(self):
+        self.dirty = False
+        canvas = self.canvas
+        canvas.delete('all')
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        left, right, top, bottom = 60, width - 10, 24, height - 20
+        if right - left < 20 or bottom - top < 20:
+            return
+
+        canvas.create_text(8, 4, anchor='nw', text=self.title, fill='white', font=('Arial', 10, 'bold'))
+        lines = {name: series.points() for name, series in self.series.items() if series.last is not None}
+        if not lines:
+            canvas.create_text(width / 2, height / 2, text="Waiting for training metrics...", fill='#7f8c8d')
+            return
+
+        # Latest value of each line, in its color, after the title
+        label_x = width - 10
+        for name in reversed(list(lines)):
+            label = f"{name} {self.value_format.format(self.series[name].last[1])}"
+            item = canvas.create_text(label_x, 4, anchor='ne', text=label, fill=self.colors[name], font=('Arial', 9))
+            label_x = canvas.bbox(item)[0] - 10
+
+        points = [point for line in lines.values() for point in line]
+        x_min, x_max = min(p[0] for p in points), max(p[0] for p in points)
+        y_min, y_max = min(p[1] for p in points), max(p[1] for p in points)
+        if y_max - y_min < 1e-9:
+            y_min, y_max = y_min - 1, y_max + 1
+        x_span = max(x_max - x_min, 1e-9)
+        y_span = y_max - y_min
+
+        canvas.create_rectangle(left, top, right, bottom, outline='#34495e')
+        canvas.create_text(left - 4, top, anchor='ne', text=self.value_format.format(y_max), fill='#bdc3c7', font=('Arial', 8))
+        canvas.create_text(left - 4, bottom, anchor='se', text=self.value_format.format(y_min), fill='#bdc3c7', font=('Arial', 8))
+        elapsed = x_max - x_min
+        span_text = f"last {elapsed / 3600:.1f} h" if elapsed >= 7200 else f"last {elapsed / 60:.0f} min"
+        canvas.create_text(right, bottom + 2, anchor='ne', text=span_text, fill='#bdc3c7', font=('Arial', 8))
+
+        for name, line in lines.items():
+            coords = []
+            for x, y in line:
+                coords.append(left + (x - x_min) / x_span * (right - left))
+                coords.append(bottom - (y - y_min) / y_span * (bottom - top))
+            if len(coords) >= 4:
+                canvas.create_line(*coords, fill=self.colors[name], width=2)
+            else:
+                canvas.create_oval(coords[0] - 2, coords[1] - 2, coords[0] + 2, coords[1] + 2, fill=self.colors[name], outline='')
+
+class MetricsTail:
+    """
+    Follows the trainer's JSONL metrics log (its path is printed at startup) on
+    a background thread and queues every `metrics` record. Reopens the file
+    when the trainer's log sink rotates it.
+    """
+    def __init__(self, path, poll=1.0):
+        self.path = path
+        self.poll = poll
+        self.records = queue.Queue()
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        log_file = None
+        partial = ""
+        while not self._stop.is_set():
+            if log_file is None:
+                try:
+                    log_file = open(self.path, encoding="utf-8")
+                except OSError:
+                    self._stop.wait(self.poll)
+                    continue
+            chunk = log_file.read()
+            if chunk:
+                lines = (partial + chunk).split("\n")
+                partial = lines.pop()
+                for line in lines:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("type") == "metrics":
+                        self.records.put(record)
+            elif self._rotated(log_file):
+                log_file.close()
+                log_file, partial = None, ""
+            else:
+                self._stop.wait(self.poll)
+        if log_file is not None:
+            log_file.close()
+
+    def _rotated(self, log_file):
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            return False
+        return current.st_ino != os.fstat(log_file.fileno()).st_ino or current.st_size < log_file.tell()
+
+    def stop(self):
+        self._stop.set()
+
 class RLMTrainerGUI:
     def __init__(self, root):
         self.root = root
@@ -16,16 +246,28 @@ class RLMTrainerGUI:
         self.root.configure(bg='#2c3e50')
         
         # Processes
-        self.python_process = None
-        self.game_process = None
+        self.supervisor = None
+        self.log_files = {}
+        self.browser_opened = False
         self.is_running = False
         
-        # Queues for output
+        # Queues for output and supervisor events
         self.python_queue = queue.Queue()
         self.game_queue = queue.Queue()
+        self.event_queue = queue.Queue()
+        self.poll_ms = POLL_MS
+        self.poll_job = None
+        self.last_poll_error = None
+        self.metrics_tail = None
         
         self.setup_gui()
+        self.logs = {
+            "python": LogView(self.python_log),
+            "game": LogView(self.game_log),
+            "progress": LogView(self.progress_log),
+        }
         self.check_dependencies()
+        self.monitor_queues()
     
     def setup_gui(self):
         # Header
@@ -140,6 +382,21 @@ class RLMTrainerGUI:
         self.progress_log.insert(tk.END, "Training progress and metrics will appear here...\n")
         self.progress_log.config(state='disabled')
         
+        # Dashboard Tab: live charts from the trainer's metrics log
+        dashboard_frame = tk.Frame(notebook, bg='#2c3e50')
+        notebook.add(dashboard_frame, text="Dashboard")
+        self.charts = {
+            "throughput": Chart(dashboard_frame, "Env steps/sec", {"steps/sec": '#2ecc71'}, "{:,.0f}"),
+            "reward": Chart(dashboard_frame, "Episode reward (mean)", {"reward": '#f1c40f'}),
+            "success": Chart(dashboard_frame, "Success rate (%)", {"success": '#00ffff'}),
+            "latency": Chart(dashboard_frame, "Env step latency (ms)", {"p50": '#3498db', "p99": '#e74c3c'}, "{:.2f}"),
+        }
+        for index, chart in enumerate(self.charts.values()):
+            chart.canvas.grid(row=index // 2, column=index % 2, sticky='nsew', padx=4, pady=4)
+        for index in range(2):
+            dashboard_frame.rowconfigure(index, weight=1)
+            dashboard_frame.columnconfigure(index, weight=1)
+        
         # Footer
         footer_frame = tk.Frame(self.root, bg='#34495e', height=30)
         footer_frame.pack(fill='x', padx=10, pady=5)
@@ -168,27 +425,23 @@ class RLMTrainerGUI:
             self.start_btn.config(state='disabled')
     
     def log_message(self, log_type, message):
-        """Add message to appropriate log with timestamp"""
+        """Queue a timestamped message for a log tab (safe from any thread; shown on the next poll)"""
         timestamp = time.strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}"
-        
-        if log_type == "python":
-            self.python_log.config(state='normal')
-            self.python_log.insert(tk.END, formatted_message)
-            self.python_log.see(tk.END)
-            self.python_log.config(state='disabled')
-        
-        elif log_type == "game":
-            self.game_log.config(state='normal')
-            self.game_log.insert(tk.END, formatted_message)
-            self.game_log.see(tk.END)
-            self.game_log.config(state='disabled')
-        
-        elif log_type == "progress":
-            self.progress_log.config(state='normal')
-            self.progress_log.insert(tk.END, formatted_message)
-            self.progress_log.see(tk.END)
-            self.progress_log.config(state='disabled')
+        log = self.logs.get(log_type)
+        if log is not None:
+            log.append(f"[{timestamp}] {message}")
+    
+    def open_log_file(self, name):
+        """Full, uncapped copy of a process's output under LOG_DIR"""
+        try:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            path = os.path.join(LOG_DIR, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.log")
+            log_file = open(path, "a", encoding="utf-8", buffering=1)
+        except OSError as e:
+            self.log_message("progress", f"WARNING: Not saving {name} output to disk: {e}\n")
+            return None
+        self.log_message("progress", f"INFO: Full {name} output saved to {path}\n")
+        return log_file
     
     def start_servers(self):
         """Start both servers in background"""
@@ -200,147 +453,144 @@ class RLMTrainerGUI:
         self.stop_btn.config(state='normal')
         
         # Clear logs
-        for log in [self.python_log, self.game_log, self.progress_log]:
-            log.config(state='normal')
-            log.delete(1.0, tk.END)
-            log.config(state='disabled')
+        for log in self.logs.values():
+            log.clear()
+        for chart in self.charts.values():
+            chart.clear()
         
         self.log_message("progress", "STARTING: RL Maze Trainer...\n")
+        self.log_message("python", "STARTING: Python training server...\n")
+        self.log_files = {"python": self.open_log_file("python"), "game": self.open_log_file("game")}
+        self.browser_opened = False
         
-        # Start Python server
-        python_thread = threading.Thread(target=self.start_python_server)
-        python_thread.daemon = True
-        python_thread.start()
-        
-        # Start queue monitoring
-        self.monitor_queues()
-    
-    def start_python_server(self):
-        """Start Python training server"""
+        # The supervisor starts the game once the trainer's port accepts connections and restarts whatever dies
         try:
-            self.python_status.config(text="[STARTING] Python Server", fg='#f39c12')
-            
-            # Change to training directory
-            training_dir = os.path.join(os.path.dirname(__file__), "training")
-            
-            self.log_message("python", "STARTING: Python training server...\n")
-            self.log_message("python", "INFO: WebSocket will listen on port 8765\n")
-            
-            # Start the process
-            self.python_process = subprocess.Popen(
-                ['python', 'train_maze_solver.py'],
-                cwd=training_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW  # No console window
-            )
-            
-            # Start reading output in separate thread
-            def read_python_output():
-                while True:
-                    line = self.python_process.stdout.readline()
-                    if not line:
-                        break
-                    self.python_queue.put(("python", line))
-                self.python_queue.put(("python", "Python process ended\n"))
-            
-            output_thread = threading.Thread(target=read_python_output)
-            output_thread.daemon = True
-            output_thread.start()
-            
-            # Wait a bit then start game server
-            time.sleep(3)
-            self.start_game_server()
-            
+            self.supervisor = Supervisor(default_processes(on_output=self.on_process_output),
+                                         on_event=lambda *event: self.event_queue.put(event))
+            self.supervisor.start()
         except Exception as e:
-            error_msg = f"ERROR starting Python server: {str(e)}\n"
-            self.python_queue.put(("python", error_msg))
+            self.log_message("progress", f"ERROR starting servers: {str(e)}\n")
+        
+        # Pick the output up right away rather than after an idle back-off
+        self.poll_ms = POLL_MIN_MS
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+        self.poll_job = self.root.after(POLL_MIN_MS, self.monitor_queues)
     
-    def start_game_server(self):
-        """Start game development server"""
+    def on_process_output(self, name, line):
+        """Route a supervised process's output line to its log tab and log file (reader threads)"""
+        log_type = PROCESS_LOGS.get(name, "python")
+        log_file = self.log_files.get(log_type)
+        if log_file:
+            try:
+                log_file.write(line)
+            except ValueError:  # closed by stop_servers while the process was still flushing
+                pass
+        output_queue = self.python_queue if log_type == "python" else self.game_queue
+        output_queue.put((log_type, line))
+    
+    def handle_process_event(self, name, state, message):
+        """Reflect a supervisor state change in the status labels and progress log (Tk thread)"""
+        text, color = STATE_STYLES.get(state, (state.upper(), '#f39c12'))
+        if name == "trainer":
+            self.python_status.config(text=f"[{text}] Python Server", fg=color)
+        elif name == "game-server":
+            self.game_status.config(text=f"[{text}] Game Server", fg=color)
+        self.log_message("progress", f"{name}: {state}{' - ' + message if message else ''}\n")
+        
+        if name == "game-server" and state == "ready" and not self.browser_opened:
+            # A reload-on-restart dev server keeps the open tab working, so only the first start opens one
+            self.browser_opened = True
+            self.log_message("progress", "SUCCESS: Game server ready! Opening browser...\n")
+            self.open_browser()
+        elif name == "trainer" and state == "finished":
+            self.log_message("progress", "SUCCESS: Training finished\n")
+            self.stop_servers()
+    
+    def drain_queue(self, output_queue, limit):
+        """Take up to `limit` queued (log_type, message) pairs without blocking"""
+        items = []
         try:
-            self.game_status.config(text="[STARTING] Game Server", fg='#f39c12')
-            
-            # Change to game directory
-            game_dir = os.path.join(os.path.dirname(__file__), "game")
-            
-            self.log_message("game", "STARTING: Game server...\n")
-            self.log_message("game", "INFO: Game will be available at http://localhost:3000\n")
-            
-            # Start the process
-            self.game_process = subprocess.Popen(
-                ['cmd', '/c', 'npm', 'run', 'dev'],
-                cwd=game_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                creationflags=subprocess.CREATE_NO_WINDOW  # No console window
-            )
-            
-            # Start reading output in separate thread
-            def read_game_output():
-                while True:
-                    line = self.game_process.stdout.readline()
-                    if not line:
-                        break
-                    self.game_queue.put(("game", line))
-                self.game_queue.put(("game", "Game process ended\n"))
-            
-            output_thread = threading.Thread(target=read_game_output)
-            output_thread.daemon = True
-            output_thread.start()
-            
-        except Exception as e:
-            error_msg = f"ERROR starting game server: {str(e)}\n"
-            self.game_queue.put(("game", error_msg))
+            while len(items) < limit:
+                items.append(output_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return items
     
     def monitor_queues(self):
-        """Monitor queues for output from subprocesses"""
+        """Monitor queues for output from subprocesses; one widget update per log per tick"""
+        handled = 0
         try:
             # Check Python queue
-            while True:
-                try:
-                    log_type, message = self.python_queue.get_nowait()
-                    self.log_message(log_type, message)
-                    
-                    # Update status based on messages
-                    if "Starting Python training server" in message:
-                        self.python_status.config(text="[RUNNING] Python Server", fg='#2ecc71')
-                    elif "Game connected" in message:
-                        self.log_message("progress", "SUCCESS: Game connected! Training starting...\n")
-                    elif "Step" in message and "Reward" in message:
-                        self.log_message("progress", message)
-                        
-                except queue.Empty:
-                    break
+            for log_type, message in self.drain_queue(self.python_queue, MAX_LINES_PER_TICK):
+                handled += 1
+                self.log_message(log_type, message)
+                
+                # Progress worth surfacing (process status comes from the supervisor)
+                if "environment connected" in message:
+                    self.log_message("progress", "SUCCESS: Game connected! Training starting...\n")
+                elif "Metrics log:" in message:
+                    self.follow_metrics(message.split("Metrics log:", 1)[1].strip())
+                elif "Checkpoint:" in message or "Curriculum" in message:
+                    self.log_message("progress", message)
             
             # Check Game queue  
-            while True:
-                try:
-                    log_type, message = self.game_queue.get_nowait()
-                    self.log_message(log_type, message)
-                    
-                    # Update status based on messages
-                    if "Local:" in message or "http://localhost:3000" in message:
-                        self.game_status.config(text="[RUNNING] Game Server", fg='#2ecc71')
-                        self.log_message("progress", "SUCCESS: Game server ready! Opening browser...\n")
-                        # Auto-open browser when game server is ready
-                        self.open_browser()
-                        
-                except queue.Empty:
-                    break
-        
-        except:
-            pass
-        
-        # Continue monitoring
-        if self.is_running:
-            self.root.after(100, self.monitor_queues)
+            for log_type, message in self.drain_queue(self.game_queue, MAX_LINES_PER_TICK):
+                handled += 1
+                self.log_message(log_type, message)
+            
+            for event in self.drain_queue(self.event_queue, MAX_LINES_PER_TICK):
+                handled += 1
+                self.handle_process_event(*event)
+            
+            for log in self.logs.values():
+                log.flush()
+            self.update_dashboard()
+        
+        except Exception:
+            # Keep polling, but show what broke instead of the dashboard just going quiet
+            error = traceback.format_exc()
+            sys.stderr.write(error)
+            if error != self.last_poll_error:
+                self.last_poll_error = error
+                self.log_message("progress", f"ERROR updating logs/dashboard:\n{error}")
+        
+        # Poll again soon while output is backed up, back off while it is quiet
+        if handled >= MAX_LINES_PER_TICK:
+            self.poll_ms = POLL_MIN_MS
+        elif handled:
+            self.poll_ms = POLL_MS
+        else:
+            self.poll_ms = min(self.poll_ms * 2, POLL_MAX_MS)
+        self.poll_job = self.root.after(self.poll_ms, self.monitor_queues)
+    
+    def follow_metrics(self, path):
+        """Start charting the metrics log the trainer announced (relative to its training directory)"""
+        if self.metrics_tail is not None:
+            self.metrics_tail.stop()
+        training_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "training")
+        self.metrics_tail = MetricsTail(os.path.join(training_dir, path))
+    
+    def update_dashboard(self):
+        """Add new metrics records to the charts and redraw the ones that changed"""
+        if self.metrics_tail is None:
+            return
+        for record in self.drain_queue(self.metrics_tail.records, MAX_LINES_PER_TICK):
+            t = record.get("time", time.time())
+            rates, gauges, histograms = record.get("rates", {}), record.get("gauges", {}), record.get("histograms", {})
+            if "env_steps_total" in rates:
+                self.charts["throughput"].add("steps/sec", t, rates["env_steps_total"])
+            if "episode_reward_mean" in gauges:
+                self.charts["reward"].add("reward", t, gauges["episode_reward_mean"])
+            if "episode_success_rate" in gauges:
+                self.charts["success"].add("success", t, gauges["episode_success_rate"] * 100)
+            step = histograms.get("env_step_seconds", {})
+            if step.get("count"):
+                self.charts["latency"].add("p50", t, step["p50"] * 1000)
+                self.charts["latency"].add("p99", t, step["p99"] * 1000)
+        for chart in self.charts.values():
+            if chart.dirty:
+                chart.redraw()
     
     def open_browser(self):
         """Open browser to game - FIXED VERSION"""
@@ -356,7 +606,7 @@ class RLMTrainerGUI:
             
             def open_url():
                 try:
-                    browser.open('http://localhost:3000', new=2)  # new=2 opens in new tab if possible
+                    browser.open(GAME_URL, new=2)  # new=2 opens in new tab if possible
                     self.log_message("progress", "SUCCESS: Browser opened to http://localhost:3000\n")
                 except Exception as e:
                     self.log_message("progress", f"ERROR opening browser: {str(e)}\n")
@@ -380,28 +630,18 @@ class RLMTrainerGUI:
         self.is_running = False
         self.log_message("progress", "STOPPING: Servers...\n")
         
-        # Stop processes
-        if self.python_process:
-            try:
-                self.python_process.terminate()
-                self.python_process.wait(timeout=5)
-            except:
-                try:
-                    self.python_process.kill()
-                except:
-                    pass
-            self.python_process = None
+        # Stop processes (whole trees, so npm's dev server goes too)
+        if self.supervisor is not None:
+            self.supervisor.stop()
+            self.supervisor = None
+        for log_file in self.log_files.values():
+            if log_file:
+                log_file.close()
+        self.log_files = {}
         
-        if self.game_process:
-            try:
-                self.game_process.terminate()
-                self.game_process.wait(timeout=5)
-            except:
-                try:
-                    self.game_process.kill()
-                except:
-                    pass
-            self.game_process = None
+        if self.metrics_tail is not None:
+            self.metrics_tail.stop()
+            self.metrics_tail = None
         
         # Update UI
         self.python_status.config(text="[STOPPED] Python Server", fg='#e74c3c')
@@ -415,6 +655,8 @@ class RLMTrainerGUI:
     def on_closing(self):
         """Handle window closing"""
         self.stop_servers()
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
         self.root.destroy()
 
 def main():
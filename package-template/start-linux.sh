@@ -10,12 +10,12 @@ echo ""
 # Make this script executable
 chmod +x start-linux.sh
 
-echo "📋 IMPORTANT: This will open TWO terminal windows"
+echo "📋 IMPORTANT: This runs everything from this terminal"
 echo "  1. Python Training Server (WebSocket:8765)"
-echo "  2. Game Server (HTTP:3000)"
-echo "  3. Browser will open automatically"
+echo "  2. Game Server (HTTP:3000), started once the trainer is ready"
+echo "  3. Browser will open automatically once the game is served"
 echo ""
-echo "⚠️  Keep BOTH terminals open during training!"
+echo "⚠️  Keep this terminal open during training!"
 echo ""
 
 # Check for Python
@@ -71,40 +71,23 @@ echo ""
 echo "✅ All dependencies installed successfully!"
 echo ""
 
-# Start Python training server
-echo "🤖 Starting Python Training Server..."
-echo "📍 This will listen on WebSocket port 8765"
-gnome-terminal -- bash -c "cd '$PWD/training' && echo 'Starting Python training server...' && python3 train_sphere_agent.py; exec bash"
-
-# Wait for server to start
-sleep 3
-
-# Start game server
-echo "🌐 Starting Game Server..."
-echo "📍 This will serve game on http://localhost:3000"
-gnome-terminal -- bash -c "cd '$PWD/game' && echo 'Starting game server...' && npm run dev; exec bash"
-
-# Wait for game server to start
-echo "⏳ Waiting for servers to start..."
-sleep 8
-
-# Open browser
-echo "🚀 Opening game in browser..."
-xdg-open http://localhost:3000
-
-echo ""
-echo "========================================"
-echo "  ✅ SETUP COMPLETE!"
-echo "========================================"
-echo ""
 echo "📍 Game URL: http://localhost:3000"
 echo "📍 Training WebSocket: localhost:8765"
 echo ""
 echo "⚠️  IMPORTANT:"
-echo "   • Keep BOTH terminal windows open"
 echo "   • Training starts automatically when game loads"
+echo "   • A crashed server is restarted automatically"
 echo "   • Models save to: training/models/"
-echo "   • Close both terminals to stop training"
+echo "   • Press Ctrl+C to stop training"
+echo ""
+
+# Start the trainer, then the game server once the trainer is ready, and keep both running
+echo "🤖 Starting Python Training Server and Game Server..."
+python3 supervisor.py --open-browser
+
+echo ""
+echo "========================================"
+echo "  ✅ TRAINING STOPPED"
+echo "========================================"
 echo ""
-echo "🎮 Happy training!"
 read -p "Press any key to exit..."
\ No newline at end of file
@@ -9,12 +9,12 @@ echo   🎮 RL MAZE TRAINER - STARTING
 echo ========================================
 echo.
 
-echo 📋 IMPORTANT: This will open TWO separate windows
+echo 📋 IMPORTANT: This runs everything from this window
 echo   1. Python Training Server (WebSocket:8765)
-echo   2. Game Server (HTTP:3000) 
-echo   3. Browser will open automatically
+echo   2. Game Server (HTTP:3000), started once the trainer is ready
+echo   3. Browser will open automatically once the game is served
 echo.
-echo ⚠️  Keep BOTH windows open during training!
+echo ⚠️  Keep this window open during training!
 echo.
 
 :: Check for Python
@@ -72,44 +72,21 @@ echo.
 echo ✅ All dependencies installed successfully!
 echo.
 
-:: Start Python training server in NEW window that stays open
-echo 🤖 Starting Python Training Server...
-echo 📍 This will listen on WebSocket port 8765
-start "RL Maze Trainer - Python Server" cmd /k "cd /d %~dp0training && echo [PYTHON SERVER] Starting training server on port 8765... && echo [PYTHON SERVER] Waiting for game connection... && python train_maze_solver.py && echo [PYTHON SERVER] Training completed or stopped. && pause"
-
-:: Wait for Python server to start
-echo ⏳ Waiting for Python server to start...
-timeout /t 5 /nobreak >nul
-
-:: Start game server in NEW window that stays open  
-echo 🌐 Starting Game Server...
-echo 📍 This will serve game on http://localhost:3000
-start "RL Maze Trainer - Game Server" cmd /k "cd /d %~dp0game && echo [GAME SERVER] Starting development server... && npm run dev"
-
-:: Wait for game server to start
-echo ⏳ Waiting for game server to start...
-timeout /t 10 /nobreak >nul
-
-:: Open browser
-echo 🚀 Opening game in browser...
-start http://localhost:3000
-
-echo.
-echo ========================================
-echo   ✅ LAUNCHER COMPLETE!
-echo ========================================
-echo.
+:: Start the trainer, then the game server once the trainer is ready, and keep both running
 echo 📍 Game URL: http://localhost:3000
 echo 📍 Training WebSocket: localhost:8765
 echo.
 echo ⚠️  IMPORTANT:
-echo    • TWO new windows should have opened
-echo    • Python Server: Training brain (port 8765)
-echo    • Game Server: 3D visualization (port 3000) 
-echo    • Keep BOTH windows open during training
 echo    • Training starts when browser game loads
+echo    • A crashed server is restarted automatically
 echo    • Models save to: training\models\
+echo    • Press Ctrl+C to stop training
+echo.
+echo 🤖 Starting Python Training Server and Game Server...
+python supervisor.py --open-browser
+
 echo.
-echo 🎮 Check the new windows for server status!
-echo 📝 Close this window when done - it's safe to close now.
+echo ========================================
+echo   ✅ TRAINING STOPPED
+echo ========================================
 pause
\ No newline at end of file
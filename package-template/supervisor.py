@@ -0,0 +1,366 @@
+# supervisor.py - START, PROBE AND RESTART THE TRAINER AND GAME PROCESSES
+"""
+Runs the trainer (`training/train_maze_solver.py`), the game dev server
+(`npm run dev` in `game/`) and optionally a game client command (e.g. a
+headless browser) as supervised child processes. Used by the control panel
+and on its own for unattended runs:
+
+    python supervisor.py --open-browser
+    python supervisor.py --game-client "chromium --headless=new http://localhost:3000"
+    python supervisor.py -- --num-envs 8 --curriculum adaptive     (after -- : trainer flags)
+
+Each process is started only once the one before it is ready, and readiness
+is probed rather than waited for:
+
+  trainer      its WebSocket port accepts connections
+  game server  port 3000 accepts connections
+  game client  the trainer's metrics endpoint reports a connected game (`game_envs_ready`)
+
+Once ready, a liveness probe runs every second (trainer: its
+`training_timesteps` gauge has moved within `--progress-window` seconds, unless
+it is waiting for games; game server: port open; game client: still connected). A process
+that exits, or fails its liveness probe `live_failures` times in a row, is
+stopped and restarted after an exponential backoff (1s, 2s, 4s ... 30s, reset
+once it has stayed up for a minute). The trainer resumes from its latest
+checkpoint on restart. It exits 0 once training is done, which stops
+everything, and non-zero when training fails, which restarts it.
+
+Every child runs in its own process group (a new session on POSIX, a new
+process group on Windows) and is stopped as a whole tree, so `npm` can't leave
+its dev server holding the port.
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_DIR = os.path.join(PACKAGE_DIR, "training")
+GAME_DIR = os.path.join(PACKAGE_DIR, "game")
+GAME_URL = "http://localhost:3000"
+GAME_PORT = 3000
+
+def tcp_probe(host, port, timeout=1.0):
+    """Probe that passes while something accepts TCP connections on host:port."""
+    def probe():
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+    return probe
+
+def metrics_probe(url, check=None, timeout=2.0):
+    """Probe that passes when the trainer's /metrics.json answers (and `check(snapshot)` holds)."""
+    def probe():
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                snapshot = json.load(response)
+        except (OSError, ValueError):
+            return False
+        return check is None or bool(check(snapshot))
+    return probe
+
+def progress_probe(url, gauge, window, idle=None, timeout=2.0):
+    """
+    Probe that passes while the trainer's `gauge` has changed within the last
+    `window` seconds, or `idle(snapshot)` holds (nothing to make progress on).
+    An answering endpoint alone isn't enough: it is served from its own thread.
+    """
+    last = {"value": None, "at": None}
+
+    def probe():
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                snapshot = json.load(response)
+        except (OSError, ValueError):
+            return False
+        now = time.monotonic()
+        value = snapshot.get("gauges", {}).get(gauge)
+        if last["at"] is None or value != last["value"] or (idle is not None and idle(snapshot)):
+            last["value"], last["at"] = value, now
+            return True
+        return now - last["at"] <= window
+    return probe
+
+def games_connected(snapshot):
+    return snapshot.get("gauges", {}).get("game_envs_ready", 0) >= 1
+
+def _group_kwargs():
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.CREATE_NO_WINDOW}
+    return {"start_new_session": True}
+
+def kill_tree(process, timeout=5.0):
+    """Stop `process` and everything it started: politely, then by force after `timeout` seconds."""
+    if os.name == "nt":
+        if process.poll() is None:
+            try:
+                process.send_signal(signal.CTRL_BREAK_EVENT)
+                process.wait(timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        # /T takes the children too; fails harmlessly if the tree is already gone
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+    else:
+        # The group outlives its leader if the leader crashed, so signal it either way
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            pass
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    process.wait()
+
+class ManagedProcess:
+    """One supervised child: its command, probes and restart policy (see module docstring)."""
+    def __init__(self, name, cmd, cwd=None, env=None, ready=None, live=None, ready_timeout=120.0,
+                 live_failures=3, backoff=1.0, max_backoff=30.0, stable_after=60.0, restart_on_success=True,
+                 on_output=None):
+        self.name = name
+        self.cmd = cmd
+        self.cwd = cwd
+        self.env = env
+        self.ready_probe = ready
+        self.live_probe = live
+        self.ready_timeout = ready_timeout
+        self.live_failures = live_failures
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        # A clean exit (e.g. the trainer finishing) ends the whole run instead of restarting
+        self.restart_on_success = restart_on_success
+        self.on_output = on_output
+
+        self.process = None
+        self.state = "waiting"
+        self.ever_ready = False
+        self.started_at = 0.0
+        self.ready_at = 0.0
+        self.restart_at = 0.0
+        self.failures = 0
+        self.crashes = 0
+        self.restarts = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.cmd, cwd=self.cwd, env=self.env,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+            **_group_kwargs(),
+        )
+        self.started_at = time.monotonic()
+        self.failures = 0
+        threading.Thread(target=self._read_output, args=(self.process,), daemon=True).start()
+
+    def _read_output(self, process):
+        for line in process.stdout:
+            if self.on_output is not None:
+                self.on_output(self.name, line)
+
+    def exit_code(self):
+        return None if self.process is None else self.process.poll()
+
+    def stop(self, timeout=5.0):
+        if self.process is not None:
+            kill_tree(self.process, timeout)
+
+    def next_delay(self):
+        return min(self.backoff * 2 ** self.crashes, self.max_backoff)
+
+class Supervisor:
+    """
+    Starts `processes` in order, each once the previous one is ready, then
+    watches and restarts them from a background thread. `on_event(name, state,
+    message)` is called (from that thread) on every state change.
+    """
+    def __init__(self, processes, on_event=None, interval=1.0):
+        self.processes = processes
+        self.on_event = on_event
+        self.interval = interval
+        self.finished = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="supervisor", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def _event(self, proc, state, message=""):
+        proc.state = state
+        if self.on_event is not None:
+            self.on_event(proc.name, state, message)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if self._stop.is_set():
+                    break
+                gate_open = True
+                for proc in self.processes:
+                    self._tick(proc, gate_open)
+                    if self.finished.is_set():
+                        break
+                    # Startup is gated: nothing starts until everything before it has been ready once
+                    gate_open = gate_open and proc.ever_ready
+            if self.finished.is_set():
+                self.stop()
+                return
+            self._stop.wait(self.interval)
+
+    def _tick(self, proc, gate_open):
+        now = time.monotonic()
+        if proc.state == "waiting":
+            if gate_open:
+                self._launch(proc)
+            return
+        if proc.state == "backoff":
+            if now >= proc.restart_at:
+                proc.restarts += 1
+                self._launch(proc)
+            return
+
+        code = proc.exit_code()
+        if code is not None:
+            if code == 0 and not proc.restart_on_success:
+                self._event(proc, "finished", "exited cleanly")
+                self.finished.set()
+                return
+            self._restart(proc, f"exited with code {code}")
+            return
+
+        if proc.state == "starting":
+            if proc.ready_probe is None or proc.ready_probe():
+                proc.ready_at = now
+                proc.ever_ready = True
+                self._event(proc, "ready", f"ready after {now - proc.started_at:.1f}s")
+            elif now - proc.started_at > proc.ready_timeout:
+                self._restart(proc, f"not ready after {proc.ready_timeout:.0f}s")
+            return
+
+        # Ready: heartbeat, and forgive past crashes once it has been up for a while
+        if proc.crashes and now - proc.ready_at > proc.stable_after:
+            proc.crashes = 0
+        if proc.live_probe is not None:
+            if proc.live_probe():
+                proc.failures = 0
+            else:
+                proc.failures += 1
+                if proc.failures >= proc.live_failures:
+                    self._restart(proc, f"failed {proc.failures} liveness checks")
+
+    def _launch(self, proc):
+        try:
+            proc.start()
+        except OSError as e:
+            self._restart(proc, f"could not start: {e}")
+            return
+        self._event(proc, "starting", " ".join(proc.cmd))
+
+    def _restart(self, proc, reason):
+        proc.stop()
+        delay = proc.next_delay()
+        proc.crashes += 1
+        proc.restart_at = time.monotonic() + delay
+        self._event(proc, "backoff", f"{reason}; restarting in {delay:.0f}s")
+
+    def stop(self, timeout=5.0):
+        """Stop every process (last started first). Safe to call more than once, from any thread."""
+        self._stop.set()
+        with self._lock:
+            for proc in reversed(self.processes):
+                if proc.state in ("waiting", "stopped"):
+                    continue
+                proc.stop(timeout)
+                self._event(proc, "stopped")
+
+def default_processes(trainer_args=(), game_server=True, game_client=None, on_output=None, progress_window=300.0):
+    """Trainer, game dev server and optional game client for a run configured by `trainer_args`."""
+    sys.path.insert(0, TRAINING_DIR)
+    from run_config import RunConfig
+
+    # Resolved the way the trainer will resolve it (config file and MAZE_* from its working directory)
+    cwd = os.getcwd()
+    try:
+        os.chdir(TRAINING_DIR)
+        config = RunConfig.load(list(trainer_args))
+    finally:
+        os.chdir(cwd)
+    game_mode = not (config.headless or config.replay_dir or config.workers)
+    metrics_url = f"http://localhost:{config.metrics_port}/metrics.json" if config.metrics_port else None
+
+    trainer_ready = tcp_probe(config.host, config.port) if game_mode else None
+    trainer_live = trainer_ready
+    if metrics_url:
+        # In game mode a trainer short of games is waiting on them, not hung
+        waiting = (lambda snapshot: snapshot.get("gauges", {}).get("game_envs_ready", 0) < config.num_envs) \
+            if game_mode else None
+        trainer_live = progress_probe(metrics_url, "training_timesteps", progress_window, waiting)
+    processes = [ManagedProcess(
+        "trainer", [sys.executable, "train_maze_solver.py", *trainer_args], cwd=TRAINING_DIR,
+        env=dict(os.environ, PYTHONUNBUFFERED="1"), ready=trainer_ready, live=trainer_live,
+        restart_on_success=False, on_output=on_output,
+    )]
+    if not game_mode:
+        return processes
+
+    if game_server:
+        npm = shutil.which("npm") or "npm"
+        game_up = tcp_probe("localhost", GAME_PORT)
+        processes.append(ManagedProcess("game-server", [npm, "run", "dev"], cwd=GAME_DIR, ready=game_up,
+                                        live=game_up, on_output=on_output))
+    if game_client:
+        connected = metrics_probe(metrics_url, games_connected) if metrics_url else None
+        processes.append(ManagedProcess("game-client", shlex.split(game_client, posix=os.name != "nt"),
+                                        cwd=PACKAGE_DIR, ready=connected, live=connected, on_output=on_output))
+    return processes
+
+def main(args):
+    def on_output(name, line):
+        sys.stdout.write(f"[{name}] {line}")
+        sys.stdout.flush()
+
+    def on_event(name, state, message):
+        print(f">>> {name}: {state}{' - ' + message if message else ''}", flush=True)
+        if state == "ready" and name == "game-server" and args.open_browser:
+            import webbrowser
+            webbrowser.open(GAME_URL, new=2)
+
+    trainer_args = args.trainer_args[1:] if args.trainer_args[:1] == ["--"] else args.trainer_args
+    supervisor = Supervisor(default_processes(trainer_args, not args.no_game_server, args.game_client, on_output,
+                                              args.progress_window), on_event)
+    # SIGTERM (systemd, kill) stops the children the same way Ctrl+C does; the main loop does the stopping
+    terminated = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: terminated.set())
+    supervisor.start()
+    try:
+        while supervisor.thread.is_alive() and not terminated.is_set():
+            supervisor.thread.join(0.5)
+    except KeyboardInterrupt:
+        print("\n>>> Stopping...")
+    finally:
+        supervisor.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the trainer and game with readiness probes and auto-restart")
+    parser.add_argument("--no-game-server", action="store_true", help="don't run `npm run dev` (game served elsewhere)")
+    parser.add_argument("--game-client", help="command that opens the game, restarted whenever no game is connected")
+    parser.add_argument("--open-browser", action="store_true", help="open the game in the browser once it is served")
+    parser.add_argument("--progress-window", type=float, default=300.0,
+                        help="restart the trainer if its timestep count hasn't moved for this many seconds")
+    parser.add_argument("trainer_args", nargs=argparse.REMAINDER, help="-- followed by train_maze_solver.py flags")
+    main(parser.parse_args())
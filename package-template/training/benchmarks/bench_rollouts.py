@@ -0,0 +1,90 @@
+# bench_rollouts.py - LOCKSTEP VS PIPELINED PPO ROLLOUT THROUGHPUT
+"""
+Times PPO rollout collection (policy inference + bridge + bookkeeping, no
+update) against the fake game with a fixed per-reply latency, for:
+
+  dummy      DummyVecEnv over one EnhancedMazeEnv per game (envs step one after another)
+  lockstep   PPO over one MazeVecEnv (all games step together, inference waits for all)
+  pipelined  PipelinedPPO over a SplitVecEnv of `--groups` MazeVecEnvs
+
+    python benchmarks/bench_rollouts.py --clients 8 --latency 5 --n-steps 256 --rounds 4
+    python benchmarks/bench_rollouts.py --clients 16 --latency 5 --hidden 1024 --layers 3
+
+Pipelining can only hide the trainer's own per-step time (inference,
+bookkeeping) behind the game's, so it gains most when the two are comparable.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+TRAINING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TRAINING_DIR)
+from maze_bridge import GameEndpoint  # noqa: E402
+from maze_envs import EnhancedMazeEnv, MazeVecEnv  # noqa: E402
+from pipelined_rollouts import PipelinedPPO, SplitVecEnv  # noqa: E402
+from stable_baselines3 import PPO  # noqa: E402
+from stable_baselines3.common.vec_env import DummyVecEnv, VecMonitor  # noqa: E402
+
+MODES = ("dummy", "lockstep", "pipelined")
+
+def build_env(mode, endpoint, slots, groups):
+    loop = endpoint.loop
+    if mode == "dummy":
+        return PPO, VecMonitor(DummyVecEnv([lambda slot=slot: EnhancedMazeEnv(loop, slot) for slot in slots]))
+    if mode == "lockstep":
+        return PPO, VecMonitor(MazeVecEnv([EnhancedMazeEnv(loop, slot) for slot in slots], loop))
+    parts = np.array_split(np.arange(len(slots)), groups)
+    return PipelinedPPO, SplitVecEnv([
+        VecMonitor(MazeVecEnv([EnhancedMazeEnv(loop, slots[i]) for i in part], loop)) for part in parts
+    ])
+
+def run_mode(mode, args, port):
+    endpoint = GameEndpoint(port=port)
+    game = subprocess.Popen([sys.executable, os.path.join(TRAINING_DIR, "benchmarks", "fake_game.py"),
+                             "--url", f"ws://localhost:{port}", "--clients", str(args.clients),
+                             "--latency", str(args.latency), "--binary"])
+    try:
+        slots = endpoint.wait_for_envs(args.clients)
+        algo, env = build_env(mode, endpoint, slots, args.groups)
+        policy_kwargs = dict(net_arch=[args.hidden] * args.layers)
+        model = algo("MlpPolicy", env, n_steps=args.n_steps, batch_size=64, device="cpu", seed=0,
+                     policy_kwargs=policy_kwargs)
+        _, callback = model._setup_learn(args.n_steps * env.num_envs * (args.rounds + 1), None)
+        callback.on_training_start(locals(), globals())
+
+        model.collect_rollouts(model.env, callback, model.rollout_buffer, args.n_steps)  # warm-up
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            model.collect_rollouts(model.env, callback, model.rollout_buffer, args.n_steps)
+        elapsed = time.perf_counter() - started
+        env.close()
+        return args.rounds * args.n_steps * env.num_envs / elapsed
+    finally:
+        game.terminate()
+        game.wait()
+
+def main(args):
+    print(f"clients={args.clients} latency={args.latency}ms n_steps={args.n_steps} rounds={args.rounds} "
+          f"groups={args.groups} policy={args.layers}x{args.hidden}")
+    results = {}
+    for offset, mode in enumerate(args.modes):
+        results[mode] = run_mode(mode, args, args.port + offset)
+        speedup = f"  ({results[mode] / results['lockstep']:.2f}x lockstep)" if "lockstep" in results else ""
+        print(f"{mode:>10}: {results[mode]:8,.0f} env steps/sec{speedup}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rollout throughput: lockstep vs pipelined, against a fake-latency game")
+    parser.add_argument("--port", type=int, default=8810)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=5.0, help="fake game milliseconds per reply")
+    parser.add_argument("--n-steps", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--groups", type=int, default=2)
+    parser.add_argument("--hidden", type=int, default=64, help="policy/value layer width (SB3 default 64)")
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["lockstep", "dummy", "pipelined"])
+    main(parser.parse_args())
@@ -0,0 +1,79 @@
+# bench_step_channel.py - MICROBENCHMARK FOR THE TRAINER<->GAME STEP HANDOFF
+"""
+Runs the real bridge (`maze_bridge.handler` + `MazeVecEnv`) against the
+loopback fake game and reports per-step latency percentiles.
+
+`step` is the full round trip seen by SB3 (training thread -> socket -> fake
+game -> socket -> training thread). `handoff` is the part spent crossing
+threads: waking the event loop until it picks the step up, plus waking the
+training thread after the last reply landed. `send` is the event loop's
+`websocket.send` of the commands; on a machine where the fake game shares the
+core it includes the game being scheduled.
+
+    python benchmarks/bench_step_channel.py --steps 20000 --clients 1
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+TRAINING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TRAINING_DIR)
+from maze_bridge import GameEndpoint  # noqa: E402
+from maze_envs import EnhancedMazeEnv, MazeVecEnv  # noqa: E402
+
+def percentiles(samples_ns):
+    samples_us = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    return {f"p{p}": float(np.percentile(samples_us, p)) for p in (50, 95, 99)}
+
+def main(args):
+    endpoint = GameEndpoint(port=args.port)
+    game_cmd = [sys.executable, os.path.join(TRAINING_DIR, "benchmarks", "fake_game.py"),
+                "--url", f"ws://localhost:{args.port}", "--clients", str(args.clients),
+                "--batch", str(args.batch)]
+    if args.binary:
+        game_cmd.append("--binary")
+    game = subprocess.Popen(game_cmd)
+    try:
+        slots = endpoint.wait_for_envs(args.clients * max(args.batch, 1))
+        env = MazeVecEnv([EnhancedMazeEnv(endpoint.loop, slot) for slot in slots], endpoint.loop)
+        env.reset()
+        actions = np.zeros(env.num_envs, dtype=np.int64)
+
+        for _ in range(args.warmup):
+            env.step(actions)
+
+        step_ns, handoff_ns, send_ns = [], [], []
+        channel = env.channel
+        started = time.perf_counter()
+        for _ in range(args.steps):
+            t0 = time.perf_counter_ns()
+            env.step_async(actions)
+            env.step_wait()
+            t1 = time.perf_counter_ns()
+            step_ns.append(t1 - t0)
+            handoff_ns.append((channel.dequeued_at - t0) + (t1 - channel.completed_at))
+            send_ns.append(channel.dispatched_at - channel.dequeued_at)
+        elapsed = time.perf_counter() - started
+
+        print(f"envs={env.num_envs} clients={args.clients} batch={args.batch} binary={args.binary}")
+        print(f"vector steps/sec: {args.steps / elapsed:,.0f}   env steps/sec: {args.steps * env.num_envs / elapsed:,.0f}")
+        for name, samples in (("step", step_ns), ("handoff", handoff_ns), ("send", send_ns)):
+            stats = percentiles(samples)
+            print(f"{name:>8} latency us: " + "  ".join(f"{k}={v:.1f}" for k, v in stats.items()))
+    finally:
+        game.terminate()
+        game.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Step-handoff microbenchmark against a loopback fake game")
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--steps", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=0)
+    parser.add_argument("--binary", action="store_true")
+    main(parser.parse_args())
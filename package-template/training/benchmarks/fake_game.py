@@ -0,0 +1,144 @@
+# fake_game.py - LOOPBACK STAND-IN FOR THE BROWSER GAME
+"""
+Minimal game client for benchmarks: connects to the trainer's WebSocket,
+sends `game_ready` and answers every step/reset with a fixed observation
+(echoing the command's `seq`). Replies are instant by default, so measurements
+isolate the trainer side of the bridge; `--latency` makes each reply take that
+long, like a browser's physics/render step, and `--jitter` adds a random extra
+delay on top. `--disconnect-every N` drops the socket in the middle of every
+Nth step and reconnects, like a refreshed tab. Heartbeat pings are answered
+with pongs, and a command whose `seq` was already answered gets the same reply
+again instead of being re-run (the "resend" capability; `--no-resend` leaves it
+out, so the bridge never resends). `--hang-after N` stops answering anything
+after N steps while keeping the socket open, like a frozen tab.
+
+    python benchmarks/fake_game.py --url ws://localhost:8799 --clients 4 --batch 8 --binary
+    python benchmarks/fake_game.py --url ws://localhost:8799 --clients 8 --latency 5
+    python benchmarks/fake_game.py --clients 4 --latency 2 --jitter 3 --disconnect-every 5000 --seed 0
+    python benchmarks/fake_game.py --clients 2 --hang-after 3000
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+
+import numpy as np
+import websockets
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from maze_protocol import encode_frame  # noqa: E402
+
+OBS = [0.0] * 16
+# Replies kept for answering resent commands
+REPLY_CACHE = 64
+
+def json_reply(command, count, done):
+    seq = command.get('seq', 0)
+    if command['type'] == 'step':
+        return json.dumps({"seq": seq, "observation": OBS, "reward": 0.0, "done": done,
+                           "info": {"goal_reached": done, "distance_to_goal": 1.0}})
+    if command['type'] == 'reset':
+        return json.dumps({"seq": seq, "observation": OBS, "reward": 0.0, "done": False})
+    if command['type'] == 'step_batch':
+        return json.dumps({"seq": seq, "observations": [OBS] * count, "rewards": [0.0] * count,
+                           "dones": [done] * count, "infos": [{"goal_reached": done, "distance_to_goal": 1.0}] * count})
+    return json.dumps({"seq": seq, "observations": [OBS] * count})
+
+def binary_reply(command, count, done):
+    dones = np.full(count, done and command['type'].startswith('step'))
+    return encode_frame(np.zeros((count, 16), dtype=np.float32), np.zeros(count), dones, np.ones(count), dones,
+                        seq=command.get('seq', 0))
+
+async def serve_connection(websocket, state, batch, binary, episode_length, latency, jitter, disconnect_every, rng,
+                           hang_after=0, resend=True):
+    """Answer commands until the trainer closes the socket (False) or it is time to drop it (True)."""
+    capabilities = ["ping", "resend"] if resend else ["ping"]
+    ready = {"type": "game_ready", "capabilities": capabilities}
+    if batch:
+        ready.update(capabilities=["step_batch"] + capabilities, num_envs=batch)
+    if binary:
+        ready["formats"] = ["binary"]
+    await websocket.send(json.dumps(ready))
+
+    encode = binary_reply if binary else json_reply
+    async for message in websocket:
+        if hang_after and state["steps"] >= hang_after:
+            continue  # frozen: connected, but nothing gets answered
+        command = json.loads(message)
+        kind = command.get('type')
+        if kind == 'ping':
+            await websocket.send(json.dumps({"type": "pong", "seq": command.get('seq', 0)}))
+            continue
+        replies = state["replies"]
+        if command.get('seq') in replies:
+            await websocket.send(replies[command['seq']])
+            continue
+        if kind in ('step', 'step_batch'):
+            state["steps"] += 1
+            count = len(command.get('actions', [0]))
+            if disconnect_every and state["steps"] % disconnect_every == 0:
+                # Drop without answering: the bridge has to resend this step after the reconnect
+                return True
+        elif kind in ('reset', 'reset_batch'):
+            count = len(command.get('envs', [0]))
+        else:
+            continue
+        done = episode_length > 0 and state["steps"] % episode_length == 0 and kind in ('step', 'step_batch')
+        delay = latency + (rng.uniform(0.0, jitter) if jitter else 0.0)
+        if delay:
+            # One command at a time, like a game busy stepping its scene
+            await asyncio.sleep(delay)
+        reply = encode(command, count, done)
+        if command.get('seq'):
+            replies[command['seq']] = reply
+            if len(replies) > REPLY_CACHE:
+                replies.popitem(last=False)
+        await websocket.send(reply)
+    return False
+
+async def run_client(url, batch, binary, episode_length, latency=0.0, jitter=0.0, disconnect_every=0,
+                     reconnect_delay=0.0, seed=None, hang_after=0, resend=True):
+    rng = np.random.default_rng(seed)
+    state = {"steps": 0, "replies": collections.OrderedDict()}
+    while True:
+        try:
+            async with websockets.connect(url, max_size=None) as websocket:
+                dropped = await serve_connection(websocket, state, batch, binary, episode_length, latency, jitter,
+                                                 disconnect_every, rng, hang_after, resend)
+        except (OSError, websockets.exceptions.ConnectionClosed):
+            return
+        if not dropped:
+            return
+        # Like a refreshed browser tab: gone for a moment, then a fresh handshake
+        await asyncio.sleep(reconnect_delay)
+
+async def main(args):
+    await asyncio.gather(*(
+        run_client(args.url, args.batch, args.binary, args.episode_length, args.latency / 1000.0,
+                   args.jitter / 1000.0, args.disconnect_every, args.reconnect_delay / 1000.0,
+                   None if args.seed is None else args.seed + i, args.hang_after, not args.no_resend)
+        for i in range(args.clients)
+    ))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="ws://localhost:8799")
+    parser.add_argument("--clients", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=0, help="envs per client via step_batch (0 = legacy single step)")
+    parser.add_argument("--binary", action="store_true", help="negotiate binary observation frames")
+    parser.add_argument("--episode-length", type=int, default=200, help="steps between done flags (0 = never)")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds before each reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform random 0..N milliseconds per reply")
+    parser.add_argument("--disconnect-every", type=int, default=0,
+                        help="drop the connection (mid-step) every N steps per client, then reconnect (0 = never)")
+    parser.add_argument("--reconnect-delay", type=float, default=100.0, help="milliseconds before reconnecting")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the jitter (client i uses seed + i)")
+    parser.add_argument("--hang-after", type=int, default=0,
+                        help="stop answering (socket left open) after N steps per client (0 = never)")
+    parser.add_argument("--no-resend", action="store_true", help="don't advertise the resend capability")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except (KeyboardInterrupt, websockets.exceptions.ConnectionClosed):
+        pass
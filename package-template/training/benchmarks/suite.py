@@ -0,0 +1,325 @@
+# suite.py - RUN-TO-RUN BENCHMARK SUITE FOR THE BRIDGE, TRAINER AND EVALUATOR
+"""
+Runs the hot path against the loopback fake game (`fake_game.py`, today's
+WebSocket protocol) under a chosen latency / jitter / disconnect profile and
+writes one JSON file of results, so runs can be compared against a stored
+baseline before a release:
+
+  bridge   MazeVecEnv stepping with a fixed action: env steps/sec, step latency
+           p50/p99, single-env and full reset cost, RSS growth, reconnects
+  train    what `train_maze_solver.py` runs: PPO with the run config's
+           hyperparameters, MazeTrainingCallback and the async CheckpointWriter
+           (checkpoint every rollout): env steps/sec including updates,
+           checkpoint stall on the training thread, RSS growth
+  eval     `evaluate_maze_solver.evaluate` with a fresh policy: env steps/sec
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --baseline baseline.json --tolerance 0.1
+    python benchmarks/suite.py --latency 2 --jitter 3 --disconnect-every 3000 --output flaky.json
+    python benchmarks/suite.py --compare flaky.json --baseline baseline.json
+
+With `--baseline`, every metric that got worse by more than `--tolerance`
+(relative) and its noise floor (absolute) is reported and the exit status is 1.
+Baselines only mean something on the same machine with the same settings; the
+suite warns when the settings differ.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+TRAINING_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, TRAINING_DIR)
+from maze_bridge import GameEndpoint  # noqa: E402
+from maze_envs import EnhancedMazeEnv, MazeVecEnv  # noqa: E402
+
+RESULTS_VERSION = 1
+SCENARIOS = ("bridge", "train", "eval")
+# Settings that change what the numbers mean; a baseline taken with other values is flagged
+PROFILE_KEYS = ("clients", "batch", "binary", "latency", "jitter", "disconnect_every", "reconnect_delay",
+                "episode_length", "steps", "n_steps", "train_steps", "eval_episodes")
+
+# name: (unit, which direction is better (None = informational), absolute change treated as noise)
+METRICS = {
+    "bridge.env_steps_per_sec": ("steps/s", "higher", 0.0),
+    "bridge.step_ms_p50": ("ms", "lower", 0.02),
+    "bridge.step_ms_p99": ("ms", "lower", 0.1),
+    "bridge.step_ms_max": ("ms", None, 0.0),
+    "bridge.reset_env_ms_p50": ("ms", "lower", 0.05),
+    "bridge.reset_all_ms_p50": ("ms", "lower", 0.05),
+    "bridge.memory_growth_mb": ("MB", "lower", 4.0),
+    "bridge.reconnects": ("", None, 0.0),
+    "train.env_steps_per_sec": ("steps/s", "higher", 0.0),
+    "train.checkpoint_stall_ms_p50": ("ms", "lower", 2.0),
+    "train.checkpoint_stall_ms_max": ("ms", "lower", 10.0),
+    "train.memory_growth_mb": ("MB", "lower", 16.0),
+    "eval.env_steps_per_sec": ("steps/s", "higher", 0.0),
+    "eval.memory_growth_mb": ("MB", "lower", 8.0),
+}
+
+def rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc isn't available, None on Windows)."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def growth(before, after):
+    return None if before is None or after is None else after - before
+
+def ms_percentile(samples_ns, q):
+    return float(np.percentile(np.asarray(samples_ns, dtype=np.float64), q)) / 1e6
+
+class FakeGame:
+    """A GameEndpoint with `fake_game.py` clients connected, for one scenario."""
+    def __init__(self, args, port):
+        self.endpoint = GameEndpoint(port=port)
+        cmd = [sys.executable, os.path.join(TRAINING_DIR, "benchmarks", "fake_game.py"),
+               "--url", f"ws://localhost:{port}", "--clients", str(args.clients), "--batch", str(args.batch),
+               "--latency", str(args.latency), "--jitter", str(args.jitter), "--seed", str(args.seed),
+               "--disconnect-every", str(args.disconnect_every), "--reconnect-delay", str(args.reconnect_delay),
+               "--episode-length", str(args.episode_length)]
+        if args.binary:
+            cmd.append("--binary")
+        self.process = subprocess.Popen(cmd)
+        slots = self.endpoint.wait_for_envs(args.clients * max(args.batch, 1))
+        self.env = MazeVecEnv([EnhancedMazeEnv(self.endpoint.loop, slot) for slot in slots], self.endpoint.loop)
+        self.slots = slots
+
+    @property
+    def reconnects(self):
+        return sum(slot.connections - 1 for slot in self.slots)
+
+    def close(self):
+        self.env.close()
+        self.process.terminate()
+        self.process.wait()
+
+def bench_bridge(args, port):
+    game = FakeGame(args, port)
+    try:
+        env = game.env
+        env.reset()
+        actions = np.zeros(env.num_envs, dtype=np.int64)
+        for _ in range(args.warmup):
+            env.step(actions)
+
+        step_ns = np.zeros(args.steps, dtype=np.int64)
+        memory_before = rss_mb()
+        started = time.perf_counter()
+        for i in range(args.steps):
+            t0 = time.perf_counter_ns()
+            env.step_async(actions)
+            env.step_wait()
+            step_ns[i] = time.perf_counter_ns() - t0
+        elapsed = time.perf_counter() - started
+        memory_after = rss_mb()
+
+        reset_env_ns, reset_all_ns = [], []
+        for i in range(args.resets):
+            t0 = time.perf_counter_ns()
+            env.reset_envs(np.array([i % env.num_envs]))
+            reset_env_ns.append(time.perf_counter_ns() - t0)
+        for _ in range(max(1, args.resets // 10)):
+            t0 = time.perf_counter_ns()
+            env.reset()
+            reset_all_ns.append(time.perf_counter_ns() - t0)
+
+        return {
+            "bridge.env_steps_per_sec": args.steps * env.num_envs / elapsed,
+            "bridge.step_ms_p50": ms_percentile(step_ns, 50),
+            "bridge.step_ms_p99": ms_percentile(step_ns, 99),
+            "bridge.step_ms_max": float(step_ns.max()) / 1e6,
+            "bridge.reset_env_ms_p50": ms_percentile(reset_env_ns, 50),
+            "bridge.reset_all_ms_p50": ms_percentile(reset_all_ns, 50),
+            "bridge.memory_growth_mb": growth(memory_before, memory_after),
+            "bridge.reconnects": game.reconnects,
+        }
+    finally:
+        game.close()
+
+def bench_train(args, port):
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.vec_env import VecMonitor
+
+    from checkpointing import CheckpointWriter
+    from run_config import RunConfig
+    from training_callbacks import MazeTrainingCallback, training_state
+
+    config = RunConfig(n_steps=args.n_steps, device="cpu")
+    game = FakeGame(args, port)
+    training_state.total_timesteps = args.train_steps
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+        try:
+            env = VecMonitor(game.env)
+            model = PPO("MlpPolicy", env, verbose=0, seed=args.seed, **config.ppo_kwargs())
+            writer = CheckpointWriter(checkpoint_dir, keep_last=2)
+            stalls = []
+            save = writer.save
+
+            def timed_save(*save_args, **save_kwargs):
+                # What the training thread pays per checkpoint: the snapshot, plus queueing if the writer is behind
+                t0 = time.perf_counter_ns()
+                try:
+                    return save(*save_args, **save_kwargs)
+                finally:
+                    stalls.append(time.perf_counter_ns() - t0)
+
+            writer.save = timed_save
+            callback = MazeTrainingCallback(check_freq=args.n_steps * env.num_envs, save_path=checkpoint_dir,
+                                            writer=writer, config_hash=config.hash())
+            # The first rollout and update pay one-off costs (allocation, torch warm-up)
+            model.learn(total_timesteps=args.n_steps * env.num_envs, callback=callback)
+
+            memory_before = rss_mb()
+            started = time.perf_counter()
+            model.learn(total_timesteps=args.train_steps, callback=callback, reset_num_timesteps=False)
+            elapsed = time.perf_counter() - started
+            memory_after = rss_mb()
+            writer.close()
+            steps = model.num_timesteps - args.n_steps * env.num_envs
+            return {
+                "train.env_steps_per_sec": steps / elapsed,
+                "train.checkpoint_stall_ms_p50": ms_percentile(stalls, 50),
+                "train.checkpoint_stall_ms_max": max(stalls) / 1e6,
+                "train.memory_growth_mb": growth(memory_before, memory_after),
+            }
+        finally:
+            game.close()
+
+def bench_eval(args, port):
+    from stable_baselines3 import PPO
+
+    from evaluate_maze_solver import evaluate
+
+    game = FakeGame(args, port)
+    try:
+        model = PPO("MlpPolicy", game.env, seed=args.seed, device="cpu")
+        evaluate(model, game.env, game.env.num_envs)  # warm-up
+        memory_before = rss_mb()
+        results = evaluate(model, game.env, args.eval_episodes)
+        memory_after = rss_mb()
+        return {
+            "eval.env_steps_per_sec": float(results["steps"].sum()) / results["seconds"],
+            "eval.memory_growth_mb": growth(memory_before, memory_after),
+        }
+    finally:
+        game.close()
+
+BENCHMARKS = {"bridge": bench_bridge, "train": bench_train, "eval": bench_eval}
+
+def run_suite(args):
+    results = {}
+    for offset, name in enumerate(args.scenarios):
+        print(f" Running {name}...")
+        results.update(BENCHMARKS[name](args, args.port + offset))
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "settings": {key: getattr(args, key) for key in PROFILE_KEYS},
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "cpus": os.cpu_count()},
+        "scenarios": list(args.scenarios),
+        "results": results,
+    }
+
+def format_value(name, value):
+    if value is None:
+        return "-"
+    unit = METRICS.get(name, ("",))[0]
+    if isinstance(value, int):
+        return f"{value:,} {unit}".strip()
+    return f"{value:,.0f} {unit}".strip() if abs(value) >= 100 else f"{value:.3f} {unit}".strip()
+
+def print_results(run):
+    for name, value in run["results"].items():
+        print(f"  {name:<34} {format_value(name, value):>18}")
+
+def compare(run, baseline, tolerance):
+    """Print current vs baseline for every shared metric; returns the names of regressed metrics."""
+    if baseline.get("settings") != run.get("settings"):
+        changed = [key for key in PROFILE_KEYS
+                   if baseline.get("settings", {}).get(key) != run.get("settings", {}).get(key)]
+        print(f" ⚠️ Settings differ from the baseline ({', '.join(changed)}); the comparison may not mean much")
+    regressions = []
+    print(f"  {'metric':<34} {'baseline':>18} {'current':>18} {'change':>8}")
+    for name, value in run["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if value is None or before is None:
+            continue
+        _, better, noise = METRICS.get(name, ("", None, 0.0))
+        change = (value - before) / abs(before) if before else 0.0
+        status = ""
+        if better is not None:
+            worse = before - value if better == "higher" else value - before
+            if worse > abs(before) * tolerance and worse > noise:
+                status = "REGRESSION"
+                regressions.append(name)
+        print(f"  {name:<34} {format_value(name, before):>18} {format_value(name, value):>18} "
+              f"{change:>+8.1%} {status}")
+    return regressions
+
+def main(args):
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            run = json.load(file)
+    else:
+        print(f" Profile: clients={args.clients} batch={args.batch} binary={args.binary} latency={args.latency}ms "
+              f"jitter={args.jitter}ms disconnect_every={args.disconnect_every}")
+        run = run_suite(args)
+        output = args.output or f"bench_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(run, file, indent=2)
+        print(f" Results written to {output}")
+        print_results(run)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(run, baseline, args.tolerance)
+        if regressions:
+            print(f" ❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            return 1
+        print(f" ✅ No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bridge/trainer/evaluator benchmarks against a fake game, with baseline comparison")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", help="results file (default bench_<timestamp>.json)")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--compare", help="compare this results file with --baseline instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative slowdown allowed before failing")
+    parser.add_argument("--port", type=int, default=8820)
+    # Fake game profile
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=0)
+    parser.add_argument("--binary", action="store_true")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake game milliseconds per reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random 0..N milliseconds per reply")
+    parser.add_argument("--disconnect-every", type=int, default=0, help="drop each client every N steps (0 = never)")
+    parser.add_argument("--reconnect-delay", type=float, default=100.0)
+    parser.add_argument("--episode-length", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    # Workload sizes
+    parser.add_argument("--steps", type=int, default=5000, help="bridge: measured vector steps")
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--resets", type=int, default=200, help="bridge: single-env resets timed")
+    parser.add_argument("--n-steps", type=int, default=256, help="train: PPO n_steps (one checkpoint per rollout)")
+    parser.add_argument("--train-steps", type=int, default=8192, help="train: measured env steps")
+    parser.add_argument("--eval-episodes", type=int, default=32)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,291 @@
+# checkpointing.py - NON-BLOCKING CHECKPOINT WRITER
+"""
+Background checkpoint serialization for the training callbacks.
+
+`CheckpointWriter.save` runs on the training thread and only takes an in-memory
+snapshot of the model (the same pieces `BaseAlgorithm.save` collects: class
+data, policy/optimizer state dicts, torch variables). Zipping and writing the
+snapshot happens on a writer thread, so rollout collection keeps going.
+
+Each checkpoint is written to `<name>.zip.tmp`, fsynced and then renamed to
+`<name>.zip`, so a `.zip` on disk is always complete. After every write the
+retention policy keeps the newest `keep_last` checkpoints plus the one with the
+best success rate and deletes the rest (`keep_last` <= 0 keeps only the best,
+or the newest until one has a success rate). When training through a
+`preprocessing.ObservationPipeline`, its statistics are snapshotted with the
+model and written next to the zip first (`<name>.preprocess.json`).
+
+`CheckpointManifest` indexes what is on disk so resume and best-model lookups
+never list the directory: `checkpoints.jsonl` is an append-only history of
+every write/removal (path, timesteps, success rate, config hash, wall-clock)
+and `index.json` is an atomically replaced snapshot of the live entries plus
+the current latest/best. A missing or stale index is rebuilt from a scan.
+"""
+import copy
+import json
+import os
+import queue
+import threading
+import time
+import zipfile
+
+from stable_baselines3.common.save_util import save_to_zip_file
+
+from metrics import metrics
+from preprocessing import remove_stats, stats_path
+from run_config import config_hash
+
+TMP_SUFFIX = ".tmp"
+MANIFEST_HISTORY = "checkpoints.jsonl"
+MANIFEST_INDEX = "index.json"
+HASHED_HYPERPARAMS = ("n_envs", "n_steps", "batch_size", "n_epochs", "gamma", "gae_lambda",
+                      "ent_coef", "vf_coef", "max_grad_norm", "learning_rate")
+
+def snapshot_model(model):
+    """Copy everything `model.save` would write, so the live model can keep training."""
+    data = model.__dict__.copy()
+    state_dicts_names, torch_variable_names = model._get_torch_save_params()
+    exclude = set(model._excluded_save_params())
+    exclude.update(name.split(".")[0] for name in state_dicts_names + torch_variable_names)
+    for name in exclude:
+        data.pop(name, None)
+
+    pytorch_variables = {}
+    for name in torch_variable_names:
+        obj = model
+        for attr in name.split("."):
+            obj = getattr(obj, attr)
+        pytorch_variables[name] = obj
+
+    return {
+        "data": copy.deepcopy(data),
+        "params": copy.deepcopy(model.get_parameters()),
+        "pytorch_variables": copy.deepcopy(pytorch_variables),
+    }
+
+def is_complete_checkpoint(path):
+    """True for a fully written checkpoint zip (not a `.tmp` or truncated file)."""
+    return path.endswith(".zip") and os.path.isfile(path) and zipfile.is_zipfile(path)
+
+def model_config_hash(model):
+    """Hash of the hyperparameters that make two checkpoints comparable."""
+    return config_hash({name: getattr(model, name, None) for name in HASHED_HYPERPARAMS})
+
+def read_checkpoint_timesteps(path):
+    """`num_timesteps` stored in a checkpoint zip, read without loading any tensors."""
+    with zipfile.ZipFile(path) as archive:
+        return int(json.loads(archive.read("data"))["num_timesteps"])
+
+def write_json_atomic(path, payload):
+    tmp_path = path + TMP_SUFFIX
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(payload, file, indent=1)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+class CheckpointManifest:
+    """Index of the checkpoints in one directory (see module docstring)."""
+    def __init__(self, directory):
+        self.directory = directory
+        self.history_path = os.path.join(directory, MANIFEST_HISTORY)
+        self.index_path = os.path.join(directory, MANIFEST_INDEX)
+        self.lock = threading.Lock()
+        self.entries = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                entries = json.load(file)["checkpoints"]
+        except (OSError, ValueError, KeyError):
+            return self.rebuild()
+        latest = self._pick(entries, "latest")
+        if latest and not is_complete_checkpoint(os.path.join(self.directory, latest["file"])):
+            # Files were removed or replaced behind our back
+            return self.rebuild()
+        return entries
+
+    def rebuild(self):
+        """Re-derive the index from the directory, keeping metadata the history still has."""
+        known = {}
+        try:
+            with open(self.history_path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash
+                    known[record["file"]] = record
+        except OSError:
+            pass
+
+        entries = {}
+        if os.path.isdir(self.directory):
+            for file in os.listdir(self.directory):
+                path = os.path.join(self.directory, file)
+                if file.endswith(".zip" + TMP_SUFFIX):
+                    # Left behind by a run that died mid-write
+                    os.remove(path)
+                    continue
+                if not is_complete_checkpoint(path):
+                    continue
+                record = known.get(file)
+                if record is None or record.get("event") == "removed":
+                    try:
+                        timesteps = read_checkpoint_timesteps(path)
+                    except (KeyError, ValueError, zipfile.BadZipFile):
+                        continue
+                    record = {"file": file, "timesteps": timesteps, "success_rate": None,
+                              "config_hash": None, "time": os.path.getmtime(path),
+                              "final": not file.startswith("maze_model_enhanced_")}
+                entries[file] = {k: v for k, v in record.items() if k != "event"}
+        self.entries = entries
+        if os.path.isdir(self.directory):
+            self._write_index()
+        return entries
+
+    @staticmethod
+    def _pick(entries, which):
+        if which == "best":
+            scored = [e for e in entries.values() if e.get("success_rate") is not None]
+            return max(scored, key=lambda e: (e["success_rate"], e["timesteps"])) if scored else None
+        return max(entries.values(), key=lambda e: (e["timesteps"], e["time"])) if entries else None
+
+    def _write_index(self):
+        latest, best = self._pick(self.entries, "latest"), self._pick(self.entries, "best")
+        write_json_atomic(self.index_path, {
+            "latest": latest and latest["file"],
+            "best": best and best["file"],
+            "checkpoints": self.entries,
+        })
+
+    def _append(self, record):
+        with open(self.history_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record) + "\n")
+
+    def record(self, path, timesteps, success_rate=None, config_hash=None, final=False):
+        file = os.path.basename(path)
+        entry = {"file": file, "timesteps": int(timesteps),
+                 "success_rate": None if success_rate is None else float(success_rate),
+                 "config_hash": config_hash, "time": time.time(), "final": final}
+        with self.lock:
+            self._append(dict(entry, event="written"))
+            self.entries[file] = entry
+            self._write_index()
+
+    def remove(self, path):
+        file = os.path.basename(path)
+        with self.lock:
+            if self.entries.pop(file, None) is not None:
+                self._append({"file": file, "event": "removed", "time": time.time()})
+                self._write_index()
+
+    def latest(self):
+        """(path, timesteps) of the newest checkpoint, final models included, or (None, 0)."""
+        entry = self._pick(self.entries, "latest")
+        if entry is None:
+            return None, 0
+        return os.path.join(self.directory, entry["file"]), entry["timesteps"]
+
+    def best(self):
+        """(path, success_rate) of the best-scoring checkpoint, or (None, None)."""
+        entry = self._pick(self.entries, "best")
+        if entry is None:
+            return None, None
+        return os.path.join(self.directory, entry["file"]), entry["success_rate"]
+
+class CheckpointWriter:
+    """Write model snapshots on a background thread with atomic renames and bounded retention."""
+    def __init__(self, directory, prefix="maze_model_enhanced_", keep_last=5, max_pending=2, manifest=None,
+                 pipeline=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.keep_last = keep_last
+        self.pipeline = pipeline
+        self.manifest = manifest or CheckpointManifest(directory)
+        # (timesteps, path, success_rate) of every checkpoint under retention
+        self.checkpoints = self._existing_checkpoints()
+        self.last_written = None
+        self.queue = queue.Queue(maxsize=max_pending)
+        metrics.gauge("checkpoint_queue_depth", self.queue.qsize, "Checkpoint snapshots waiting for the writer thread")
+        self.thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def _existing_checkpoints(self):
+        return [
+            (entry["timesteps"], os.path.join(self.directory, file), entry["success_rate"])
+            for file, entry in self.manifest.entries.items()
+            if file.startswith(self.prefix) and not entry.get("final")
+        ]
+
+    def save(self, model, timesteps, success_rate=None, name=None, config_hash=None):
+        """Snapshot `model` now and queue it for writing; returns the final `.zip` path.
+
+        A `name` (e.g. the final model) is written outside the retention policy.
+        """
+        path = os.path.join(self.directory, f"{name or self.prefix + str(timesteps)}.zip")
+        if config_hash is None:
+            config_hash = model_config_hash(model)
+        stats = self.pipeline.state_dict() if self.pipeline is not None else None
+        # Blocks only if the writer is already `max_pending` checkpoints behind
+        self.queue.put((path, snapshot_model(model), stats, timesteps, success_rate, config_hash, name is not None))
+        return path
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                print(f" Checkpoint write failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, path, snapshot, stats, timesteps, success_rate, config_hash, final):
+        if stats is not None:
+            # Before the zip appears, so a complete checkpoint always has its statistics
+            write_json_atomic(stats_path(path), stats)
+        tmp_path = path + TMP_SUFFIX
+        with open(tmp_path, "wb") as file:
+            save_to_zip_file(file, **snapshot)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+        self.last_written = path
+        self.manifest.record(path, timesteps, success_rate, config_hash, final=final)
+        if final:
+            return
+        self.checkpoints = [c for c in self.checkpoints if c[1] != path]
+        self.checkpoints.append((timesteps, path, success_rate))
+        self._apply_retention()
+
+    def _apply_retention(self):
+        by_age = sorted(self.checkpoints, key=lambda c: c[0])
+        # [-0:] would be the whole list
+        keep = {c[1] for c in by_age[-self.keep_last:]} if self.keep_last > 0 else set()
+        scored = [c for c in self.checkpoints if c[2] is not None]
+        if scored:
+            keep.add(max(scored, key=lambda c: (c[2], c[0]))[1])
+        elif not keep and by_age:
+            keep.add(by_age[-1][1])  # something to resume from
+
+        for timesteps, path, _ in self.checkpoints:
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                remove_stats(path)
+                self.manifest.remove(path)
+        self.checkpoints = [c for c in self.checkpoints if c[1] in keep]
+
+    def flush(self):
+        """Wait until every queued checkpoint is on disk."""
+        self.queue.join()
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.thread.join()
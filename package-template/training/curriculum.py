@@ -0,0 +1,102 @@
+# curriculum.py - MAZE SIZE CURRICULUM
+"""
+Picks the room count (1-20) the envs generate on their next reset, so a run
+doesn't spend its sample budget on big mazes it can't solve yet.
+
+Schedules (`curriculum` in the run config):
+
+  * `off`      - every episode uses `maze_rooms` (the old behaviour).
+  * `adaptive` - start at `curriculum_start_rooms`; once `curriculum_window`
+                 episodes have finished at the current level, go up
+                 `curriculum_step` rooms if their success rate is at least
+                 `curriculum_promote`, down if it is below `curriculum_demote`.
+                 The window restarts after every change.
+  * `linear`   - grow from `curriculum_start_rooms` to `maze_rooms` evenly
+                 over the run's timesteps, regardless of success.
+
+`maze_rooms` is the ceiling for both. The scheduler's state (level and the
+history of level changes) is stored on the model as `model.curriculum`, so it
+is saved inside every checkpoint zip and picked up again on resume.
+"""
+import collections
+import time
+
+import numpy as np
+
+MIN_ROOMS = 1
+MAX_ROOMS = 20
+SCHEDULES = ("off", "adaptive", "linear")
+
+class CurriculumScheduler:
+    """Room-count schedule driven by finished episodes (see module docstring)."""
+    def __init__(self, schedule="adaptive", max_rooms=MAX_ROOMS, start_rooms=MIN_ROOMS, window=100,
+                 promote_at=0.8, demote_at=0.3, step=1, total_timesteps=0):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown curriculum {schedule!r}; expected one of {', '.join(SCHEDULES)}")
+        self.schedule = schedule
+        self.max_rooms = int(np.clip(max_rooms, MIN_ROOMS, MAX_ROOMS))
+        self.start_rooms = int(np.clip(start_rooms, MIN_ROOMS, self.max_rooms))
+        self.window = window
+        self.promote_at = promote_at
+        self.demote_at = demote_at
+        self.step = step
+        self.total_timesteps = total_timesteps
+        self.rooms = self.max_rooms if schedule == "off" else self.start_rooms
+        self.results = collections.deque(maxlen=window)
+        self.episodes = 0
+        # One entry per level change: rooms, timesteps, success rate that triggered it, wall-clock
+        self.history = [{"rooms": self.rooms, "timesteps": 0, "success_rate": None, "time": time.time()}]
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.curriculum, config.maze_rooms, config.curriculum_start_rooms, config.curriculum_window,
+                   config.curriculum_promote, config.curriculum_demote, config.curriculum_step,
+                   config.total_timesteps)
+
+    @property
+    def enabled(self):
+        return self.schedule != "off"
+
+    def success_rate(self):
+        return float(np.mean(self.results)) if self.results else None
+
+    def record_episodes(self, successes, timesteps):
+        """Feed finished episodes (bools); returns the new room count if the level changed, else None."""
+        for success in successes:
+            self.results.append(bool(success))
+            self.episodes += 1
+
+        if self.schedule == "linear":
+            progress = min(timesteps / max(self.total_timesteps, 1), 1.0)
+            rooms = self.start_rooms + int(progress * (self.max_rooms - self.start_rooms))
+        elif self.schedule == "adaptive" and len(self.results) >= self.window:
+            rate = self.success_rate()
+            rooms = self.rooms
+            if rate >= self.promote_at:
+                rooms = min(self.rooms + self.step, self.max_rooms)
+            elif rate < self.demote_at:
+                rooms = max(self.rooms - self.step, MIN_ROOMS)
+        else:
+            return None
+
+        if rooms == self.rooms:
+            return None
+        self.history.append({"rooms": rooms, "timesteps": int(timesteps),
+                             "success_rate": self.success_rate(), "time": time.time()})
+        self.rooms = rooms
+        self.results.clear()
+        return rooms
+
+    def state_dict(self):
+        return {"schedule": self.schedule, "rooms": self.rooms, "episodes": self.episodes,
+                "results": [int(r) for r in self.results], "history": list(self.history)}
+
+    def load_state_dict(self, state):
+        """Continue a saved curriculum (its schedule must match, otherwise the saved state is ignored)."""
+        if state.get("schedule") != self.schedule:
+            return False
+        self.rooms = int(np.clip(state["rooms"], MIN_ROOMS, self.max_rooms))
+        self.episodes = state.get("episodes", 0)
+        self.results.extend(bool(r) for r in state.get("results", []))
+        self.history = list(state.get("history", self.history))
+        return True
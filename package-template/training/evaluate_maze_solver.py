@@ -1,151 +1,175 @@
-# evaluate_maze_solver.py - FIXED OBSERVATION SHAPE
-import asyncio
-import websockets
-import json
-import numpy as np
+# evaluate_maze_solver.py - BATCHED EVALUATION ACROSS GAME CLIENTS OR THE HEADLESS SIM
+"""
+Plays `eval_episodes` episodes concurrently on a vector env and batches the
+observations of every live episode into one policy forward pass per tick.
+
+The env is the same one training uses: `HeadlessMazeVecEnv` with `--headless`,
+otherwise the connected browser game(s) via `maze_bridge` (`eval_envs` envs in
+total; batching clients may serve several each). Each env plays a fixed quota
+of episodes, so fast episodes can't crowd out slow ones and bias the results.
+
+    python evaluate_maze_solver.py --headless --eval-episodes 500 --eval-envs 64
+
+In game mode the WebSocket endpoint starts before torch/SB3 are imported and
+the model is loaded, so the game can connect while that happens. Observations
+go through the checkpoint's saved preprocessing (`preprocessing.py`), so the
+policy sees exactly what it saw in training.
+"""
+from startup_timing import startup
+import math
+import sys
 import time
-from stable_baselines3 import PPO
-
-# Load the trained maze solver
-MODEL_PATH = "training/maze_solver/maze_model_1000"
-model = PPO.load(MODEL_PATH)
-print(f"🧩 Loaded maze solver: {MODEL_PATH}")
-
-class EvaluationState:
-    def __init__(self):
-        self.active_connection = None
-        self.game_ready = False
-        self.command_queue = asyncio.Queue()
-        self.result_queue = asyncio.Queue()
-        
-eval_state = EvaluationState()
-
-def process_observation(raw_obs, step_count=0):
-    """Convert 9D game observation to 11D model observation"""
-    base_obs = np.array(raw_obs, dtype=np.float32)
-    
-    # Enhanced observation processing (matches training)
-    enhanced_obs = np.zeros(11, dtype=np.float32)
-    enhanced_obs[:9] = base_obs  # Original 9 features
-    
-    # Add normalized step count
-    enhanced_obs[9] = min(step_count / 1000.0, 1.0)
-    
-    # Add success history (default to 0)
-    enhanced_obs[10] = 0.0
-    
-    return enhanced_obs
-
-async def handler(websocket):
-    eval_state.active_connection = websocket
-    print(">>> Maze environment connected!")
-    
-    try:
-        ready_message = await websocket.recv()
-        if json.loads(ready_message).get('type') == 'game_ready':
-            eval_state.game_ready = True
-            print("✅ Maze ready for evaluation!")
-
-        async for message in websocket:
-            data = json.loads(message)
-            if 'observation' in data:
-                await eval_state.result_queue.put(data)
-                
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-
-async def command_sender():
-    while True:
-        command = await eval_state.command_queue.get()
-        if eval_state.active_connection and eval_state.game_ready:
-            try:
-                await eval_state.active_connection.send(json.dumps(command))
-            except:
-                await eval_state.command_queue.put(command)
-                await asyncio.sleep(1)
-
-async def run_evaluation():
-    """Comprehensive maze evaluation"""
-    while not eval_state.game_ready:
-        await asyncio.sleep(1)
-    
-    print("🎯 Starting maze evaluation...")
-    
-    success_count = 0
-    total_steps = 0
-    total_reward = 0
-    
-    for episode in range(10):  # More episodes for better evaluation
-        print(f"\n🧭 EPISODE {episode + 1}/10")
-        
-        # Reset environment
-        await eval_state.command_queue.put({"type": "reset"})
-        reset_data = await eval_state.result_queue.get()
-        
-        # Process observation to match training format
-        raw_obs = reset_data['observation']
-        obs = process_observation(raw_obs, step_count=0)
-        done = reset_data['done']
-        episode_steps = 0
-        episode_reward = 0
-        start_time = time.time()
-        
-        # Run episode
-        while not done and episode_steps < 1500:
-            action, _ = model.predict(obs, deterministic=True)
-            
-            await eval_state.command_queue.put({"type": "step", "action": int(action)})
-            step_data = await eval_state.result_queue.get()
-            
-            # Process observation for next step
-            raw_obs = step_data['observation']
-            obs = process_observation(raw_obs, step_count=episode_steps)
-            reward = step_data['reward']
-            done = step_data['done']
-            info = step_data.get('info', {})
-            
-            episode_reward += reward
-            episode_steps += 1
-            
-            # Progress indicator
-            if episode_steps % 200 == 0:
-                distance = info.get('distance_to_goal', 0)
-                print(f"   Step {episode_steps}, Distance: {distance:.1f}")
-        
-        # Episode results
-        elapsed = time.time() - start_time
-        success = info.get('goal_reached', False)
-        
-        if success:
-            success_count += 1
-            print(f"   ✅ SUCCESS: {episode_steps} steps, {elapsed:.1f}s, Reward: {episode_reward:.1f}")
-        else:
-            print(f"   ❌ FAILED: {episode_steps} steps, {elapsed:.1f}s, Reward: {episode_reward:.1f}")
-        
-        total_steps += episode_steps
-        total_reward += episode_reward
-        
-        await asyncio.sleep(1)  # Brief pause between episodes
-    
-    # Final evaluation summary
-    print(f"\n" + "="*50)
+
+import numpy as np
+
+from maze_bridge import GameEndpoint
+from run_config import RunConfig
+startup.mark("light imports")
+
+Z_95 = 1.96
+
+def load_model(config):
+    """Load `config.model_path`, or the latest checkpoint of the run when unset."""
+    from stable_baselines3 import PPO
+    from checkpointing import CheckpointManifest
+
+    model_path = config.model_path or CheckpointManifest(config.checkpoint_dir).latest()[0]
+    if model_path is None:
+        raise SystemExit(f"No model to evaluate: set --model-path or train into {config.checkpoint_dir}")
+    model = PPO.load(model_path, device=config.device)
+    print(f"🧩 Loaded maze solver: {model_path}")
+    return model, model_path
+
+def eval_env_count(config):
+    return max(1, min(config.eval_envs, config.eval_episodes))
+
+def start_endpoint(config):
+    """Bring the game socket up; games can connect from here on."""
+    endpoint = GameEndpoint(config.host, config.port, **config.bridge_kwargs())
+    startup.mark("server accepting")
+    print(f">>> Maze evaluation server started on {endpoint.address} ({startup.elapsed:.2f}s after launch)")
+    print(f">>> Open your maze environment in the browser ({eval_env_count(config)} env(s) needed)...")
+    return endpoint
+
+def make_eval_env(config, endpoint=None):
+    """Vector env with up to `eval_envs` envs (never more than there are episodes)."""
+    num_envs = eval_env_count(config)
+    if config.headless:
+        from maze_sim import HeadlessMazeVecEnv
+        print(f">>> Evaluating HEADLESS on {num_envs} simulated maze(s) with {config.maze_rooms} room(s)")
+        return HeadlessMazeVecEnv(num_envs, rooms=config.maze_rooms, max_steps=config.max_episode_steps)
+
+    from maze_envs import EnhancedMazeEnv, MazeVecEnv
+    endpoint = endpoint or start_endpoint(config)
+    slots = endpoint.wait_for_envs(num_envs)
+    print("✅ Maze ready for evaluation!")
+    return MazeVecEnv([EnhancedMazeEnv(endpoint.loop, slot) for slot in slots], endpoint.loop)
+
+def wilson_interval(successes, n, z=Z_95):
+    """Wilson score interval for a success proportion."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+def mean_interval(values, z=Z_95):
+    """(mean, half-width) of a normal-approximation confidence interval."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return float(values.mean()) if len(values) else 0.0, 0.0
+    return float(values.mean()), float(z * values.std(ddof=1) / math.sqrt(len(values)))
+
+def evaluate(model, env, episodes, max_episode_steps=1500, deterministic=True):
+    """
+    Run `episodes` episodes on `env` and return per-episode arrays
+    (`success`, `steps`, `reward`) plus the wall-clock time.
+    """
+    num_envs = env.num_envs
+    # Spread the episodes evenly: env i plays targets[i] of them
+    targets = np.full(num_envs, episodes // num_envs, dtype=np.int64)
+    targets[:episodes % num_envs] += 1
+    counts = np.zeros(num_envs, dtype=np.int64)
+    ep_rewards = np.zeros(num_envs, dtype=np.float64)
+    ep_steps = np.zeros(num_envs, dtype=np.int64)
+    successes, steps, rewards = [], [], []
+
+    started = time.perf_counter()
+    obs = env.reset()
+    while (counts < targets).any():
+        actions, _ = model.predict(obs, deterministic=deterministic)
+        obs, step_rewards, dones, infos = env.step(actions)
+        ep_rewards += step_rewards
+        ep_steps += 1
+
+        # Episodes the game hasn't ended by max_episode_steps count as failures and are restarted
+        over = np.flatnonzero(~dones & (ep_steps >= max_episode_steps))
+        for i in np.flatnonzero(dones | (ep_steps >= max_episode_steps)):
+            if counts[i] < targets[i]:
+                successes.append(bool(dones[i] and infos[i].get('goal_reached', False)))
+                steps.append(int(ep_steps[i]))
+                rewards.append(float(ep_rewards[i]))
+                counts[i] += 1
+            ep_rewards[i] = 0.0
+            ep_steps[i] = 0
+        if len(over):
+            obs[over] = env.reset_envs(over)
+
+    return {
+        "success": np.array(successes, dtype=bool),
+        "steps": np.array(steps, dtype=np.int64),
+        "reward": np.array(rewards, dtype=np.float64),
+        "seconds": time.perf_counter() - started,
+    }
+
+def summarize(results):
+    """Success rate, steps and reward with 95% confidence intervals."""
+    n = len(results["success"])
+    wins = int(results["success"].sum())
+    low, high = wilson_interval(wins, n)
+    steps_mean, steps_ci = mean_interval(results["steps"])
+    reward_mean, reward_ci = mean_interval(results["reward"])
+    return {
+        "episodes": n,
+        "successes": wins,
+        "success_rate": wins / n if n else 0.0,
+        "success_ci": [low, high],
+        "steps_mean": steps_mean,
+        "steps_ci": steps_ci,
+        "reward_mean": reward_mean,
+        "reward_ci": reward_ci,
+        "seconds": results["seconds"],
+    }
+
+def print_summary(summary, model_path):
+    low, high = summary["success_ci"]
+    print("\n" + "="*50)
     print("📊 MAZE SOLVER EVALUATION RESULTS")
     print("="*50)
-    print(f"Success Rate: {success_count}/10 ({success_count/10:.1%})")
-    print(f"Average Steps: {total_steps/10:.0f}")
-    print(f"Average Reward: {total_reward/10:.1f}")
-    print(f"Model: {MODEL_PATH}")
+    print(f"Success Rate: {summary['successes']}/{summary['episodes']} ({summary['success_rate']:.1%}, 95% CI {low:.1%}-{high:.1%})")
+    print(f"Average Steps: {summary['steps_mean']:.0f} ± {summary['steps_ci']:.0f}")
+    print(f"Average Reward: {summary['reward_mean']:.1f} ± {summary['reward_ci']:.1f}")
+    print(f"Wall-clock: {summary['seconds']:.1f}s")
+    print(f"Model: {model_path}")
     print("="*50)
 
-async def main():
-    asyncio.create_task(command_sender())
-    server = await websockets.serve(handler, "localhost", 8765)
-    print(">>> Maze evaluation server started on localhost:8765")
-    print(">>> Open your maze environment in the browser...")
-    
-    await run_evaluation()
-    
+def main(config):
+    endpoint = None if config.headless else start_endpoint(config)
+    model, model_path = load_model(config)
+    startup.mark("model ready")
+    if config.startup_report:
+        startup.report()
+    from preprocessing import preprocess_for_checkpoint
+    env = preprocess_for_checkpoint(make_eval_env(config, endpoint), model_path)
+    print(f"🎯 Evaluating {config.eval_episodes} episode(s) on {env.num_envs} env(s)...")
+    try:
+        results = evaluate(model, env, config.eval_episodes, config.max_episode_steps)
+    finally:
+        env.close()
+    print_summary(summarize(results), model_path)
     print("\n✅ Evaluation complete!")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main(RunConfig.load(sys.argv[1:]))
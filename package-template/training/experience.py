@@ -0,0 +1,176 @@
+# experience.py - RECORD GAME TRANSITIONS TO MEMORY-MAPPABLE SHARDS
+"""
+Optional recording of every vector step the trainer exchanges with the game,
+so runs can be replayed without a browser (`maze_envs.ReplayVecEnv`), used for
+behavior cloning / offline RL, or attached to a bug report.
+
+A recording is a directory of columnar NumPy shards plus an `index.json`:
+
+    index.json                    num_envs, obs_shape, column dtypes, shard list
+    shard_00000.obs.npy           float32 (steps, num_envs, *obs_shape)  obs the action was taken from
+    shard_00000.action.npy        int64   (steps, num_envs)
+    shard_00000.reward.npy        float32 (steps, num_envs)
+    shard_00000.done.npy          bool    (steps, num_envs)
+    shard_00000.next_obs.npy      float32 (steps, num_envs, *obs_shape)  terminal obs when done
+    shard_00000.goal_reached.npy  bool    (steps, num_envs)
+    shard_00000.distance.npy      float32 (steps, num_envs)  NaN when the game sent none
+    shard_00001.*.npy ...
+
+Rows are vector steps, so row t of every column describes the same step.
+`StepChannel` fills the recorder's preallocated buffers in place; full shards
+are written (`.tmp` + rename, like checkpoints) by a background thread, and
+`index.json` only lists shards that are completely on disk. `ExperienceDataset`
+opens every shard with `mmap_mode="r"`, so nothing is read until it is used.
+
+Imports only NumPy, so `maze_bridge` stays light.
+"""
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+INDEX_FILE = "index.json"
+FORMAT_VERSION = 1
+
+def _columns(obs_shape):
+    """name -> (dtype, per-env shape) of every recorded column."""
+    return {
+        "obs": (np.float32, tuple(obs_shape)),
+        "action": (np.int64, ()),
+        "reward": (np.float32, ()),
+        "done": (np.bool_, ()),
+        "next_obs": (np.float32, tuple(obs_shape)),
+        "goal_reached": (np.bool_, ()),
+        "distance": (np.float32, ()),
+    }
+
+class ExperienceRecorder:
+    """Buffers `record` calls into shards of `shard_steps` vector steps and writes them in the background."""
+    def __init__(self, directory, num_envs, obs_shape=(16,), shard_steps=4096, max_pending=2):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.num_envs = num_envs
+        self.obs_shape = tuple(obs_shape)
+        self.shard_steps = shard_steps
+        self.columns = _columns(self.obs_shape)
+        self.shards = []
+        self.steps = 0
+        self._buffers = self._allocate()
+        self._fill = 0
+        self.closed = False
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(target=self._run, name="experience-writer", daemon=True)
+        self.thread.start()
+
+    def _allocate(self):
+        return {name: np.zeros((self.shard_steps, self.num_envs) + shape, dtype=dtype)
+                for name, (dtype, shape) in self.columns.items()}
+
+    def record(self, obs, actions, rewards, dones, next_obs, infos):
+        """Append one vector step. `obs` is what the actions were chosen from; `next_obs` what the step returned."""
+        if self.closed:
+            return
+        row = self._fill
+        buffers = self._buffers
+        buffers["obs"][row] = obs
+        buffers["action"][row] = actions
+        buffers["reward"][row] = rewards
+        buffers["done"][row] = dones
+        buffers["next_obs"][row] = next_obs
+        for i, info in enumerate(infos):
+            if dones[i] and "terminal_observation" in info:
+                buffers["next_obs"][row, i] = info["terminal_observation"]
+            buffers["goal_reached"][row, i] = bool(info.get("goal_reached", False))
+            buffers["distance"][row, i] = info.get("distance_to_goal", np.nan)
+        self._fill += 1
+        if self._fill == self.shard_steps:
+            self._flush_buffers()
+
+    def _flush_buffers(self):
+        if self._fill == 0:
+            return
+        buffers, fill = self._buffers, self._fill
+        self._buffers, self._fill = self._allocate(), 0
+        # Blocks only if the writer is already `max_pending` shards behind
+        self.queue.put((buffers, fill))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                print(f" Experience shard write failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    def _write(self, buffers, fill):
+        name = f"shard_{len(self.shards):05d}"
+        for column, data in buffers.items():
+            path = os.path.join(self.directory, f"{name}.{column}.npy")
+            with open(path + ".tmp", "wb") as file:
+                np.save(file, data[:fill])
+            os.replace(path + ".tmp", path)
+        self.shards.append({"name": name, "steps": fill})
+        self.steps += fill
+        self._write_index()
+
+    def _write_index(self):
+        index = {
+            "version": FORMAT_VERSION,
+            "num_envs": self.num_envs,
+            "obs_shape": list(self.obs_shape),
+            "columns": {name: np.dtype(dtype).str for name, (dtype, _) in self.columns.items()},
+            "steps": self.steps,
+            "shards": self.shards,
+        }
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(index, file, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def flush(self):
+        """Write the partial shard and wait until everything recorded so far is on disk."""
+        self._flush_buffers()
+        self.queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self.queue.put(None)
+        self.thread.join()
+
+class ExperienceDataset:
+    """Read side of a recording: memory-mapped columns, one array per shard."""
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), encoding="utf-8") as file:
+            self.index = json.load(file)
+        if self.index.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported experience format in {directory}: {self.index.get('version')}")
+        self.num_envs = self.index["num_envs"]
+        self.obs_shape = tuple(self.index["obs_shape"])
+        self.steps = self.index["steps"]
+        self.shards = [
+            {column: np.load(os.path.join(directory, f"{shard['name']}.{column}.npy"), mmap_mode="r")
+             for column in self.index["columns"]}
+            for shard in self.index["shards"]
+        ]
+
+    def __len__(self):
+        return self.steps
+
+    def column(self, name):
+        """One column over the whole recording, loaded into memory: shape (steps, num_envs, ...)."""
+        return np.concatenate([shard[name] for shard in self.shards]) if self.shards else np.zeros(0)
+
+    def transitions(self):
+        """(obs, action) pairs flattened over envs, e.g. for behavior cloning."""
+        obs, actions = self.column("obs"), self.column("action")
+        return obs.reshape((-1,) + self.obs_shape), actions.reshape(-1)
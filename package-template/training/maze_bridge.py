@@ -0,0 +1,736 @@
+# maze_bridge.py - WEBSOCKET BRIDGE BETWEEN THE TRAINER AND THE GAME
+"""
+Game-side plumbing shared by the trainer, benchmarks and tools: the WebSocket
+`handler`, the per-connection `GameSlot`s and the `StepChannel` that hands steps
+between the SB3 training thread and the event loop. The gym/SB3 env classes
+built on top of it live in `maze_envs`.
+
+Connections are held to deadlines (`BridgeState`, set from the run config):
+games that list "ping" in their handshake `capabilities` are pinged every
+`heartbeat_interval` and must answer `{"type": "pong", "seq": <seq>}`, which
+tracks their round-trip time. Such a game that stays silent for `stall_timeout`
+(no reply to a command, or to a ping) is dropped as stalled and can reconnect
+(or be restarted by `supervisor.py`) like a refreshed tab. Steps aren't
+idempotent, so a command is only resent before that (up to `step_retries`
+times, every `stall_timeout / (step_retries + 1)`) to games that list "resend":
+they echo `seq` and answer a repeated `seq` without running the command again.
+Games without "ping" (the browser game) are held to no deadline: a background
+tab may be throttled for minutes and still come back.
+
+Commands waiting on a dropped or disconnected game are resent when it comes
+back if it lists "resend". Otherwise, or if a pinging game hasn't taken the
+slot over after `reconnect_timeout`, they are given up: the slot is marked
+lost, the episodes its envs were in end as truncated (`TimeLimit.truncated`,
+with `game_lost` in their infos), and its envs idle (same observation, no
+reward) while the StepChannel keeps stepping the other slots. The next step
+once a game is on the slot again restarts its envs' episodes. A StepChannel
+whose slots are all lost waits for a game instead of idling.
+
+Importing this module has no side effects (no log files, no stdout redirection)
+and pulls in neither torch nor SB3, so entry points can have the game socket
+accepting connections before the heavy stack has loaded.
+"""
+import asyncio
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+import websockets
+
+from maze_protocol import decode_frame, record_infos
+from metrics import metrics
+
+OBS_SHAPE = (16,)
+
+# Hot-path timers, exposed through metrics.MetricsServer / MetricsReporter
+ENQUEUE_TIME = metrics.histogram("bridge_enqueue_seconds", "Training thread hand-off until the event loop dispatches")
+SEND_TIME = metrics.histogram("bridge_send_seconds", "websocket.send of one command")
+REPLY_TIME = metrics.histogram("game_reply_seconds", "Command sent until the game's reply arrives")
+DECODE_TIME = metrics.histogram("bridge_decode_seconds", "Decoding one game reply")
+ENV_STEP_TIME = metrics.histogram("env_step_seconds", "Vector env step as seen by the training thread")
+ENV_STEPS = metrics.counter("env_steps_total", "Env steps (one per env per vector step)")
+CONNECTIONS = metrics.counter("game_connections_total", "Game handshakes completed")
+RECONNECTS = metrics.counter("game_reconnects_total", "Handshakes that took over a slot a previous connection left")
+PING_TIME = metrics.histogram("game_ping_seconds", "Heartbeat ping sent until the game's pong arrives")
+RETRIES = metrics.counter("bridge_retries_total", "Commands resent after going unanswered")
+STALLS = metrics.counter("game_stalls_total", "Connected games dropped for missing a deadline")
+GAMES_LOST = metrics.counter("game_slots_lost_total", "Slots given up on after reconnect_timeout without a game")
+TRUNCATED = metrics.counter("bridge_truncated_envs_total", "Env episodes cut short because their game was lost")
+
+class PendingRequest:
+    """A command sent to a game slot, waiting for the reply carrying its `seq`."""
+    __slots__ = ('seq', 'kind', 'payload', 'on_reply', 'context', 'sent_at', 'retries')
+
+    def __init__(self, seq, kind, payload, on_reply, context=None):
+        self.seq = seq
+        self.kind = kind
+        self.payload = payload
+        self.on_reply = on_reply
+        self.context = context
+        self.sent_at = 0
+        self.retries = 0
+
+_next_seq = itertools.count(1)
+
+class GameSlot:
+    """
+    One connected game process. Old clients serve a single env; clients that
+    negotiate `step_batch` in the handshake serve `num_envs` envs over one socket.
+
+    Every command carries a bridge-wide `seq` and this slot's `env` id, and
+    replies are routed back to the matching PendingRequest, so several commands
+    can be in flight at once and a late reply can never be taken for another.
+    """
+    def __init__(self, index, num_envs=1):
+        self.index = index
+        self.num_envs = num_envs
+        self.step_batch = False
+        self.connection = None
+        self.game_ready = False
+        self.paused = False
+        # Requests awaiting a reply, in send order; resent if the game reconnects before answering
+        self.in_flight = {}
+        self.stale_replies = 0
+        self.connections = 0
+        # Envs out of step with the game (commands given up on): they idle until a game is
+        # on the slot, and the next step after that restarts their episodes
+        self.lost = False
+        # Set while a game is connected and ready, for channels waiting on a lost slot
+        self.connected = asyncio.Event()
+        # Game dedups commands by seq, so unanswered ones can be resent safely
+        self.resend = False
+        # Heartbeat: whether the game answers pings, the outstanding ping, smoothed RTT in seconds
+        self.heartbeat = False
+        self.last_heard = 0
+        self.ping_seq = 0
+        self.ping_sent = 0
+        self.last_ping = 0
+        self.rtt = None
+        self.stalls = 0
+        self.channel = None
+        self.env_slice = slice(0, num_envs)
+        # Game settings (e.g. rooms) sent in a `configure` command ahead of the next reset
+        self.settings = {}
+        self._settings_sent = None
+
+    def attach(self, channel, env_slice):
+        self.channel = channel
+        self.env_slice = env_slice
+
+    async def submit(self, kind, fields, on_reply, context=None):
+        """
+        Send a command (event loop only) and register `on_reply(slot, request, result)`
+        for its reply. `fields` is the pre-encoded JSON tail after type/seq/env.
+        The command is held back until the game is connected.
+        """
+        seq = next(_next_seq)
+        # Commands are formatted by hand: json.dumps is measurable at thousands of steps/sec
+        payload = '{"type": "%s", "seq": %d, "env": %d%s}' % (kind, seq, self.index, fields)
+        request = PendingRequest(seq, kind, payload, on_reply, context)
+        self.in_flight[seq] = request
+        await self._send(request)
+        return request
+
+    async def _send(self, request):
+        if self.connection is not None and self.game_ready:
+            try:
+                request.sent_at = started = time.perf_counter_ns()
+                await self.connection.send(request.payload)
+                SEND_TIME.observe_ns(started)
+            except websockets.exceptions.ConnectionClosed:
+                print(f" Connection lost during send on slot {self.index}, will resend on reconnect...")
+                self.paused = True
+                self.game_ready = False
+
+    def configure(self, **settings):
+        """Update game settings from any thread; they take effect from the slot's next reset."""
+        self.settings = dict(self.settings, **settings)
+
+    async def send_settings(self):
+        """Send a `configure` command if the settings changed since the game last saw them (event loop only).
+
+        It expects no reply, so games that don't know the command just ignore it.
+        """
+        settings = self.settings
+        if not settings or settings == self._settings_sent or self.connection is None or not self.game_ready:
+            return
+        try:
+            await self.connection.send(json.dumps(dict(type="configure", seq=next(_next_seq), env=self.index, **settings)))
+            self._settings_sent = settings
+        except websockets.exceptions.ConnectionClosed:
+            pass  # resent after the reconnect
+
+    async def ping(self):
+        """Send a heartbeat ping (event loop only); `on_pong` times the answer."""
+        self.ping_seq = next(_next_seq)
+        self.ping_sent = self.last_ping = time.perf_counter_ns()
+        try:
+            await self.connection.send('{"type": "ping", "seq": %d, "env": %d}' % (self.ping_seq, self.index))
+        except websockets.exceptions.ConnectionClosed:
+            pass  # the handler notices the disconnect
+
+    def on_pong(self, seq, received):
+        if not self.ping_sent or seq != self.ping_seq:
+            return
+        PING_TIME.observe_ns(self.ping_sent, received)
+        rtt = (received - self.ping_sent) / 1e9
+        self.rtt = rtt if self.rtt is None else 0.8 * self.rtt + 0.2 * rtt
+        self.ping_sent = 0
+
+    async def resume(self):
+        """
+        Resend every in-flight command, with its original seq, after a reconnect.
+        A game that doesn't dedup may have run them already, so they are given up instead.
+        """
+        if not self.resend:
+            self.give_up()
+            return
+        for request in list(self.in_flight.values()):
+            print(f" Resending pending {request.kind} #{request.seq} to slot {self.index}")
+            request.retries = 0
+            await self._send(request)
+
+    def give_up(self):
+        """Drop every unanswered command and mark the slot lost; the channel truncates the episodes they were in."""
+        pending = list(self.in_flight.values())
+        self.in_flight.clear()
+        if not pending:
+            return
+        self.lost = True
+        print(f" Giving up {len(pending)} unanswered command(s) on slot {self.index}; truncating its episodes")
+        for request in pending:
+            self.channel.abandon(self, request)
+
+    def take_request(self, seq):
+        """Pop the request a reply answers; replies without a seq (old clients) answer the oldest one."""
+        if seq:
+            request = self.in_flight.pop(seq, None)
+            if request is None:
+                self.stale_replies += 1
+            return request
+        if self.in_flight:
+            return self.in_flight.pop(next(iter(self.in_flight)))
+        return None
+
+class BridgeState:
+    """
+    The slots of one game server and the deadlines its connections are held
+    to (seconds; 0 turns a deadline off, see the module docstring).
+    """
+    def __init__(self, heartbeat_interval=2.0, stall_timeout=15.0, step_retries=1, reconnect_timeout=30.0):
+        self.slots = []
+        self.heartbeat_interval = heartbeat_interval
+        self.stall_timeout = stall_timeout
+        self.step_retries = step_retries
+        self.reconnect_timeout = reconnect_timeout
+        # Notified whenever a game connects or drops, so threads wait on games without polling
+        self.changed = threading.Condition()
+
+    def configure(self, **deadlines):
+        for name, value in deadlines.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"BridgeState has no deadline {name!r}")
+            setattr(self, name, value)
+
+    def notify(self):
+        with self.changed:
+            self.changed.notify_all()
+
+    def wait_for_envs(self, count, timeout=None):
+        """Block until games serving `count` envs are ready; False if `timeout` ran out first."""
+        with self.changed:
+            return self.changed.wait_for(lambda: self.ready_env_count() >= count, timeout)
+
+    @property
+    def training_paused(self):
+        return any(slot.paused for slot in self.slots)
+
+    def ready_slots(self):
+        return [slot for slot in self.slots if slot.game_ready]
+
+    def ready_env_count(self):
+        return sum(slot.num_envs for slot in self.ready_slots())
+
+    def claim_slot(self, num_envs=1):
+        """Hand a new connection the first free slot of the same width, reusing slots left by disconnected tabs."""
+        for slot in self.slots:
+            if slot.connection is None and slot.num_envs == num_envs:
+                return slot
+        slot = GameSlot(len(self.slots), num_envs)
+        self.slots.append(slot)
+        return slot
+
+bridge_state = BridgeState()
+# The shared server's game clients (worker endpoints keep their own BridgeState)
+metrics.gauge("game_envs_ready", bridge_state.ready_env_count, "Envs of connected, ready game clients")
+metrics.gauge("game_rtt_seconds", lambda: max(slot.rtt for slot in bridge_state.ready_slots() if slot.rtt is not None),
+              "Slowest connected game's smoothed heartbeat round trip")
+
+def release_slot(slot, state=bridge_state):
+    slot.connection = None
+    slot.game_ready = False
+    slot.paused = True
+    slot.ping_sent = 0
+    slot.connected.clear()
+    state.notify()
+
+def abandon_slot(slot, connections, state):
+    """
+    Give up on a slot whose game left (`connections` was its count then) and
+    never came back: its pending commands are dropped and its envs idle.
+    """
+    if slot.connection is not None or slot.connections != connections:
+        return
+    print(f" No game on slot {slot.index} for {state.reconnect_timeout:g}s; giving up on it")
+    GAMES_LOST.inc()
+    slot.give_up()
+    slot.lost = True
+
+def schedule_abandon(slot, state):
+    # Only pinging games are held to deadlines (see the module docstring)
+    if not (state.reconnect_timeout and slot.heartbeat):
+        return
+    loop = asyncio.get_running_loop()
+    connections = slot.connections
+    loop.call_later(state.reconnect_timeout, abandon_slot, slot, connections, state)
+
+async def stall(slot, websocket, state, reason):
+    """Drop a connected game that stopped answering, as if it had disconnected."""
+    print(f" Game on slot {slot.index} stalled ({reason}); dropping it. Training paused...")
+    STALLS.inc()
+    slot.stalls += 1
+    release_slot(slot, state)
+    schedule_abandon(slot, state)
+    # A hung game may never finish the closing handshake, so don't wait on it
+    asyncio.get_running_loop().create_task(websocket.close(1011, "game stalled"))
+
+async def watch_slot(slot, websocket, state):
+    """
+    Heartbeat and deadlines for a game that answers pings: ping it, resend
+    commands unanswered for `stall_timeout / (step_retries + 1)` if it dedups
+    them, and `stall` it once a command or ping is unanswered for `stall_timeout`
+    (or, without "resend", a command at all).
+    """
+    interval_ns = int(state.heartbeat_interval * 1e9)
+    stall_ns = int(state.stall_timeout * 1e9)
+    attempt_ns = stall_ns // (state.step_retries + 1)
+    if not slot.heartbeat or not (interval_ns or stall_ns):
+        return
+    tick = min(t for t in (state.heartbeat_interval, state.stall_timeout / (state.step_retries + 1)) if t > 0) / 4
+    while slot.connection is websocket:
+        await asyncio.sleep(tick)
+        if slot.connection is not websocket:
+            return
+        now = time.perf_counter_ns()
+        if stall_ns:
+            if slot.ping_sent and now - slot.ping_sent > stall_ns:
+                await stall(slot, websocket, state, f"no pong for {state.stall_timeout:g}s")
+                return
+            deadline = attempt_ns if slot.resend else stall_ns
+            for request in list(slot.in_flight.values()):
+                if not request.sent_at or now - request.sent_at < deadline:
+                    continue
+                if not slot.resend or request.retries >= state.step_retries:
+                    await stall(slot, websocket, state, f"no reply to {request.kind} #{request.seq} "
+                                                        f"in {state.stall_timeout:g}s")
+                    return
+                request.retries += 1
+                RETRIES.inc()
+                print(f" No reply to {request.kind} #{request.seq} on slot {slot.index}, resending")
+                await slot._send(request)
+        if interval_ns and not slot.ping_sent and now - slot.last_ping >= interval_ns:
+            await slot.ping()
+
+async def handler(websocket, state=bridge_state):
+    slot = None
+    watchdog = None
+    try:
+        ready = json.loads(await websocket.recv())
+        if ready.get('type') != 'game_ready':
+            return
+        # Clients that understand batched steps / binary frames advertise it in the handshake
+        capabilities = ready.get('capabilities', [])
+        step_batch = 'step_batch' in capabilities
+        binary = 'binary' in ready.get('formats', [])
+        num_envs = max(1, int(ready.get('num_envs', 1))) if step_batch else 1
+
+        slot = state.claim_slot(num_envs)
+        slot.connection = websocket
+        slot.step_batch = step_batch
+        slot.heartbeat = 'ping' in capabilities
+        slot.resend = 'resend' in capabilities
+        slot.paused = False
+        slot.connections += 1
+        CONNECTIONS.inc()
+        if slot.connections > 1:
+            RECONNECTS.inc()
+        print(f">>> Enhanced maze environment connected! (slot {slot.index}, {num_envs} env(s))")
+        if step_batch or binary:
+            await websocket.send(json.dumps({
+                "type": "session",
+                "step_batch": step_batch,
+                "num_envs": num_envs,
+                "format": "binary" if binary else "json",
+            }))
+
+        slot.game_ready = True
+        slot._settings_sent = None  # a (re)connected game starts from its own defaults
+        slot.last_heard = slot.last_ping = time.perf_counter_ns()
+        slot.rtt = None
+        slot.connected.set()
+        state.notify()
+        print(f" Maze ready on slot {slot.index}! Training active.")
+        await slot.resume()
+        watchdog = asyncio.get_running_loop().create_task(watch_slot(slot, websocket, state))
+
+        async for message in websocket:
+            received = time.perf_counter_ns()
+            if slot.connection is not websocket:
+                break  # dropped as stalled
+            slot.last_heard = received
+            if isinstance(message, bytes):
+                seq, result = decode_frame(message)
+            else:
+                result = json.loads(message)
+                if 'observation' not in result and 'observations' not in result:
+                    if result.get('type') == 'pong':
+                        slot.on_pong(result.get('seq'), received)
+                    continue
+                seq = result.get('seq')
+            DECODE_TIME.observe_ns(received)
+            request = slot.take_request(seq)
+            if request is not None:
+                if request.sent_at:
+                    REPLY_TIME.observe_ns(request.sent_at, received)
+                await request.on_reply(slot, request, result)
+
+    except websockets.exceptions.ConnectionClosed:
+        if slot is not None and slot.connection is websocket:
+            print(f" Game disconnected from slot {slot.index}! Training paused...")
+    except Exception as e:
+        print(f"WebSocket error: {e}")
+    finally:
+        if watchdog is not None:
+            watchdog.cancel()
+        # A stalled game's slot was already released, and may belong to a new connection by now
+        if slot is not None and slot.connection is websocket:
+            release_slot(slot, state)
+            schedule_abandon(slot, state)
+
+class GameEndpoint:
+    """
+    A game WebSocket server (TCP port or Unix socket) with its own BridgeState,
+    served from a private event loop on a daemon thread.
+    """
+    def __init__(self, host="localhost", port=8765, unix_path=None, **deadlines):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.state = BridgeState(**deadlines)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        errors = []
+
+        async def serve():
+            handle = functools.partial(handler, state=self.state)
+            if unix_path:
+                # A socket file left by a previous run would make the bind fail
+                os.makedirs(os.path.dirname(unix_path) or ".", exist_ok=True)
+                if os.path.exists(unix_path):
+                    os.unlink(unix_path)
+                await websockets.unix_serve(handle, unix_path, max_size=None)
+            else:
+                await websockets.serve(handle, host, port, max_size=None)
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(serve())
+            except Exception as e:
+                errors.append(e)
+                return
+            finally:
+                started.set()
+            self.loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    @property
+    def address(self):
+        return f"unix:{self.unix_path}" if self.unix_path else f"{self.host}:{self.port}"
+
+    def wait_for_envs(self, count):
+        """Block until `count` envs are connected; returns the ready slots that cover them."""
+        return wait_for_slots(self.state, count)
+
+def wait_for_slots(state, count):
+    """Block until `state`'s games serve `count` envs; returns the ready slots that cover them."""
+    state.wait_for_envs(count)
+    slots = []
+    for slot in state.ready_slots():
+        if sum(s.num_envs for s in slots) >= count:
+            break
+        slots.append(slot)
+    return slots
+
+def step_command(slot, actions):
+    """(type, JSON fields) of the step command for a slot."""
+    if slot.step_batch:
+        return 'step_batch', ', "actions": [%s]' % ', '.join(map(str, actions.tolist()))
+    return 'step', ', "action": %d' % actions[0]
+
+def reset_command(slot, env_indices):
+    """(type, JSON fields) of the reset command for the given envs of a slot."""
+    if slot.step_batch:
+        return 'reset_batch', ', "envs": [%s]' % ', '.join(str(int(i)) for i in env_indices)
+    return 'reset', ''
+
+# Every live StepChannel (several when rollouts are pipelined over env groups), for the gauges below
+_channels = weakref.WeakSet()
+
+def _channel_slots():
+    return [slot for channel in list(_channels) for slot in channel.slots]
+
+metrics.gauge("bridge_in_flight", lambda: sum(len(s.in_flight) for s in _channel_slots()),
+              "Commands sent to the game and not yet answered")
+metrics.gauge("bridge_stale_replies", lambda: sum(s.stale_replies for s in _channel_slots()),
+              "Replies whose seq matched no pending command")
+
+class StepChannel:
+    """
+    Low-latency handoff between the SB3 training thread and the game sockets.
+
+    The training thread writes actions into a preallocated buffer and wakes the
+    event loop once with `call_soon_threadsafe`. Each slot's reply is decoded by
+    `handler` straight into the shared result buffers, done envs are reset from
+    the same coroutine, and the last slot to finish releases the training thread
+    through a `threading.Event`. No asyncio queues, sender task or
+    concurrent futures sit on the per-step path. `step_async`/`step_wait` split
+    the exchange, so the caller can work (e.g. run inference for another env
+    group) while the game steps. Slots whose game was lost idle (see the module
+    docstring) rather than holding up the rest.
+
+    With a `recorder` (an `experience.ExperienceRecorder`) every vector step is
+    also appended to a replayable recording.
+    """
+    def __init__(self, loop, slots, obs_shape=OBS_SHAPE, recorder=None):
+        self.loop = loop
+        self.slots = slots
+        self.recorder = recorder
+        self.env_slices = []
+        start = 0
+        for slot in slots:
+            env_slice = slice(start, start + slot.num_envs)
+            self.env_slices.append(env_slice)
+            slot.attach(self, env_slice)
+            start += slot.num_envs
+        self.num_envs = start
+
+        self.actions = np.zeros(self.num_envs, dtype=np.int64)
+        self.obs = np.zeros((self.num_envs,) + obs_shape, dtype=np.float32)
+        self.rewards = np.zeros(self.num_envs, dtype=np.float32)
+        self.dones = np.zeros(self.num_envs, dtype=bool)
+        self.infos = [{} for _ in range(self.num_envs)]
+
+        self._ready = threading.Event()
+        self._outstanding = 0
+        self.requested_at = 0
+        # perf_counter_ns when the event loop picked the exchange up / the last command went out /
+        # the last reply landed, for handoff benchmarks
+        self.dequeued_at = 0
+        self.dispatched_at = 0
+        self.completed_at = 0
+        self._step_started = 0
+        self._obs_before = None
+        _channels.add(self)
+
+    # --- training thread side ---
+
+    def step(self, actions):
+        self.step_async(actions)
+        self.step_wait()
+
+    def step_async(self, actions):
+        """Send a step for every env and return at once; `step_wait` collects the results."""
+        self._step_started = time.perf_counter_ns()
+        self.actions[:] = actions
+        self._obs_before = self.obs.copy() if self.recorder is not None else None
+        self._start(self._dispatch_step)
+
+    def step_wait(self):
+        self._ready.wait()
+        ENV_STEP_TIME.observe_ns(self._step_started)
+        ENV_STEPS.inc(self.num_envs)
+        if self.recorder is not None:
+            self.recorder.record(self._obs_before, self.actions, self.rewards, self.dones, self.obs, self.infos)
+
+    def reset(self):
+        self._exchange(self._dispatch_reset)
+
+    def reset_envs(self, indices):
+        """Restart just the given envs (global indices) and wait for their new observations."""
+        indices = np.asarray(indices, dtype=np.int64)
+        targets = []
+        for slot, env_slice in zip(self.slots, self.env_slices):
+            local = indices[(indices >= env_slice.start) & (indices < env_slice.stop)] - env_slice.start
+            if len(local):
+                targets.append((slot, local))
+        if targets:
+            self._exchange(lambda: self._dispatch_env_resets(targets), len(targets))
+
+    def _start(self, dispatch, outstanding=None):
+        self._ready.clear()
+        self._outstanding = len(self.slots) if outstanding is None else outstanding
+        self.requested_at = time.perf_counter_ns()
+        self.loop.call_soon_threadsafe(self.loop.create_task, dispatch())
+
+    def _exchange(self, dispatch, outstanding=None):
+        self._start(dispatch, outstanding)
+        self._ready.wait()
+
+    # --- event loop side ---
+
+    async def _dispatch_step(self):
+        self.dequeued_at = time.perf_counter_ns()
+        ENQUEUE_TIME.observe_ns(self.requested_at, self.dequeued_at)
+        if self._all_lost():
+            await self._wait_for_game()
+        for slot, env_slice in zip(self.slots, self.env_slices):
+            if not slot.lost:
+                await slot.submit(*step_command(slot, self.actions[env_slice]), self.on_step_reply)
+            elif slot.game_ready:
+                # A game is back on a lost slot: start its envs over, ending the idle episodes
+                slot.lost = False
+                print(f" Game back on slot {slot.index}; restarting its episodes")
+                await slot.send_settings()
+                await slot.submit(*reset_command(slot, range(slot.num_envs)), self.on_rejoin_reply)
+            else:
+                self._idle(slot)
+        self.dispatched_at = time.perf_counter_ns()
+
+    async def _dispatch_reset(self):
+        self.dequeued_at = time.perf_counter_ns()
+        ENQUEUE_TIME.observe_ns(self.requested_at, self.dequeued_at)
+        if self._all_lost():
+            await self._wait_for_game()
+        for slot in self.slots:
+            if slot.lost and not slot.game_ready:
+                self._complete()  # nothing to reset until a game is on the slot
+                continue
+            slot.lost = False
+            await slot.send_settings()
+            await slot.submit(*reset_command(slot, range(slot.num_envs)), self.on_reset_reply)
+        self.dispatched_at = time.perf_counter_ns()
+
+    async def _dispatch_env_resets(self, targets):
+        self.dequeued_at = time.perf_counter_ns()
+        ENQUEUE_TIME.observe_ns(self.requested_at, self.dequeued_at)
+        for slot, local in targets:
+            if slot.lost:
+                # Restarted as a whole by the next step once a game is on the slot
+                self._complete()
+                continue
+            await slot.send_settings()
+            await slot.submit(*reset_command(slot, local), self.on_reset_reply, context=local)
+        self.dispatched_at = time.perf_counter_ns()
+
+    def _all_lost(self):
+        return all(slot.lost and not slot.game_ready for slot in self.slots)
+
+    async def _wait_for_game(self):
+        """With every slot lost and none of them connected there is nothing to idle for: wait for a game."""
+        print(" No game left on this channel's slots; waiting for one to connect...")
+        waiters = [asyncio.ensure_future(slot.connected.wait()) for slot in self.slots]
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    def _idle(self, slot):
+        """Step a lost slot's envs without a game: same observation, no reward, not done."""
+        self.rewards[slot.env_slice] = 0.0
+        self.dones[slot.env_slice] = False
+        self.infos[slot.env_slice] = [{'game_lost': True} for _ in range(slot.num_envs)]
+        self._complete()
+
+    def _truncate(self, slot):
+        """End the episodes of a slot's envs where they stand, on the last observation its game sent."""
+        self.rewards[slot.env_slice] = 0.0
+        self.dones[slot.env_slice] = True
+        self.infos[slot.env_slice] = [{'terminal_observation': row.copy(), 'TimeLimit.truncated': True,
+                                       'game_lost': True} for row in self.obs[slot.env_slice]]
+
+    def abandon(self, slot, request):
+        """
+        Stand in for the reply to a command `slot` gave up on (event loop only):
+        a step truncates the slot's episodes, a reset leaves its observations as
+        they are (the slot is restarted once a game is back).
+        """
+        if request.kind in ('step', 'step_batch'):
+            TRUNCATED.inc(slot.num_envs)
+            self._truncate(slot)
+        self._complete()
+
+    def _complete(self):
+        self._outstanding -= 1
+        if self._outstanding == 0:
+            self.completed_at = time.perf_counter_ns()
+            self._ready.set()
+
+    async def on_reset_reply(self, slot, request, result):
+        """Reply to a full reset, or (with `request.context` = env indices) to the auto-reset of finished envs."""
+        rows = self.obs[slot.env_slice]
+        obs = result['obs'] if isinstance(result, np.ndarray) else result.get('observations', [result.get('observation')])
+        if request.context is None:
+            rows[:] = obs
+        else:
+            rows[request.context] = obs
+        self._complete()
+
+    async def on_rejoin_reply(self, slot, request, result):
+        """Reply to the reset a lost slot gets once a game is back: its idle episodes end there."""
+        self._truncate(slot)
+        rows = self.obs[slot.env_slice]
+        rows[:] = result['obs'] if isinstance(result, np.ndarray) else result.get('observations', [result.get('observation')])
+        self._complete()
+
+    async def on_step_reply(self, slot, request, result):
+        kind = request.kind
+        rows = self.obs[slot.env_slice]
+        infos = self.infos
+        if isinstance(result, np.ndarray):
+            np.copyto(rows, result['obs'])
+            self.rewards[slot.env_slice] = result['reward']
+            self.dones[slot.env_slice] = result['done']
+            infos[slot.env_slice] = record_infos(result)
+        elif kind == 'step_batch':
+            rows[:] = result['observations']
+            self.rewards[slot.env_slice] = result['rewards']
+            self.dones[slot.env_slice] = result['dones']
+            infos[slot.env_slice] = result.get('infos') or [{} for _ in range(slot.num_envs)]
+        else:
+            rows[0] = result['observation']
+            self.rewards[slot.env_slice] = result['reward']
+            self.dones[slot.env_slice] = result['done']
+            infos[slot.env_slice] = [result.get('info', {})]
+
+        done_indices = np.flatnonzero(self.dones[slot.env_slice])
+        if len(done_indices) == 0:
+            self._complete()
+            return
+        # Same auto-reset contract as DummyVecEnv, but only this slot waits on it
+        for i in done_indices:
+            info = infos[slot.env_slice.start + i]
+            info["terminal_observation"] = rows[i].copy()
+            info["TimeLimit.truncated"] = False
+        await slot.send_settings()
+        await slot.submit(*reset_command(slot, done_indices), self.on_reset_reply, context=done_indices)
@@ -0,0 +1,273 @@
+# maze_envs.py - GYM / SB3 ENVS OVER THE GAME BRIDGE
+"""
+Env classes the trainer and evaluator step: `EnhancedMazeEnv` (one single-env
+game slot), `EndpointMazeEnv` (a worker-process endpoint for SubprocVecEnv) and
+`MazeVecEnv` (every connected slot as one SB3 VecEnv). All of them step through
+`maze_bridge.StepChannel`, and all take a `record_dir` to record what the game
+sends into an `experience` recording. `ReplayVecEnv` plays such a recording
+back with no game attached.
+
+Kept apart from `maze_bridge` because importing SB3 pulls in torch; entry
+points import this module only after their game socket is up.
+"""
+import functools
+import os
+import time
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.spaces import Box, Discrete
+from stable_baselines3.common.vec_env import VecEnv
+
+from experience import ExperienceDataset, ExperienceRecorder
+from maze_bridge import OBS_SHAPE, GameEndpoint, StepChannel
+
+class EnhancedMazeEnv(gym.Env):
+    """ Gym environment for the enhanced maze with 16D observation space, bound to one single-env game slot. """
+    def __init__(self, loop, slot, record_dir=None):
+        super().__init__()
+        self.loop = loop
+        self.slot = slot
+        self.record_dir = record_dir
+        self.action_space = Discrete(7)
+        self.observation_space = Box(low=-1.0, high=1.0, shape=OBS_SHAPE, dtype=np.float32)
+        self.channel = None
+
+    def _channel(self):
+        if self.channel is None:
+            if self.slot.num_envs != 1:
+                raise ValueError(f"Slot {self.slot.index} serves {self.slot.num_envs} envs; use MazeVecEnv")
+            recorder = ExperienceRecorder(self.record_dir, 1, OBS_SHAPE) if self.record_dir else None
+            self.channel = StepChannel(self.loop, [self.slot], recorder=recorder)
+        return self.channel
+
+    def reset(self, seed=None, options=None):
+        channel = self._channel()
+        channel.reset()
+        return channel.obs[0].copy(), {}
+
+    def step(self, action):
+        channel = self._channel()
+        channel.step([action])
+        done, info = bool(channel.dones[0]), channel.infos[0]
+        # Episodes the bridge ended because the game was lost are truncated, not terminated
+        truncated = done and info.get('TimeLimit.truncated', False)
+        return channel.obs[0].copy(), float(channel.rewards[0]), done and not truncated, truncated, info
+
+    def set_rooms(self, rooms):
+        """Ask the game for `rooms`-room mazes from the next reset on (a `configure` command)."""
+        self.slot.configure(rooms=int(rooms))
+
+    def close(self):
+        if self.channel is not None and self.channel.recorder is not None:
+            self.channel.recorder.close()
+
+class EndpointMazeEnv(gym.Env):
+    """
+    Single-env maze served by its own GameEndpoint. Built inside a SubprocVecEnv
+    worker, so the socket loop and observation decoding for each game run in a
+    separate process from PyTorch. The endpoint starts on construction; the
+    first reset blocks until a game connects to it.
+    """
+    def __init__(self, port=None, unix_path=None, host="localhost", record_dir=None, deadlines=None):
+        super().__init__()
+        self.action_space = Discrete(7)
+        self.observation_space = Box(low=-1.0, high=1.0, shape=OBS_SHAPE, dtype=np.float32)
+        self.endpoint = GameEndpoint(host, port, unix_path, **(deadlines or {}))
+        self.record_dir = record_dir
+        self.env = None
+        self.rooms = None
+        self.steps = 0
+        self._window_start = time.perf_counter()
+        self._window_steps = 0
+        print(f">>> Worker endpoint listening on {self.endpoint.address}")
+
+    def reset(self, seed=None, options=None):
+        if self.env is None:
+            slot = self.endpoint.wait_for_envs(1)[0]
+            self.env = EnhancedMazeEnv(self.endpoint.loop, slot, self.record_dir)
+            if self.rooms is not None:
+                self.env.set_rooms(self.rooms)
+        return self.env.reset(seed=seed, options=options)
+
+    def step(self, action):
+        self.steps += 1
+        return self.env.step(action)
+
+    def set_rooms(self, rooms):
+        self.rooms = rooms
+        if self.env is not None:
+            self.env.set_rooms(rooms)
+
+    def close(self):
+        if self.env is not None:
+            self.env.close()
+
+    def throughput(self):
+        """Steps/sec since the previous call."""
+        now = time.perf_counter()
+        rate = (self.steps - self._window_steps) / max(now - self._window_start, 1e-9)
+        self._window_start, self._window_steps = now, self.steps
+        return rate
+
+def endpoint_env_fns(count, base_port=8765, socket_dir=None, host="localhost", record_dir=None, deadlines=None):
+    """
+    Env constructors for `count` worker endpoints on consecutive ports, or Unix
+    sockets in `socket_dir`. Worker i records into `<record_dir>/worker_<i>`;
+    `deadlines` are the endpoints' BridgeState heartbeat/timeout settings.
+    """
+    def worker_record_dir(i):
+        return os.path.join(record_dir, f"worker_{i}") if record_dir else None
+
+    if socket_dir:
+        return [functools.partial(EndpointMazeEnv, unix_path=os.path.join(socket_dir, f"game_{i}.sock"),
+                                  record_dir=worker_record_dir(i), deadlines=deadlines)
+                for i in range(count)]
+    return [functools.partial(EndpointMazeEnv, port=base_port + i, host=host, record_dir=worker_record_dir(i),
+                              deadlines=deadlines)
+            for i in range(count)]
+
+class MazeVecEnv(VecEnv):
+    """
+    Vectorized env over all connected game slots. Each vector step sends one
+    frame per slot at once (a `step_batch` for batching clients, a plain `step`
+    otherwise) through a shared StepChannel, so one slow tab no longer
+    serializes the others.
+    """
+    def __init__(self, envs, loop, record_dir=None):
+        self.envs = envs
+        self.loop = loop
+        obs_shape = envs[0].observation_space.shape
+        recorder = None
+        if record_dir:
+            recorder = ExperienceRecorder(record_dir, sum(env.slot.num_envs for env in envs), obs_shape)
+        self.channel = StepChannel(loop, [env.slot for env in envs], obs_shape, recorder=recorder)
+        self.env_owner = []
+        for position, env in enumerate(envs):
+            self.env_owner.extend([position] * env.slot.num_envs)
+        super().__init__(self.channel.num_envs, envs[0].observation_space, envs[0].action_space)
+
+    def reset(self):
+        self.channel.reset()
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return self.channel.obs.copy()
+
+    def reset_envs(self, indices):
+        """Restart only the given envs; returns their new observations."""
+        self.channel.reset_envs(indices)
+        return self.channel.obs[indices].copy()
+
+    def step_async(self, actions):
+        # The commands go out now; step_wait only waits for the replies
+        self.channel.step_async(actions)
+
+    def step_wait(self):
+        channel = self.channel
+        channel.step_wait()
+        return channel.obs.copy(), channel.rewards.copy(), channel.dones.copy(), list(channel.infos)
+
+    def close(self):
+        if self.channel.recorder is not None:
+            self.channel.recorder.close()
+
+    def _target_envs(self, indices):
+        return [self.envs[self.env_owner[i]] for i in self._get_indices(indices)]
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(env, attr_name) for env in self._target_envs(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        for env in self._target_envs(indices):
+            setattr(env, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(env, method_name)(*method_args, **method_kwargs) for env in self._target_envs(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [isinstance(env, wrapper_class) for env in self._target_envs(indices)]
+
+class ReplayVecEnv(VecEnv):
+    """
+    Plays an `experience` recording back as a VecEnv, without the game.
+
+    Playback is open loop: each step returns the next recorded transition
+    whatever the policy chose (`action_mismatches` counts the actions that
+    differ from the recorded ones). When the recording runs out, every env is
+    truncated and playback starts again from the first step. Useful for
+    deterministic trainer/protocol benchmarks and for reproducing a session.
+    """
+    def __init__(self, directory):
+        self.dataset = ExperienceDataset(directory)
+        if not len(self.dataset):
+            raise ValueError(f"Recording in {directory} has no complete shards yet")
+        self.render_mode = None
+        super().__init__(
+            self.dataset.num_envs,
+            Box(low=-1.0, high=1.0, shape=self.dataset.obs_shape, dtype=np.float32),
+            Discrete(7),
+        )
+        self.shard = 0
+        self.row = 0
+        self.actions = None
+        self.action_mismatches = 0
+        self.replays = 0
+
+    def _current(self, column):
+        return self.dataset.shards[self.shard][column][self.row]
+
+    def reset(self):
+        self.shard, self.row = 0, 0
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return np.array(self._current("obs"))
+
+    def reset_envs(self, indices):
+        """A recording can't restart single envs; returns their current observations."""
+        return np.array(self._current("obs"))[indices]
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        rewards = np.array(self._current("reward"))
+        dones = np.array(self._current("done"))
+        next_obs = np.array(self._current("next_obs"))
+        goal_reached = self._current("goal_reached").tolist()
+        distance = self._current("distance").tolist()
+        self.action_mismatches += int((np.asarray(self.actions) != self._current("action")).sum())
+
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        self.row += 1
+        if self.row == len(self.dataset.shards[self.shard]["obs"]):
+            self.shard, self.row = self.shard + 1, 0
+            if self.shard == len(self.dataset.shards):
+                # End of the recording: cut every running episode and start over
+                self.shard = 0
+                self.replays += 1
+                truncated = ~dones
+                dones[:] = True
+
+        infos = []
+        for i in range(self.num_envs):
+            info = {'goal_reached': goal_reached[i]}
+            if not np.isnan(distance[i]):
+                info['distance_to_goal'] = distance[i]
+            if dones[i]:
+                info['terminal_observation'] = next_obs[i]
+                info['TimeLimit.truncated'] = bool(truncated[i])
+            infos.append(info)
+        return np.array(self._current("obs")), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        raise AttributeError(f"ReplayVecEnv has no env method {method_name!r}")
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
@@ -0,0 +1,79 @@
+# maze_protocol.py - BINARY OBSERVATION FRAMES FOR THE GAME SOCKET
+"""
+Binary wire format negotiated in the `game_ready` handshake.
+
+A game that lists "binary" in its `formats` is told `"format": "binary"` in the
+session reply and then answers `step`/`reset`/`step_batch`/`reset_batch` with
+one binary frame instead of a JSON message. Commands sent to the game stay JSON.
+
+A frame is a 12-byte little-endian header followed by `count` fixed-size records:
+
+    header:  magic b"MZ" | version u8 | flags u8 | count u16 | obs_dim u16 | seq u32
+    record:  obs float32[obs_dim] | reward float32 | distance_to_goal float32
+             | done u8 | goal_reached u8 | 2 pad bytes
+
+`seq` echoes the `seq` of the command being answered (0 = not echoed).
+Version 1 frames (8-byte header, no `seq`) are still accepted.
+
+Records are 4-byte aligned, so `decode_frame` is a zero-copy `np.frombuffer`
+view over the received bytes.
+"""
+import struct
+import numpy as np
+
+FRAME_MAGIC = b"MZ"
+FRAME_VERSION = 2
+FRAME_HEADER = struct.Struct("<2sBBHHI")
+FRAME_HEADER_V1 = struct.Struct("<2sBBHH")
+OBS_DIM = 16
+
+_record_dtypes = {}
+
+def record_dtype(obs_dim=OBS_DIM):
+    """Structured dtype of one env record in a binary frame."""
+    dtype = _record_dtypes.get(obs_dim)
+    if dtype is None:
+        dtype = np.dtype([
+            ('obs', '<f4', (obs_dim,)),
+            ('reward', '<f4'),
+            ('distance_to_goal', '<f4'),
+            ('done', 'u1'),
+            ('goal_reached', 'u1'),
+            ('pad', 'u1', (2,)),
+        ])
+        _record_dtypes[obs_dim] = dtype
+    return dtype
+
+def decode_frame(message):
+    """Return (seq, records): the echoed command seq and a zero-copy structured view of the records."""
+    magic, version, _, count, obs_dim = FRAME_HEADER_V1.unpack_from(message)
+    if magic != FRAME_MAGIC or version not in (1, FRAME_VERSION):
+        raise ValueError(f"Unsupported frame: magic={magic!r} version={version}")
+    if version == 1:
+        seq, offset = 0, FRAME_HEADER_V1.size
+    else:
+        seq, offset = FRAME_HEADER.unpack_from(message)[-1], FRAME_HEADER.size
+    return seq, np.frombuffer(message, dtype=record_dtype(obs_dim), count=count, offset=offset)
+
+def encode_frame(observations, rewards=None, dones=None, distances=None, goal_reached=None, seq=0):
+    """Pack stacked per-env results into a binary frame (used by headless clients and tests)."""
+    observations = np.asarray(observations, dtype=np.float32)
+    count, obs_dim = observations.shape
+    records = np.zeros(count, dtype=record_dtype(obs_dim))
+    records['obs'] = observations
+    if rewards is not None:
+        records['reward'] = rewards
+    if dones is not None:
+        records['done'] = dones
+    if distances is not None:
+        records['distance_to_goal'] = distances
+    if goal_reached is not None:
+        records['goal_reached'] = goal_reached
+    return FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, 0, count, obs_dim, seq) + records.tobytes()
+
+def record_infos(records):
+    """Rebuild the per-env `info` dicts the JSON protocol carries."""
+    return [
+        {'goal_reached': bool(goal), 'distance_to_goal': float(distance)}
+        for goal, distance in zip(records['goal_reached'].tolist(), records['distance_to_goal'].tolist())
+    ]
@@ -0,0 +1,303 @@
+# maze_sim.py - HEADLESS NUMPY MAZE SIMULATOR
+"""
+Headless stand-in for the browser maze, vectorized over many mazes at once.
+
+Each maze is 1-20 square rooms on a 5x4 room grid, joined by doors along a
+random spanning tree, rasterized into a boolean wall grid. The agent moves on
+that grid with the game's 7 discrete actions:
+
+    0 stay | 1 forward | 2 backward | 3 strafe left | 4 strafe right
+    5 turn left | 6 turn right
+
+and observes the same 16-D vector in [-1, 1] that the trainer's
+observation space declares:
+
+    0-1   agent position (x, z)            2-3   heading (sin, cos)
+    4-5   goal direction in agent frame    6     distance to goal
+    7-14  wall distance along 8 rays, starting straight ahead, clockwise
+    15    episode progress (steps / max_steps)
+
+This layout is the simulator's own: the browser game's 16-D vector is only
+approximated by it. Code that reads single features (`preprocessing`'s
+feature augmentation) uses the `OBS_*` indices below and runs on the
+simulator only.
+
+`info` carries the game's `goal_reached` and `distance_to_goal` keys. All
+per-step work is NumPy fancy indexing over the whole batch; wall-ray
+distances are precomputed per maze on reset.
+"""
+import time
+
+import numpy as np
+from gymnasium.spaces import Box, Discrete
+from stable_baselines3.common.vec_env import VecEnv
+
+from metrics import metrics
+
+ENV_STEP_TIME = metrics.histogram("env_step_seconds", "Vector env step as seen by the training thread")
+ENV_STEPS = metrics.counter("env_steps_total", "Env steps (one per env per vector step)")
+
+MAX_ROOMS = 20
+ROOM_GRID_COLS = 5
+ROOM_GRID_ROWS = 4
+ROOM_SIZE = 5
+RAY_RANGE = 8
+OBS_DIM = 16
+NUM_ACTIONS = 7
+
+# Feature indices of the observation layout above
+OBS_GOAL_RIGHT = 4
+OBS_GOAL_FORWARD = 5
+OBS_RAYS = slice(7, 15)
+
+GRID_H = ROOM_GRID_ROWS * (ROOM_SIZE + 1) + 1
+GRID_W = ROOM_GRID_COLS * (ROOM_SIZE + 1) + 1
+GRID_DIAG = float(np.hypot(GRID_H, GRID_W))
+
+# Heading 0..3 = north, east, south, west as (d_row, d_col)
+HEADINGS = np.array([(-1, 0), (0, 1), (1, 0), (0, -1)], dtype=np.int64)
+# Compass rays 0..7 = N, NE, E, SE, S, SW, W, NW; heading h looks along ray 2h
+RAYS = np.array([(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)], dtype=np.int64)
+# Action -> heading offset of the move (-1 = no move), and turn delta
+MOVE_OFFSET = np.array([-1, 0, 2, 3, 1, -1, -1], dtype=np.int64)
+TURN_DELTA = np.array([0, 0, 0, 0, 0, -1, 1], dtype=np.int64)
+
+STEP_PENALTY = -0.01
+WALL_PENALTY = -0.05
+PROGRESS_SCALE = 0.1
+GOAL_REWARD = 10.0
+
+def _room_center(room):
+    room_row, room_col = divmod(room, ROOM_GRID_COLS)
+    return room_row * (ROOM_SIZE + 1) + 1 + ROOM_SIZE // 2, room_col * (ROOM_SIZE + 1) + 1 + ROOM_SIZE // 2
+
+def _room_neighbours(room, num_rooms):
+    room_row, room_col = divmod(room, ROOM_GRID_COLS)
+    for d_row, d_col in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+        row, col = room_row + d_row, room_col + d_col
+        other = row * ROOM_GRID_COLS + col
+        if 0 <= row < ROOM_GRID_ROWS and 0 <= col < ROOM_GRID_COLS and other < num_rooms:
+            yield other
+
+def generate_maze(num_rooms, rng):
+    """Rasterize one random maze; returns (walls, start_cell, goal_cell)."""
+    walls = np.ones((GRID_H, GRID_W), dtype=bool)
+    for room in range(num_rooms):
+        room_row, room_col = divmod(room, ROOM_GRID_COLS)
+        top, left = room_row * (ROOM_SIZE + 1) + 1, room_col * (ROOM_SIZE + 1) + 1
+        walls[top:top + ROOM_SIZE, left:left + ROOM_SIZE] = False
+
+    # Randomized Prim over the row-major room prefix, which is always connected
+    start_room = int(rng.integers(num_rooms))
+    tree = {start_room: []}
+    frontier = [(start_room, other) for other in _room_neighbours(start_room, num_rooms)]
+    while frontier:
+        room, other = frontier.pop(int(rng.integers(len(frontier))))
+        if other in tree:
+            continue
+        tree[room].append(other)
+        tree[other] = [room]
+        frontier.extend((other, nxt) for nxt in _room_neighbours(other, num_rooms) if nxt not in tree)
+        (row_a, col_a), (row_b, col_b) = _room_center(room), _room_center(other)
+        walls[(row_a + row_b) // 2, (col_a + col_b) // 2] = False
+
+    # Goal goes in the room farthest (in doors) from the start room
+    depth = {start_room: 0}
+    queue = [start_room]
+    for room in queue:
+        for other in tree[room]:
+            if other not in depth:
+                depth[other] = depth[room] + 1
+                queue.append(other)
+    goal_room = max(depth, key=depth.get)
+    goal = _room_center(goal_room)
+
+    # Start on a random cell of the start room, never on the goal itself (single-room mazes)
+    room_row, room_col = divmod(start_room, ROOM_GRID_COLS)
+    while True:
+        start = (room_row * (ROOM_SIZE + 1) + 1 + int(rng.integers(ROOM_SIZE)),
+                 room_col * (ROOM_SIZE + 1) + 1 + int(rng.integers(ROOM_SIZE)))
+        if start != goal:
+            return walls, start, goal
+
+def wall_rays(walls):
+    """Distance (in cells, capped at RAY_RANGE) to the nearest wall along 8 rays, for every cell of a stack of mazes."""
+    count = walls.shape[0]
+    padded = np.pad(walls, ((0, 0), (RAY_RANGE, RAY_RANGE), (RAY_RANGE, RAY_RANGE)), constant_values=True)
+    rays = np.full((count, GRID_H, GRID_W, len(RAYS)), RAY_RANGE, dtype=np.uint8)
+    for ray, (d_row, d_col) in enumerate(RAYS):
+        for k in range(RAY_RANGE, 0, -1):
+            row, col = RAY_RANGE + k * d_row, RAY_RANGE + k * d_col
+            hit = padded[:, row:row + GRID_H, col:col + GRID_W]
+            rays[..., ray][hit] = k
+    return rays
+
+class MazeSimulator:
+    """Batch of independent mazes stepped together with NumPy."""
+    def __init__(self, num_envs, rooms=5, max_steps=1500, seed=None):
+        self.num_envs = num_envs
+        self.max_steps = max_steps
+        self.render_mode = None
+        self.rng = np.random.default_rng(seed)
+        # Per-env generators (see seed_per_env); None = all envs share self.rng
+        self.env_rngs = None
+        self.rooms = np.zeros(num_envs, dtype=np.int64)
+        self.set_rooms(rooms)
+
+        self.walls = np.ones((num_envs, GRID_H, GRID_W), dtype=bool)
+        self.rays = np.zeros((num_envs, GRID_H, GRID_W, len(RAYS)), dtype=np.uint8)
+        self.pos = np.zeros((num_envs, 2), dtype=np.int64)
+        self.goal = np.zeros((num_envs, 2), dtype=np.int64)
+        self.heading = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.distance = np.zeros(num_envs, dtype=np.float32)
+        self.obs = np.zeros((num_envs, OBS_DIM), dtype=np.float32)
+        self._env_index = np.arange(num_envs)
+
+    def set_rooms(self, rooms, indices=None):
+        """Room count per maze: an int, or a (low, high) range sampled on every reset."""
+        indices = self._env_index_for(indices)
+        if isinstance(rooms, (tuple, list)):
+            self.room_range = (int(rooms[0]), int(rooms[1]))
+        else:
+            self.room_range = None
+            self.rooms[indices] = int(np.clip(rooms, 1, MAX_ROOMS))
+
+    def seed_per_env(self, seed):
+        """
+        Give each env its own generator seeded from (seed, env index), so env i's
+        k-th maze is the same no matter how long other envs' episodes last.
+        """
+        self.env_rngs = [np.random.default_rng([seed, i]) for i in range(self.num_envs)]
+
+    def _env_index_for(self, indices):
+        return np.arange(self.num_envs) if indices is None else np.asarray(indices, dtype=np.int64)
+
+    def reset(self, indices=None):
+        """Generate fresh mazes for the given envs (all by default) and return the full observation batch."""
+        indices = self._env_index_for(indices)
+        for i in indices:
+            rng = self.rng if self.env_rngs is None else self.env_rngs[i]
+            if self.room_range is not None:
+                low, high = self.room_range
+                self.rooms[i] = rng.integers(max(1, low), min(MAX_ROOMS, high) + 1)
+            walls, start, goal = generate_maze(int(self.rooms[i]), rng)
+            self.walls[i] = walls
+            self.pos[i] = start
+            self.goal[i] = goal
+            self.heading[i] = rng.integers(4)
+        self.rays[indices] = wall_rays(self.walls[indices])
+        self.steps[indices] = 0
+        self.distance[indices] = self._goal_distance(indices)
+        self._observe(indices)
+        return self.obs
+
+    def _goal_distance(self, indices):
+        delta = self.goal[indices] - self.pos[indices]
+        return np.hypot(delta[:, 0], delta[:, 1]).astype(np.float32)
+
+    def _observe(self, indices):
+        obs = self.obs
+        pos, heading = self.pos[indices], self.heading[indices]
+        obs[indices, 0] = pos[:, 1] / (GRID_W - 1) * 2 - 1
+        obs[indices, 1] = pos[:, 0] / (GRID_H - 1) * 2 - 1
+        obs[indices, 2] = HEADINGS[heading, 1]
+        obs[indices, 3] = -HEADINGS[heading, 0]
+
+        delta = self.goal[indices] - pos
+        forward, right = HEADINGS[heading], HEADINGS[(heading + 1) % 4]
+        obs[indices, OBS_GOAL_RIGHT] = np.clip((delta * right).sum(axis=1) / GRID_DIAG, -1, 1)
+        obs[indices, OBS_GOAL_FORWARD] = np.clip((delta * forward).sum(axis=1) / GRID_DIAG, -1, 1)
+        obs[indices, 6] = self.distance[indices] / GRID_DIAG * 2 - 1
+
+        ray_order = (2 * heading[:, None] + np.arange(len(RAYS))) % len(RAYS)
+        cell_rays = self.rays[indices, pos[:, 0], pos[:, 1]]
+        obs[indices, OBS_RAYS] = np.take_along_axis(cell_rays, ray_order, axis=1) / RAY_RANGE * 2 - 1
+        obs[indices, 15] = np.minimum(self.steps[indices] / self.max_steps, 1.0) * 2 - 1
+
+    def step(self, actions):
+        """Advance every maze one step; returns (obs, rewards, terminated, truncated, goal_reached, distance)."""
+        actions = np.asarray(actions, dtype=np.int64)
+        index = self._env_index
+
+        self.heading = (self.heading + TURN_DELTA[actions]) % 4
+        offset = MOVE_OFFSET[actions]
+        moving = offset >= 0
+        target = self.pos + HEADINGS[(self.heading + offset) % 4] * moving[:, None]
+        blocked = moving & self.walls[index, target[:, 0], target[:, 1]]
+        self.pos = np.where(blocked[:, None], self.pos, target)
+        self.steps += 1
+
+        previous = self.distance
+        self.distance = self._goal_distance(index)
+        goal_reached = (self.pos == self.goal).all(axis=1)
+        truncated = ~goal_reached & (self.steps >= self.max_steps)
+
+        rewards = (STEP_PENALTY + PROGRESS_SCALE * (previous - self.distance) + WALL_PENALTY * blocked
+                   + GOAL_REWARD * goal_reached).astype(np.float32)
+        self._observe(index)
+        return self.obs, rewards, goal_reached, truncated, goal_reached, self.distance
+
+class HeadlessMazeVecEnv(VecEnv):
+    """SB3 VecEnv over a MazeSimulator; a drop-in for MazeVecEnv with no browser attached."""
+    def __init__(self, num_envs, rooms=5, max_steps=1500, seed=None):
+        self.sim = MazeSimulator(num_envs, rooms=rooms, max_steps=max_steps, seed=seed)
+        super().__init__(
+            num_envs,
+            Box(low=-1.0, high=1.0, shape=(OBS_DIM,), dtype=np.float32),
+            Discrete(NUM_ACTIONS),
+        )
+        self.actions = None
+
+    def reset(self):
+        if self._seeds[0] is not None:
+            self.sim.rng = np.random.default_rng(self._seeds[0])
+        self._reset_seeds()
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return self.sim.reset().copy()
+
+    def reset_envs(self, indices):
+        """Restart only the given envs with fresh mazes; returns their new observations."""
+        return self.sim.reset(indices)[indices].copy()
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        started = time.perf_counter_ns()
+        obs, rewards, terminated, truncated, goal_reached, distance = self.sim.step(self.actions)
+        dones = terminated | truncated
+        infos = [
+            {'goal_reached': goal, 'distance_to_goal': dist}
+            for goal, dist in zip(goal_reached.tolist(), distance.tolist())
+        ]
+        done_indices = np.flatnonzero(dones)
+        if len(done_indices):
+            for i in done_indices:
+                infos[i]['terminal_observation'] = obs[i].copy()
+                infos[i]['TimeLimit.truncated'] = bool(truncated[i])
+            self.sim.reset(done_indices)
+        ENV_STEP_TIME.observe_ns(started)
+        ENV_STEPS.inc(self.num_envs)
+        return self.sim.obs.copy(), rewards, dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self.sim, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self.sim, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        if method_name == 'set_rooms':
+            self.sim.set_rooms(*method_args, indices=list(self._get_indices(indices)), **method_kwargs)
+            return [None for _ in self._get_indices(indices)]
+        if method_name == 'seed_per_env':
+            self.sim.seed_per_env(*method_args, **method_kwargs)
+            return [None for _ in self._get_indices(indices)]
+        raise AttributeError(f"HeadlessMazeVecEnv has no env method {method_name!r}")
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._get_indices(indices)]
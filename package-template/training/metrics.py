@@ -0,0 +1,225 @@
+# metrics.py - HOT-PATH TIMERS, HISTOGRAMS AND A LOCAL METRICS ENDPOINT
+"""
+Process-wide metrics for the trainer: where a step's time goes (bridge
+enqueue, socket send, game reply, decode, policy inference, PPO update),
+throughput, queue depths and reconnects.
+
+Histograms have fixed log-spaced buckets (1us - 100s), so recording is a
+bisect plus an increment and memory never grows. They are read two ways:
+
+  * `MetricsServer` serves cumulative values over HTTP on localhost:
+    `/metrics` in Prometheus text format, `/metrics.json` as JSON.
+  * `MetricsReporter` emits one record per interval (to the run's JSONL log),
+    with percentiles and rates over just that interval.
+
+Updates are not locked: a rare lost increment under thread contention is an
+acceptable price on the per-step path.
+"""
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+BUCKET_BOUNDS = [float(f"{b:.3g}") for b in 10 ** np.arange(-6.0, 2.05, 0.1)]
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    """Fixed-bucket latency histogram (values in seconds)."""
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = 0.0
+        self._window_counts = list(self.counts)
+        self._window_total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.total += seconds
+
+    def observe_ns(self, start_ns, end_ns=None):
+        end_ns = time.perf_counter_ns() if end_ns is None else end_ns
+        self.observe((end_ns - start_ns) * 1e-9)
+
+    @staticmethod
+    def _quantiles(counts):
+        n = sum(counts)
+        if n == 0:
+            return {q: 0.0 for q in QUANTILES}
+        cumulative = np.cumsum(counts)
+        result = {}
+        for q in QUANTILES:
+            bucket = int(np.searchsorted(cumulative, q * n))
+            result[q] = BUCKET_BOUNDS[min(bucket, len(BUCKET_BOUNDS) - 1)]
+        return result
+
+    def summary(self):
+        """Cumulative count, sum and quantiles (bucket upper bounds)."""
+        return {"count": sum(self.counts), "sum": self.total, "quantiles": self._quantiles(self.counts)}
+
+    def window(self):
+        """Like `summary`, but only over values recorded since the previous call."""
+        counts = list(self.counts)
+        delta = [now - before for now, before in zip(counts, self._window_counts)]
+        total = self.total - self._window_total
+        self._window_counts, self._window_total = counts, self.total
+        return {"count": sum(delta), "sum": total, "quantiles": self._quantiles(delta)}
+
+class Counter:
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._window_value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def window(self):
+        delta = self.value - self._window_value
+        self._window_value = self.value
+        return delta
+
+class Gauge:
+    """A value read on demand from `read()` (e.g. a queue's current depth)."""
+    def __init__(self, name, read, help_text=""):
+        self.name = name
+        self.read = read
+        self.help = help_text
+
+class MetricsRegistry:
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def histogram(self, name, help_text=""):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, help_text)
+        return self.histograms[name]
+
+    def counter(self, name, help_text=""):
+        if name not in self.counters:
+            self.counters[name] = Counter(name, help_text)
+        return self.counters[name]
+
+    def gauge(self, name, read, help_text=""):
+        """Register (or replace) a gauge read through `read()`."""
+        self.gauges[name] = Gauge(name, read, help_text)
+        return self.gauges[name]
+
+    def _read_gauges(self):
+        values = {}
+        for name, gauge in list(self.gauges.items()):
+            try:
+                values[name] = float(gauge.read())
+            except Exception:
+                continue
+        return values
+
+    def snapshot(self):
+        """Cumulative view of every metric, JSON-ready."""
+        return {
+            "time": time.time(),
+            "histograms": {name: _json_summary(h.summary()) for name, h in self.histograms.items()},
+            "counters": {name: c.value for name, c in self.counters.items()},
+            "gauges": self._read_gauges(),
+        }
+
+    def window_snapshot(self, seconds):
+        """Per-interval view: histogram quantiles over the interval and counters as rates."""
+        return {
+            "time": time.time(),
+            "interval": seconds,
+            "histograms": {name: _json_summary(h.window()) for name, h in self.histograms.items()},
+            "rates": {name: c.window() / max(seconds, 1e-9) for name, c in self.counters.items()},
+            "counters": {name: c.value for name, c in self.counters.items()},
+            "gauges": self._read_gauges(),
+        }
+
+    def prometheus_text(self):
+        lines = []
+        for name, histogram in self.histograms.items():
+            summary = histogram.summary()
+            lines.append(f"# HELP maze_{name} {histogram.help}")
+            lines.append(f"# TYPE maze_{name} summary")
+            for q, value in summary["quantiles"].items():
+                lines.append(f'maze_{name}{{quantile="{q}"}} {value:.9g}')
+            lines.append(f"maze_{name}_sum {summary['sum']:.9g}")
+            lines.append(f"maze_{name}_count {summary['count']}")
+        for name, counter in self.counters.items():
+            lines.append(f"# HELP maze_{name} {counter.help}")
+            lines.append(f"# TYPE maze_{name} counter")
+            lines.append(f"maze_{name} {counter.value}")
+        for name, value in self._read_gauges().items():
+            lines.append(f"# HELP maze_{name} {self.gauges[name].help}")
+            lines.append(f"# TYPE maze_{name} gauge")
+            lines.append(f"maze_{name} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+def _json_summary(summary):
+    quantiles = summary.pop("quantiles")
+    summary.update({f"p{int(q * 100)}": value for q, value in quantiles.items()})
+    return summary
+
+metrics = MetricsRegistry()
+
+class MetricsServer:
+    """Serve `/metrics` (Prometheus text) and `/metrics.json` from a daemon thread."""
+    def __init__(self, registry=metrics, host="localhost", port=8790):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, content_type = json.dumps(registry.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, content_type = registry.prometheus_text().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep scrapes out of the training log
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.address = f"http://{host}:{port}/metrics"
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class MetricsReporter:
+    """Pass a `window_snapshot` record to `write_record` (e.g. `LogSink.emit_json`) every `interval` seconds."""
+    def __init__(self, write_record, interval=30.0, registry=metrics):
+        self.write_record = write_record
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._last = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write_line()
+
+    def write_line(self):
+        now = time.perf_counter()
+        record = self.registry.window_snapshot(now - self._last)
+        self._last = now
+        record["type"] = "metrics"
+        self.write_record(record)
+
+    def close(self):
+        self._stop.set()
+        self.thread.join()
+        self.write_line()
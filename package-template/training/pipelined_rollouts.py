@@ -0,0 +1,201 @@
+# pipelined_rollouts.py - OVERLAP POLICY INFERENCE WITH IN-FLIGHT GAME STEPS
+"""
+Lockstep rollouts leave the CPU idle while the game steps and the game idle
+while the policy runs: infer for every env, send, wait for every reply, repeat.
+
+`PipelinedPPO` splits the envs into groups (a `SplitVecEnv` of independent
+VecEnvs, e.g. one `MazeVecEnv` per set of game slots, or one `SubprocVecEnv`
+per set of workers) and keeps every group's step in flight while it works on
+another: wait for group A, run inference and bookkeeping for A, send A's next
+actions, then do the same for B while A's step is out, and so on.
+
+Each group still sees the current policy for every step, so the data is the
+same on-policy data lockstep PPO collects; transitions are staged per group
+and added to the standard SB3 `RolloutBuffer` one full vector step at a time,
+so callbacks, GAE and the update are untouched. Only the rollout loop changes
+- the policy update between rollouts is still sequential.
+
+Pays off when a step has real latency (browser round-trip, render); the
+headless simulator steps in-process and gains nothing.
+"""
+import numpy as np
+import torch as th
+from gymnasium import spaces
+from stable_baselines3 import PPO
+from stable_baselines3.common.utils import obs_as_tensor
+from stable_baselines3.common.vec_env import VecEnv
+
+class SplitVecEnv(VecEnv):
+    """Several VecEnvs presented as one; env indices run through the groups in order."""
+    def __init__(self, groups):
+        self.groups = groups
+        self.group_slices = []
+        start = 0
+        for group in groups:
+            self.group_slices.append(slice(start, start + group.num_envs))
+            start += group.num_envs
+        super().__init__(start, groups[0].observation_space, groups[0].action_space)
+
+    def reset(self):
+        self.reset_infos = [{} for _ in range(self.num_envs)]
+        return np.concatenate([group.reset() for group in self.groups])
+
+    def reset_envs(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        obs = []
+        for group, local in self._targets(indices):
+            obs.append(group.reset_envs(local))
+        return np.concatenate(obs)
+
+    def step_async(self, actions):
+        for group, group_slice in zip(self.groups, self.group_slices):
+            group.step_async(actions[group_slice])
+
+    def step_wait(self):
+        results = [group.step_wait() for group in self.groups]
+        obs, rewards, dones, infos = zip(*results)
+        return np.concatenate(obs), np.concatenate(rewards), np.concatenate(dones), [i for part in infos for i in part]
+
+    def close(self):
+        for group in self.groups:
+            group.close()
+
+    def _targets(self, indices):
+        """(group, local indices) for every group that owns some of the global `indices`."""
+        indices = np.asarray(list(self._get_indices(indices)), dtype=np.int64)
+        targets = []
+        for group, group_slice in zip(self.groups, self.group_slices):
+            local = indices[(indices >= group_slice.start) & (indices < group_slice.stop)] - group_slice.start
+            if len(local):
+                targets.append((group, local))
+        return targets
+
+    def get_attr(self, attr_name, indices=None):
+        return [value for group, local in self._targets(indices) for value in group.get_attr(attr_name, local.tolist())]
+
+    def set_attr(self, attr_name, value, indices=None):
+        for group, local in self._targets(indices):
+            group.set_attr(attr_name, value, local.tolist())
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [result for group, local in self._targets(indices)
+                for result in group.env_method(method_name, *method_args, indices=local.tolist(), **method_kwargs)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [result for group, local in self._targets(indices)
+                for result in group.env_is_wrapped(wrapper_class, local.tolist())]
+
+class PipelinedPPO(PPO):
+    """PPO whose rollouts keep every env group's step in flight (see module docstring).
+
+    With any env other than an unwrapped SplitVecEnv (wrap its groups instead)
+    it collects rollouts exactly like PPO.
+    """
+    def _group_actions(self, obs):
+        with th.no_grad():
+            actions, values, log_probs = self.policy(obs_as_tensor(obs, self.device))
+        return actions.cpu().numpy(), values, log_probs
+
+    def collect_rollouts(self, env, callback, rollout_buffer, n_rollout_steps):
+        if not isinstance(env, SplitVecEnv) or self.use_sde or not isinstance(self.action_space, spaces.Discrete):
+            return super().collect_rollouts(env, callback, rollout_buffer, n_rollout_steps)
+        assert self._last_obs is not None, "No previous observation was provided"
+        groups, slices = env.groups, env.group_slices
+        self.policy.set_training_mode(False)
+        rollout_buffer.reset()
+        callback.on_rollout_start()
+
+        n_envs = env.num_envs
+        # Staging for one rollout, filled group by group; rows go to the RolloutBuffer once every group has them
+        rows = {
+            "obs": np.zeros((n_rollout_steps,) + self._last_obs.shape, dtype=self._last_obs.dtype),
+            "actions": np.zeros((n_rollout_steps, n_envs), dtype=np.int64),
+            "rewards": np.zeros((n_rollout_steps, n_envs), dtype=np.float32),
+            "starts": np.zeros((n_rollout_steps, n_envs), dtype=bool),
+            "dones": np.zeros((n_rollout_steps, n_envs), dtype=bool),
+            "values": th.zeros((n_rollout_steps, n_envs), device=self.device),
+            "log_probs": th.zeros((n_rollout_steps, n_envs), device=self.device),
+            "infos": [[None] * n_envs for _ in range(n_rollout_steps)],
+        }
+        last_obs = self._last_obs.copy()
+        last_starts = np.array(self._last_episode_starts, dtype=bool)
+        filled = np.zeros(len(groups), dtype=np.int64)
+        added = 0
+
+        def send(g):
+            group_slice, row = slices[g], filled[g]
+            actions, values, log_probs = self._group_actions(last_obs[group_slice])
+            rows["obs"][row, group_slice] = last_obs[group_slice]
+            rows["actions"][row, group_slice] = actions
+            rows["starts"][row, group_slice] = last_starts[group_slice]
+            rows["values"][row, group_slice] = values.flatten()
+            rows["log_probs"][row, group_slice] = log_probs
+            groups[g].step_async(actions)
+
+        for g in range(len(groups)):
+            send(g)
+
+        while added < n_rollout_steps:
+            for g, group in enumerate(groups):
+                if filled[g] == n_rollout_steps:
+                    continue
+                new_obs, rewards, dones, infos = group.step_wait()
+                group_slice, row = slices[g], filled[g]
+                rows["rewards"][row, group_slice] = rewards
+                rows["dones"][row, group_slice] = dones
+                rows["infos"][row][group_slice] = infos
+                last_obs[group_slice] = new_obs
+                last_starts[group_slice] = dones
+                filled[g] += 1
+                # Keep this group busy while the others are waited on
+                if filled[g] < n_rollout_steps:
+                    send(g)
+
+                # Every group has finished row `added`: hand it to SB3 as one vector step
+                while added < filled.min():
+                    next_obs = rows["obs"][added + 1] if added + 1 < n_rollout_steps else last_obs
+                    if not self._add_row(callback, rollout_buffer, rows, added, next_obs):
+                        self._drain(groups, filled, n_rollout_steps)
+                        return False
+                    added += 1
+
+        self._last_obs = last_obs
+        self._last_episode_starts = last_starts
+        with th.no_grad():
+            values = self.policy.predict_values(obs_as_tensor(last_obs, self.device))
+        rollout_buffer.compute_returns_and_advantage(last_values=values, dones=last_starts)
+
+        callback.update_locals(dict(new_obs=last_obs, dones=last_starts, values=values))
+        callback.on_rollout_end()
+        return True
+
+    def _add_row(self, callback, rollout_buffer, rows, row, next_obs):
+        """Account for one complete vector step the way `OnPolicyAlgorithm.collect_rollouts` does."""
+        rewards, dones, infos = rows["rewards"][row], rows["dones"][row], rows["infos"][row]
+        self.num_timesteps += self.env.num_envs
+        # Same names the stock loop exposes to callbacks
+        callback.update_locals(dict(actions=rows["actions"][row], rewards=rewards, dones=dones, infos=infos,
+                                    new_obs=next_obs, values=rows["values"][row]))
+        if not callback.on_step():
+            return False
+        self._update_info_buffer(infos, dones)
+
+        # Bootstrap truncated episodes from the value of their terminal observation (SB3 issue #633)
+        for idx, done in enumerate(dones):
+            if (done and infos[idx].get("terminal_observation") is not None
+                    and infos[idx].get("TimeLimit.truncated", False)):
+                terminal_obs = self.policy.obs_to_tensor(infos[idx]["terminal_observation"])[0]
+                with th.no_grad():
+                    terminal_value = self.policy.predict_values(terminal_obs)[0]
+                rewards[idx] += self.gamma * terminal_value
+
+        rollout_buffer.add(rows["obs"][row], rows["actions"][row].reshape(-1, 1), rewards, rows["starts"][row],
+                           rows["values"][row], rows["log_probs"][row])
+        return True
+
+    @staticmethod
+    def _drain(groups, filled, n_rollout_steps):
+        """Collect the replies of steps still in flight when a callback stops training."""
+        for g, group in enumerate(groups):
+            if filled[g] < n_rollout_steps:
+                group.step_wait()
@@ -0,0 +1,233 @@
+# preprocessing.py - OBSERVATION PIPELINE SHARED BY TRAINING AND EVALUATION
+"""
+One observation pipeline for every script that feeds the policy, so training,
+evaluation and checkpoint sweeps can't drift apart:
+
+  1. optional feature augmentation (nearest wall, goal bearing) appended to
+     the env's 16-D observation; it reads single features of `maze_sim`'s
+     layout, so it is only allowed on the headless simulator,
+  2. optional running mean/var normalization with clipping, like SB3's
+     `VecNormalize` (statistics only update while training),
+  3. optional stacking of the last `frame_stack` frames.
+
+`ObservationPipeline` works on preallocated `(num_envs, ...)` buffers in place;
+`PreprocessedVecEnv` applies it to any VecEnv. Running statistics and settings
+are written next to each checkpoint as `<checkpoint>.preprocess.json`
+(`stats_path`), and `load_pipeline` restores them, so an evaluated checkpoint
+sees exactly the observations it was trained on. Checkpoints without that file
+were trained on raw observations and get no pipeline.
+"""
+import json
+import os
+
+import numpy as np
+from gymnasium.spaces import Box
+from stable_baselines3.common.vec_env import VecEnvWrapper
+
+from maze_sim import OBS_GOAL_FORWARD, OBS_GOAL_RIGHT, OBS_RAYS, HeadlessMazeVecEnv
+
+STATS_SUFFIX = ".preprocess.json"
+STATS_VERSION = 1
+AUGMENT_DIM = 2
+
+def stats_path(checkpoint_path):
+    """Sidecar file holding a checkpoint's preprocessing settings and statistics."""
+    base = checkpoint_path[:-len(".zip")] if checkpoint_path.endswith(".zip") else checkpoint_path
+    return base + STATS_SUFFIX
+
+class RunningMeanStd:
+    """Per-feature running mean/variance, merged batch-wise (Chan et al.)."""
+    def __init__(self, shape):
+        self.mean = np.zeros(shape, dtype=np.float64)
+        self.var = np.ones(shape, dtype=np.float64)
+        self.count = 1e-4
+
+    def update(self, batch):
+        batch_mean = batch.mean(axis=0)
+        batch_var = batch.var(axis=0)
+        batch_count = batch.shape[0]
+        delta = batch_mean - self.mean
+        total = self.count + batch_count
+        self.mean += delta * batch_count / total
+        self.var = (self.var * self.count + batch_var * batch_count
+                    + delta ** 2 * self.count * batch_count / total) / total
+        self.count = total
+
+class ObservationPipeline:
+    """Augment -> normalize -> stack, in place on per-env buffers (see module docstring)."""
+    def __init__(self, num_envs, obs_dim=16, normalize=False, frame_stack=1, augment=False,
+                 clip=5.0, epsilon=1e-8):
+        self.num_envs = num_envs
+        self.obs_dim = obs_dim
+        self.normalize = normalize
+        self.frame_stack = max(1, int(frame_stack))
+        self.augment = augment
+        self.clip = clip
+        self.epsilon = epsilon
+        self.training = True
+
+        self.feature_dim = obs_dim + (AUGMENT_DIM if augment else 0)
+        self.stats = RunningMeanStd(self.feature_dim)
+        self._features = np.zeros((num_envs, self.feature_dim), dtype=np.float32)
+        self._scale = np.ones(self.feature_dim, dtype=np.float32)
+        self._offset = np.zeros(self.feature_dim, dtype=np.float32)
+        self._stack = np.zeros((num_envs, self.frame_stack, self.feature_dim), dtype=np.float32)
+        self._refresh_scale()
+
+    @property
+    def output_dim(self):
+        return self.frame_stack * self.feature_dim
+
+    def observation_space(self):
+        bound = self.clip if self.normalize else 1.0
+        return Box(low=-bound, high=bound, shape=(self.output_dim,), dtype=np.float32)
+
+    def _refresh_scale(self):
+        if self.normalize:
+            np.copyto(self._scale, 1.0 / np.sqrt(self.stats.var + self.epsilon))
+            np.copyto(self._offset, self.stats.mean)
+
+    def _featurize(self, obs, out):
+        """Augment and normalize `obs` rows into `out` (a view of the preallocated buffer)."""
+        out[:, :self.obs_dim] = obs
+        if self.augment:
+            # Nearest wall over the 8 rays, and the goal's bearing in the agent frame
+            np.min(obs[:, OBS_RAYS], axis=1, out=out[:, self.obs_dim])
+            np.arctan2(obs[:, OBS_GOAL_RIGHT], obs[:, OBS_GOAL_FORWARD], out=out[:, self.obs_dim + 1])
+            out[:, self.obs_dim + 1] /= np.pi
+        if self.normalize:
+            if self.training:
+                self.stats.update(out)
+                self._refresh_scale()
+            out -= self._offset
+            out *= self._scale
+            np.clip(out, -self.clip, self.clip, out=out)
+        return out
+
+    def reset(self, obs):
+        """Start every env's stack from `obs`; returns the processed batch (a live buffer view)."""
+        return self.reset_envs(np.arange(self.num_envs), obs)
+
+    def reset_envs(self, indices, obs):
+        """Start the given envs' stacks from `obs` (one row per index); returns the processed batch."""
+        features = self._featurize(obs, self._features[:len(indices)])
+        self._stack[indices] = features[:, None, :]
+        return self.output()
+
+    def step(self, obs, dones):
+        """Push a new frame for every env (envs that just reset start a fresh stack)."""
+        features = self._featurize(obs, self._features)
+        if self.frame_stack > 1:
+            self._stack[:, :-1] = self._stack[:, 1:]
+            done_indices = np.flatnonzero(dones)
+            if len(done_indices):
+                self._stack[done_indices] = features[done_indices, None, :]
+        self._stack[:, -1] = features
+        return self.output()
+
+    def terminal(self, index, obs):
+        """Processed view of env `index`'s terminal observation, stacked on its previous frames."""
+        training, self.training = self.training, False
+        try:
+            row = np.asarray(obs, dtype=np.float32)[None]
+            features = self._featurize(row, np.zeros((1, self.feature_dim), dtype=np.float32))
+        finally:
+            self.training = training
+        stack = np.concatenate([self._stack[index, 1:], features]) if self.frame_stack > 1 else features
+        return stack.reshape(-1)
+
+    def output(self):
+        return self._stack.reshape(self.num_envs, self.output_dim)
+
+    def state_dict(self):
+        return {
+            "version": STATS_VERSION,
+            "obs_dim": self.obs_dim,
+            "normalize": self.normalize,
+            "frame_stack": self.frame_stack,
+            "augment": self.augment,
+            "clip": self.clip,
+            "epsilon": self.epsilon,
+            "mean": self.stats.mean.tolist(),
+            "var": self.stats.var.tolist(),
+            "count": self.stats.count,
+        }
+
+    @classmethod
+    def from_state_dict(cls, state, num_envs):
+        if state.get("version") != STATS_VERSION:
+            raise ValueError(f"Unsupported preprocessing stats version: {state.get('version')}")
+        pipeline = cls(num_envs, state["obs_dim"], state["normalize"], state["frame_stack"],
+                       state["augment"], state["clip"], state["epsilon"])
+        pipeline.stats.mean[:] = state["mean"]
+        pipeline.stats.var[:] = state["var"]
+        pipeline.stats.count = state["count"]
+        pipeline._refresh_scale()
+        return pipeline
+
+    def fork(self, num_envs):
+        """Same settings over another `num_envs` envs, sharing (and updating) this pipeline's statistics."""
+        pipeline = ObservationPipeline(num_envs, self.obs_dim, self.normalize, self.frame_stack, self.augment,
+                                       self.clip, self.epsilon)
+        pipeline.stats = self.stats
+        pipeline.training = self.training
+        pipeline._refresh_scale()
+        return pipeline
+
+    @property
+    def is_identity(self):
+        return not (self.normalize or self.augment or self.frame_stack > 1)
+
+def pipeline_from_config(config, num_envs, obs_dim=16):
+    """Pipeline for a new run, or None when the config asks for raw observations."""
+    pipeline = ObservationPipeline(num_envs, obs_dim, normalize=config.normalize_obs,
+                                   frame_stack=config.frame_stack, augment=config.augment_obs,
+                                   clip=config.obs_clip)
+    return None if pipeline.is_identity else pipeline
+
+def load_pipeline(checkpoint_path, num_envs, training=False):
+    """The pipeline saved with `checkpoint_path`, or None if it was trained on raw observations."""
+    try:
+        with open(stats_path(checkpoint_path), encoding="utf-8") as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return None
+    pipeline = ObservationPipeline.from_state_dict(state, num_envs)
+    pipeline.training = training
+    return pipeline
+
+def preprocess_for_checkpoint(env, checkpoint_path):
+    """Wrap `env` in the pipeline `checkpoint_path` was trained with (frozen statistics), if any."""
+    pipeline = load_pipeline(checkpoint_path, env.num_envs)
+    return env if pipeline is None else PreprocessedVecEnv(env, pipeline)
+
+def remove_stats(checkpoint_path):
+    try:
+        os.remove(stats_path(checkpoint_path))
+    except OSError:
+        pass
+
+class PreprocessedVecEnv(VecEnvWrapper):
+    """Applies an ObservationPipeline to a VecEnv's observations, terminal observations included."""
+    def __init__(self, venv, pipeline):
+        if pipeline.augment and not isinstance(venv.unwrapped, HeadlessMazeVecEnv):
+            # The game's observation only approximates the simulator's, feature by feature
+            raise ValueError("augment_obs reads maze_sim's observation layout and only works with --headless; "
+                             f"this env is a {type(venv.unwrapped).__name__}")
+        super().__init__(venv, observation_space=pipeline.observation_space())
+        self.pipeline = pipeline
+
+    def reset(self):
+        return self.pipeline.reset(self.venv.reset()).copy()
+
+    def reset_envs(self, indices):
+        """Restart only the given envs; returns their new processed observations."""
+        return self.pipeline.reset_envs(indices, self.venv.reset_envs(indices))[indices].copy()
+
+    def step_wait(self):
+        obs, rewards, dones, infos = self.venv.step_wait()
+        for i in np.flatnonzero(dones):
+            if "terminal_observation" in infos[i]:
+                infos[i]["terminal_observation"] = self.pipeline.terminal(i, infos[i]["terminal_observation"])
+        # SB3 keeps the returned array as `_last_obs`, so hand out a copy of the live buffer
+        return self.pipeline.step(obs, dones).copy(), rewards, dones, infos
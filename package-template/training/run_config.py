@@ -0,0 +1,181 @@
+# run_config.py - ONE RUN CONFIG FOR TRAINING, CALLBACKS AND EVALUATION
+"""
+Every knob of a run (step budget, PPO hyperparameters, ports, paths) lives in
+`DEFAULTS` below.
+
+Values are layered, later sources winning:
+
+    DEFAULTS  <  JSON file  <  MAZE_* environment variables  <  command line
+
+The JSON file is `--config PATH`, else `$MAZE_CONFIG`, else `run_config.json`
+in the working directory if it exists. Packages from the web generator ship a
+`training/run_config.json` with the step budget and maze size picked there. Environment variables are `MAZE_` plus
+the upper-cased key (`MAZE_TOTAL_TIMESTEPS=5000000`); `maze_rooms` is read from
+`MAZE_ROOMS`. On the command line every key is a flag:
+
+    python train_maze_solver.py --total-timesteps 5000000 --num-envs 8 --headless
+"""
+import argparse
+import hashlib
+import json
+import os
+
+DEFAULTS = dict(
+    # --- Run length and maze ---
+    total_timesteps = 20000,
+    maze_rooms = 5,
+    # --- Curriculum over maze_rooms: off | adaptive | linear (see curriculum.py) ---
+    curriculum = "off",
+    curriculum_start_rooms = 1,
+    curriculum_window = 100,
+    curriculum_promote = 0.8,
+    curriculum_demote = 0.3,
+    curriculum_step = 1,
+    # --- Environments ---
+    num_envs = 1,
+    headless = False,
+    workers = 0,
+    host = "localhost",
+    port = 8765,
+    base_port = 8765,
+    socket_dir = None,
+    record_dir = None,
+    replay_dir = None,
+    rollout_groups = 1,  # >1: pipelined rollouts over that many env groups (pipelined_rollouts.py)
+    # --- Game connection deadlines in seconds, 0 = off; only games that answer pings are held to them (see maze_bridge.py) ---
+    heartbeat_interval = 2.0,
+    stall_timeout = 15.0,
+    step_retries = 1,
+    reconnect_timeout = 30.0,
+    # --- Paths and checkpoints ---
+    checkpoint_dir = "training/maze_solver_enhanced/",
+    log_dir = "training/logs/maze_solver_enhanced/",
+    check_freq = 2000,
+    keep_checkpoints = 5,
+    startup_report = False,
+    metrics_port = 8790,
+    metrics_interval = 10.0,
+    log_flush_interval = 1.0,
+    log_max_bytes = 50000000,
+    log_backups = 5,
+    # --- Observation preprocessing (new runs; resumed/evaluated checkpoints use their saved settings) ---
+    normalize_obs = False,
+    frame_stack = 1,
+    augment_obs = False,  # headless only: reads maze_sim's observation layout (see preprocessing.py)
+    obs_clip = 5.0,
+    # --- PPO hyperparameters ---
+    n_steps = 2048,
+    learning_rate = 0.0001,
+    batch_size = 64,
+    gamma = 0.995,
+    gae_lambda = 0.95,
+    clip_range = 0.2,
+    ent_coef = 0.005,
+    n_epochs = 10,
+    max_grad_norm = 0.5,
+    device = "cpu",
+    # --- Evaluation ---
+    model_path = None,
+    eval_episodes = 10,
+    eval_envs = 16,
+    eval_seed = 0,
+    sweep_from = 0,
+    sweep_to = 0,
+    max_episode_steps = 1500,
+)
+
+PPO_KEYS = ("n_steps", "learning_rate", "batch_size", "gamma", "gae_lambda", "clip_range",
+            "ent_coef", "n_epochs", "max_grad_norm", "device")
+BRIDGE_KEYS = ("heartbeat_interval", "stall_timeout", "step_retries", "reconnect_timeout")
+
+# Keys whose env var predates the MAZE_<KEY> convention
+ENV_NAMES = {"maze_rooms": "MAZE_ROOMS"}
+
+DEFAULT_CONFIG_FILE = "run_config.json"
+
+def config_hash(config):
+    """Short stable hash of a JSON-able config dict."""
+    encoded = json.dumps(config, sort_keys=True, default=repr).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+def _coerce(key, value):
+    """Parse a string from the environment/CLI into the type of the key's default."""
+    default = DEFAULTS[key]
+    if not isinstance(value, str):
+        return value
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value or None
+
+class RunConfig:
+    """Resolved run settings; keys of `DEFAULTS` are readable as attributes."""
+    def __init__(self, **overrides):
+        unknown = set(overrides) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown run config key(s): {', '.join(sorted(unknown))}")
+        self.values = dict(DEFAULTS)
+        self.values.update({key: _coerce(key, value) for key, value in overrides.items()})
+        self.source = None
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["values"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    @classmethod
+    def load(cls, argv=None, environ=None):
+        """Build the config from file, environment and `argv` (None = no CLI parsing)."""
+        environ = os.environ if environ is None else environ
+        cli = cls.parse_args(argv) if argv is not None else {}
+
+        path = cli.pop("config", None) or environ.get("MAZE_CONFIG")
+        if path is None and os.path.exists(DEFAULT_CONFIG_FILE):
+            path = DEFAULT_CONFIG_FILE
+        values = {}
+        if path:
+            with open(path, encoding="utf-8") as file:
+                values.update(json.load(file))
+
+        for key in DEFAULTS:
+            name = ENV_NAMES.get(key, "MAZE_" + key.upper())
+            if name in environ:
+                values[key] = environ[name]
+        values.update(cli)
+
+        config = cls(**values)
+        config.source = path
+        return config
+
+    @staticmethod
+    def parse_args(argv):
+        parser = argparse.ArgumentParser(description="Maze solver run settings (see run_config.py)")
+        parser.add_argument("--config", help="JSON file with run settings")
+        for key, default in DEFAULTS.items():
+            flag = "--" + key.replace("_", "-")
+            if isinstance(default, bool):
+                parser.add_argument(flag, dest=key, action="store_const", const=True, default=None)
+            else:
+                parser.add_argument(flag, dest=key, default=None)
+        return {key: value for key, value in vars(parser.parse_args(argv)).items() if value is not None}
+
+    def ppo_kwargs(self):
+        return {key: self.values[key] for key in PPO_KEYS}
+
+    def bridge_kwargs(self):
+        return {key: self.values[key] for key in BRIDGE_KEYS}
+
+    def hash(self):
+        """Hash of the settings that make checkpoints comparable."""
+        return config_hash({key: self.values[key] for key in PPO_KEYS + ("maze_rooms", "num_envs")})
+
+    def to_dict(self):
+        return dict(self.values)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.values, file, indent=2)
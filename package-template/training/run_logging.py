@@ -0,0 +1,269 @@
+# run_logging.py - BUFFERED CONSOLE / TEXT / JSONL LOGGING FOR TRAINING RUNS
+"""
+One background writer for everything a run logs, replacing the old
+`DualLogger` that flushed the log file on every `write`.
+
+Callers only enqueue; the `LogSink` thread does all I/O:
+
+  * human-readable lines go to the console (flushed once per drained batch,
+    so the GUI still sees them live) and to `training_<timestamp>.txt`;
+  * structured records (`emit_json`) go to `metrics_<timestamp>.jsonl`.
+
+Files are flushed every `flush_interval` seconds or once `flush_bytes` are
+pending, and rotate at `max_bytes` keeping `backups` old files. The queue is
+bounded: if the writer falls `max_queue` records behind, callers block rather
+than grow memory or drop lines.
+
+`start_run_logging` routes `print`/SB3 stdout through the sink (complete lines
+only, no per-fragment writes), attaches a `logging` handler, and makes sure the
+queue is drained on normal exit, SIGTERM and uncaught exceptions.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+import traceback
+
+_TEXT, _JSON, _FLUSH, _STOP = range(4)
+
+class RotatingWriter:
+    """Buffered text file that rolls over to `<path>.1 .. .N` at `max_bytes`."""
+    def __init__(self, path, max_bytes=50_000_000, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        self.size = self.file.tell()
+
+    def write(self, text):
+        if self.max_bytes and self.size + len(text) > self.max_bytes and self.size:
+            self.rotate()
+        self.file.write(text)
+        self.size += len(text)
+
+    def rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.file = open(self.path, "w", encoding="utf-8", buffering=1 << 16)
+        self.size = 0
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class LogSink:
+    """Bounded queue drained by a writer thread (see module docstring)."""
+    def __init__(self, text_path, jsonl_path, console=None, max_queue=10000,
+                 flush_interval=1.0, flush_bytes=1 << 16, max_bytes=50_000_000, backups=5):
+        self.console = console
+        self.text = RotatingWriter(text_path, max_bytes, backups)
+        self.jsonl = RotatingWriter(jsonl_path, max_bytes, backups)
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def emit_text(self, text):
+        if not self.closed:
+            self.queue.put((_TEXT, text))
+
+    def emit_json(self, record):
+        """Queue a dict for the JSONL file; it is serialized on the writer thread."""
+        if not self.closed:
+            self.queue.put((_JSON, record))
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is on disk."""
+        if self.closed:
+            return
+        done = threading.Event()
+        self.queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put((_STOP, None))
+        self.thread.join(timeout)
+
+    def _flush_files(self):
+        self.text.flush()
+        self.jsonl.flush()
+
+    def _run(self):
+        pending = 0
+        last_flush = time.monotonic()
+        while True:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                while len(batch) < 1000:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            wrote_console = False
+            for kind, payload in batch:
+                if kind == _TEXT:
+                    if self.console is not None:
+                        try:
+                            self.console.write(payload)
+                            wrote_console = True
+                        except (OSError, ValueError):
+                            self.console = None  # console/pipe went away; keep logging to disk
+                    self.text.write(payload)
+                    pending += len(payload)
+                elif kind == _JSON:
+                    line = json.dumps(payload, default=str) + "\n"
+                    self.jsonl.write(line)
+                    pending += len(line)
+                elif kind == _FLUSH:
+                    self._flush_files()
+                    pending, last_flush = 0, time.monotonic()
+                    payload.set()
+                else:
+                    self._flush_files()
+                    self.text.close()
+                    self.jsonl.close()
+                    if self.console is not None:
+                        self.console.flush()
+                    return
+
+            if wrote_console:
+                try:
+                    self.console.flush()
+                except (OSError, ValueError):
+                    self.console = None
+            if pending and (pending >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval):
+                self._flush_files()
+                pending, last_flush = 0, time.monotonic()
+
+class SinkStream:
+    """Stand-in for `sys.stdout` that forwards complete lines to a LogSink."""
+    def __init__(self, sink, original):
+        self.sink = sink
+        self.original = original
+        self.encoding = getattr(original, "encoding", "utf-8")
+        self._partial = []
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if not text:
+            return 0
+        with self._lock:
+            if "\n" not in text:
+                self._partial.append(text)
+                return len(text)
+            head, _, tail = text.rpartition("\n")
+            self._partial.append(head + "\n")
+            lines = "".join(self._partial)
+            self._partial = [tail] if tail else []
+        self.sink.emit_text(lines)
+        return len(text)
+
+    def flush(self):
+        # Lines are flushed by the writer thread; a fragment without newline stays until completed
+        pass
+
+    def isatty(self):
+        return False
+
+    def fileno(self):
+        return self.original.fileno()
+
+    def drain(self):
+        with self._lock:
+            rest, self._partial = "".join(self._partial), []
+        if rest:
+            self.sink.emit_text(rest + "\n")
+
+class SinkHandler(logging.Handler):
+    """`logging` records as text lines; records with a `fields` dict also go to the JSONL file."""
+    def __init__(self, sink, level=logging.INFO):
+        super().__init__(level)
+        self.sink = sink
+        self.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        try:
+            self.sink.emit_text(self.format(record) + "\n")
+            fields = getattr(record, "fields", None)
+            if fields is not None:
+                self.sink.emit_json(dict(fields, type=record.name, time=record.created))
+        except Exception:
+            self.handleError(record)
+
+_active = None
+
+def start_run_logging(log_dir, timestamp, **sink_options):
+    """
+    Route stdout, `logging` and crash tracebacks through a LogSink for this run.
+    Call once from the entry point's main thread; returns the sink.
+    """
+    global _active
+    os.makedirs(log_dir, exist_ok=True)
+    sink = LogSink(
+        os.path.join(log_dir, f"training_{timestamp}.txt"),
+        os.path.join(log_dir, f"metrics_{timestamp}.jsonl"),
+        console=sys.stdout,
+        **sink_options,
+    )
+    stream = SinkStream(sink, sys.stdout)
+    handler = SinkHandler(sink)
+    # Library chatter (websockets logs every connection at INFO) stays out unless it's a warning
+    logging.getLogger().addHandler(handler)
+    logging.getLogger().setLevel(logging.WARNING)
+    previous_hook, previous_thread_hook = sys.excepthook, threading.excepthook
+    _active = (sink, stream, handler, sys.stdout, previous_hook, previous_thread_hook)
+    sys.stdout = stream
+
+    # Tracebacks go through the sink (console and log file) instead of the default stderr print
+    def excepthook(exc_type, exc, tb):
+        sink.emit_text("".join(traceback.format_exception(exc_type, exc, tb)))
+        stop_run_logging()
+
+    def thread_excepthook(args):
+        if args.exc_type is not SystemExit:
+            sink.emit_text(f"Exception in thread {args.thread.name if args.thread else '?'}:\n"
+                           + "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback)))
+            sink.flush()
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+    atexit.register(stop_run_logging)
+    if threading.current_thread() is threading.main_thread():
+        # Default SIGTERM kills the process without atexit; exit cleanly so the queue drains
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    return sink
+
+def stop_run_logging():
+    """Drain and close the active sink and restore stdout. Safe to call more than once."""
+    global _active
+    if _active is None:
+        return
+    sink, stream, handler, original_stdout, original_hook, original_thread_hook = _active
+    _active = None
+    stream.drain()
+    sys.stdout = original_stdout
+    sys.excepthook = original_hook
+    threading.excepthook = original_thread_hook
+    logging.getLogger().removeHandler(handler)
+    sink.close()
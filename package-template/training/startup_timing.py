@@ -0,0 +1,32 @@
+# startup_timing.py - STARTUP PHASE BREAKDOWN FOR THE ENTRY POINTS
+"""
+Wall-clock marks for the startup phases of an entry point (light imports,
+socket accepting, torch/SB3 imported, model ready, ...). Entry points import
+this first, so the clock starts right after interpreter boot.
+
+    startup.mark("server accepting")
+    startup.report()   # prints each phase's own time and the running total
+"""
+import time
+
+class StartupTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, now - self.started))
+        self.last = now
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        print(" Startup breakdown:")
+        for phase, took, total in self.phases:
+            print(f"   {phase:<24} +{took:6.3f}s  ({total:6.3f}s)")
+
+startup = StartupTimer()
@@ -0,0 +1,111 @@
+# sweep_checkpoints.py - EVALUATE EVERY CHECKPOINT OF A RUN, WITH CACHED RESULTS
+"""
+Evaluates each checkpoint in the run's manifest (optionally only those with
+`sweep_from <= timesteps <= sweep_to`) on one shared env pool, and prints a
+table with the best model marked.
+
+Headless sweeps reseed the simulator per model with `eval_seed`, so every
+checkpoint plays exactly the same mazes. Results are cached in
+`<checkpoint_dir>/eval_cache.json`, keyed by the checkpoint file's SHA-256 plus
+a hash of the eval settings, so re-running a sweep only evaluates new files.
+
+    python sweep_checkpoints.py --headless --eval-episodes 500 --eval-envs 64
+    python sweep_checkpoints.py --headless --sweep-from 100000 --sweep-to 400000
+"""
+import hashlib
+import json
+import os
+import sys
+
+from stable_baselines3 import PPO
+
+from checkpointing import CheckpointManifest, write_json_atomic
+from evaluate_maze_solver import evaluate, make_eval_env, summarize
+from preprocessing import preprocess_for_checkpoint
+from run_config import RunConfig, config_hash
+
+CACHE_FILE = "eval_cache.json"
+EVAL_KEYS = ("headless", "maze_rooms", "eval_episodes", "eval_envs", "eval_seed", "max_episode_steps")
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def eval_config_hash(config):
+    return config_hash({key: getattr(config, key) for key in EVAL_KEYS})
+
+def load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def sweep_targets(config):
+    """(timesteps, path) of the checkpoints in range, oldest first."""
+    manifest = CheckpointManifest(config.checkpoint_dir)
+    targets = []
+    for file, entry in manifest.entries.items():
+        timesteps = entry["timesteps"]
+        if timesteps < config.sweep_from or (config.sweep_to and timesteps > config.sweep_to):
+            continue
+        targets.append((timesteps, os.path.join(config.checkpoint_dir, file)))
+    return sorted(targets)
+
+def main(config):
+    targets = sweep_targets(config)
+    if not targets:
+        raise SystemExit(f"No checkpoints to sweep in {config.checkpoint_dir}")
+
+    cache_path = os.path.join(config.checkpoint_dir, CACHE_FILE)
+    cache = load_cache(cache_path)
+    eval_hash = eval_config_hash(config)
+    env = None
+    rows = []
+    print(f"🎯 Sweeping {len(targets)} checkpoint(s), {config.eval_episodes} episode(s) each")
+
+    try:
+        for timesteps, path in targets:
+            key = f"{file_sha256(path)}:{eval_hash}"
+            summary = cache.get(key)
+            if summary is None:
+                if env is None:
+                    # One env pool for every model in the sweep
+                    env = make_eval_env(config)
+                    seeded = config.headless
+                    if not seeded:
+                        print(" Note: the game can't be seeded, so checkpoints see different mazes")
+                if seeded:
+                    env.env_method('seed_per_env', config.eval_seed)
+                model = PPO.load(path, device=config.device)
+                # Each checkpoint gets its own saved preprocessing statistics over the shared env
+                model_env = preprocess_for_checkpoint(env, path)
+                summary = summarize(evaluate(model, model_env, config.eval_episodes, config.max_episode_steps))
+                summary["file"] = os.path.basename(path)
+                summary["timesteps"] = timesteps
+                cache[key] = summary
+                write_json_atomic(cache_path, cache)
+                source = f"{summary['seconds']:.1f}s"
+            else:
+                source = "cached"
+            rows.append((timesteps, os.path.basename(path), summary, source))
+            low, high = summary["success_ci"]
+            print(f"   {timesteps:>10}  {summary['success_rate']:6.1%} ({low:.1%}-{high:.1%})  "
+                  f"steps {summary['steps_mean']:6.0f}  reward {summary['reward_mean']:7.1f}  [{source}]")
+    finally:
+        if env is not None:
+            env.close()
+
+    best = max(rows, key=lambda row: (row[2]["success_rate"], -row[2]["steps_mean"]))
+    print("\n" + "="*50)
+    print("📊 CHECKPOINT SWEEP RESULTS")
+    print("="*50)
+    print(f"Best: {best[1]} ({best[0]} timesteps) | Success: {best[2]['success_rate']:.1%}")
+    print(f"Results cached in: {cache_path}")
+    print("="*50)
+
+if __name__ == "__main__":
+    main(RunConfig.load(sys.argv[1:]))
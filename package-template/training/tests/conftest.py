@@ -0,0 +1,11 @@
+# conftest.py - MAKE THE TRAINING MODULES IMPORTABLE FROM THE TESTS
+"""
+The training scripts import each other as top-level modules (they run from
+`training/`), so the tests put that directory on `sys.path` the same way.
+
+    cd training && python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,127 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from checkpointing import (MANIFEST_HISTORY, MANIFEST_INDEX, CheckpointManifest, CheckpointWriter,
+                           read_checkpoint_timesteps)
+from preprocessing import stats_path
+
+@pytest.fixture
+def make_writer(tmp_path):
+    writers = []
+
+    def make(keep_last=5):
+        writer = CheckpointWriter(str(tmp_path), keep_last=keep_last)
+        writers.append(writer)
+        return writer
+
+    yield make
+    for writer in writers:
+        writer.close()
+
+def write(writer, timesteps, success_rate=None, name=None, stats=None):
+    """What the writer thread does with a `save`, minus snapshotting a real model."""
+    path = os.path.join(writer.directory, f"{name or writer.prefix + str(timesteps)}.zip")
+    writer._write(path, {"data": {"num_timesteps": timesteps}}, stats, timesteps, success_rate, "hash", name is not None)
+    return path
+
+def zips(directory):
+    return sorted(f for f in os.listdir(directory) if f.endswith(".zip"))
+
+def test_write_is_atomic_and_indexed(make_writer, tmp_path):
+    writer = make_writer()
+    path = write(writer, 100, 0.5)
+    assert zips(tmp_path) == ["maze_model_enhanced_100.zip"]
+    assert not any(f.endswith(".tmp") for f in os.listdir(tmp_path))
+    assert read_checkpoint_timesteps(path) == 100
+    assert writer.manifest.latest() == (path, 100)
+    assert writer.manifest.best() == (path, 0.5)
+
+def test_retention_keeps_newest_and_best(make_writer, tmp_path):
+    writer = make_writer(keep_last=2)
+    write(writer, 100, 0.9)
+    for timesteps in (200, 300, 400):
+        write(writer, timesteps, 0.1)
+    assert zips(tmp_path) == ["maze_model_enhanced_100.zip", "maze_model_enhanced_300.zip",
+                              "maze_model_enhanced_400.zip"]
+    assert sorted(writer.manifest.entries) == zips(tmp_path)
+
+@pytest.mark.parametrize("keep_last", [0, -1])
+def test_keep_last_zero_keeps_only_the_best(make_writer, tmp_path, keep_last):
+    writer = make_writer(keep_last=keep_last)
+    write(writer, 100, 0.2)
+    write(writer, 200, 0.7)
+    write(writer, 300, 0.4)
+    assert zips(tmp_path) == ["maze_model_enhanced_200.zip"]
+
+def test_keep_last_zero_without_scores_keeps_the_newest(make_writer, tmp_path):
+    writer = make_writer(keep_last=0)
+    write(writer, 100)
+    write(writer, 200)
+    assert zips(tmp_path) == ["maze_model_enhanced_200.zip"]
+
+def test_named_models_are_not_retained_against(make_writer, tmp_path):
+    writer = make_writer(keep_last=1)
+    write(writer, 500, name="maze_model_final")
+    write(writer, 100)
+    write(writer, 200)
+    assert zips(tmp_path) == ["maze_model_enhanced_200.zip", "maze_model_final.zip"]
+    assert writer.manifest.latest()[1] == 500
+
+def test_preprocessing_stats_follow_their_checkpoint(make_writer, tmp_path):
+    writer = make_writer(keep_last=1)
+    first = write(writer, 100, stats={"version": 1})
+    assert os.path.exists(stats_path(first))
+    second = write(writer, 200, stats={"version": 1})
+    assert not os.path.exists(stats_path(first))
+    assert os.path.exists(stats_path(second))
+
+def test_existing_checkpoints_stay_under_retention(make_writer, tmp_path):
+    write(make_writer(keep_last=2), 100)
+    writer = make_writer(keep_last=2)
+    write(writer, 200)
+    write(writer, 300)
+    assert zips(tmp_path) == ["maze_model_enhanced_200.zip", "maze_model_enhanced_300.zip"]
+
+def test_rebuild_after_losing_the_index(make_writer, tmp_path):
+    writer = make_writer()
+    write(writer, 100, 0.8)
+    write(writer, 200, 0.3)
+    os.remove(tmp_path / MANIFEST_INDEX)
+    (tmp_path / "maze_model_enhanced_300.zip.tmp").write_bytes(b"half a zip")
+    (tmp_path / "notes.zip").write_bytes(b"not a zip")
+
+    manifest = CheckpointManifest(str(tmp_path))
+    assert sorted(manifest.entries) == ["maze_model_enhanced_100.zip", "maze_model_enhanced_200.zip"]
+    # Success rates come back from the history
+    assert manifest.best() == (str(tmp_path / "maze_model_enhanced_100.zip"), 0.8)
+    assert manifest.latest()[1] == 200
+    assert not (tmp_path / "maze_model_enhanced_300.zip.tmp").exists()
+    assert json.loads((tmp_path / MANIFEST_INDEX).read_text())["latest"] == "maze_model_enhanced_200.zip"
+
+def test_rebuild_reads_timesteps_of_unknown_zips(tmp_path):
+    with zipfile.ZipFile(tmp_path / "maze_model_final.zip", "w") as archive:
+        archive.writestr("data", json.dumps({"num_timesteps": 777}))
+    manifest = CheckpointManifest(str(tmp_path))
+    entry = manifest.entries["maze_model_final.zip"]
+    assert entry["timesteps"] == 777
+    assert entry["final"] is True
+    assert entry["success_rate"] is None
+
+def test_stale_index_is_rebuilt(make_writer, tmp_path):
+    writer = make_writer()
+    write(writer, 100)
+    latest = write(writer, 200)
+    os.remove(latest)
+    manifest = CheckpointManifest(str(tmp_path))
+    assert manifest.latest()[1] == 100
+
+def test_history_survives_a_torn_line(make_writer, tmp_path):
+    writer = make_writer()
+    write(writer, 100, 0.6)
+    with open(tmp_path / MANIFEST_HISTORY, "a", encoding="utf-8") as file:
+        file.write('{"file": "maze_model_enh')
+    os.remove(tmp_path / MANIFEST_INDEX)
+    assert CheckpointManifest(str(tmp_path)).best()[1] == 0.6
@@ -0,0 +1,81 @@
+import pytest
+
+from curriculum import MAX_ROOMS, MIN_ROOMS, CurriculumScheduler
+
+def adaptive(**kwargs):
+    settings = dict(max_rooms=5, start_rooms=2, window=4, promote_at=0.75, demote_at=0.25)
+    settings.update(kwargs)
+    return CurriculumScheduler("adaptive", **settings)
+
+def test_off_uses_maze_rooms():
+    scheduler = CurriculumScheduler("off", max_rooms=7, start_rooms=1)
+    assert not scheduler.enabled
+    assert scheduler.rooms == 7
+    assert scheduler.record_episodes([True] * 500, 1000) is None
+    assert scheduler.rooms == 7
+
+def test_unknown_schedule():
+    with pytest.raises(ValueError, match="curriculum"):
+        CurriculumScheduler("sometimes")
+
+def test_rooms_are_clamped():
+    assert CurriculumScheduler("off", max_rooms=99).rooms == MAX_ROOMS
+    assert CurriculumScheduler("adaptive", max_rooms=3, start_rooms=10).rooms == 3
+    assert CurriculumScheduler("adaptive", max_rooms=3, start_rooms=0).rooms == MIN_ROOMS
+
+def test_adaptive_waits_for_a_full_window():
+    scheduler = adaptive()
+    assert scheduler.record_episodes([True, True, True], 100) is None
+    assert scheduler.rooms == 2
+
+def test_adaptive_promotes_and_restarts_the_window():
+    scheduler = adaptive()
+    assert scheduler.record_episodes([True, True, True, False], 100) == 3
+    assert scheduler.rooms == 3
+    assert scheduler.success_rate() is None  # window restarted
+    assert scheduler.history[-1]["rooms"] == 3
+    assert scheduler.history[-1]["timesteps"] == 100
+    assert scheduler.history[-1]["success_rate"] == 0.75
+
+def test_adaptive_demotes():
+    scheduler = adaptive()
+    assert scheduler.record_episodes([False, False, False, False], 50) == 1
+    # Already at the smallest maze: nothing left to change
+    assert scheduler.record_episodes([False] * 4, 60) is None
+    assert scheduler.rooms == MIN_ROOMS
+
+def test_adaptive_holds_between_thresholds():
+    scheduler = adaptive()
+    assert scheduler.record_episodes([True, True, False, False], 100) is None
+    assert scheduler.rooms == 2
+
+def test_adaptive_stops_at_max_rooms():
+    scheduler = adaptive(start_rooms=4, step=3)
+    assert scheduler.record_episodes([True] * 4, 100) == 5
+    assert scheduler.record_episodes([True] * 4, 200) is None
+
+def test_linear_grows_with_timesteps():
+    scheduler = CurriculumScheduler("linear", max_rooms=11, start_rooms=1, total_timesteps=1000)
+    assert scheduler.record_episodes([], 0) is None
+    assert scheduler.record_episodes([], 500) == 6
+    assert scheduler.record_episodes([False], 2000) == 11
+
+def test_state_round_trip():
+    scheduler = adaptive()
+    scheduler.record_episodes([True] * 4, 100)
+    scheduler.record_episodes([True, False], 150)
+    restored = adaptive()
+    assert restored.load_state_dict(scheduler.state_dict())
+    assert restored.rooms == scheduler.rooms == 3
+    assert restored.episodes == 6
+    assert list(restored.results) == [True, False]
+    assert restored.history == scheduler.history
+    # The restored window carries on where the saved one stopped
+    assert restored.record_episodes([True, True], 200) == 4
+
+def test_state_of_another_schedule_is_ignored():
+    saved = CurriculumScheduler("linear", max_rooms=5, total_timesteps=100)
+    saved.record_episodes([], 100)
+    scheduler = adaptive()
+    assert not scheduler.load_state_dict(saved.state_dict())
+    assert scheduler.rooms == 2
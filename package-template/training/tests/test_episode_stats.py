@@ -0,0 +1,78 @@
+import numpy as np
+
+from training_callbacks import EpisodeStats
+
+def finish(stats, env, steps=1, success=False, distance=None, reward=None):
+    """Step every env `steps` times, with `env` finishing an episode on the last step."""
+    dones = np.zeros(stats.num_envs, dtype=bool)
+    infos = [{} for _ in range(stats.num_envs)]
+    for _ in range(steps - 1):
+        stats.update(dones, infos)
+    dones[env] = True
+    info = {'goal_reached': success}
+    if distance is not None:
+        info['distance_to_goal'] = distance
+    if reward is not None:
+        info['episode'] = {'r': reward}
+    infos[env] = info
+    stats.update(dones, infos)
+
+def test_empty():
+    stats = EpisodeStats(2)
+    assert stats.success_rate() is None
+    assert stats.length_mean() is None
+    assert stats.distance_mean() is None
+    assert stats.reward_mean() is None
+    assert stats.per_env()[0] == {"episodes": 0, "success_rate": None, "length_mean": None}
+
+def test_lengths_are_counted_per_env():
+    stats = EpisodeStats(2)
+    finish(stats, 0, steps=3)
+    finish(stats, 1, steps=2)  # env 1 has run 5 steps by now
+    np.testing.assert_array_equal(stats._last(stats.length, None), [3, 5])
+    finish(stats, 0, steps=1)
+    assert stats.length[2] == 3  # env 0 restarted after its first episode
+
+def test_ring_buffer_wraps_around():
+    stats = EpisodeStats(1, capacity=4)
+    for length in range(1, 7):
+        finish(stats, 0, steps=length, success=length % 2 == 0)
+    assert stats.episodes == 6
+    np.testing.assert_array_equal(stats._last(stats.length, None), [3, 4, 5, 6])
+    np.testing.assert_array_equal(stats._last(stats.length, 3), [4, 5, 6])
+    np.testing.assert_array_equal(stats._last(stats.length, 1), [6])
+    assert stats.length_mean() == 4.5
+    assert stats.success_rate(2) == 0.5
+    assert stats.success_rate(100) == 0.5
+
+def test_window_before_the_buffer_fills():
+    stats = EpisodeStats(1, capacity=10)
+    for success in (True, False, False):
+        finish(stats, 0, success=success)
+    assert stats.success_rate() == 1 / 3
+    assert stats.success_rate(2) == 0.0
+
+def test_missing_distance_and_return_are_skipped():
+    stats = EpisodeStats(1)
+    finish(stats, 0, distance=4.0, reward=2.0)
+    finish(stats, 0)
+    assert stats.distance_mean() == 4.0
+    assert stats.reward_mean() == 2.0
+
+def test_per_env_wraps_independently():
+    stats = EpisodeStats(2, per_env_capacity=2)
+    for success in (False, True, True):
+        finish(stats, 0, success=success)
+    finish(stats, 1, success=False)
+    env0, env1 = stats.per_env()
+    assert env0 == {"episodes": 3, "success_rate": 1.0, "length_mean": 1.0}
+    assert env1["episodes"] == 1
+    assert env1["success_rate"] == 0.0
+
+def test_episodes_cut_short_by_a_lost_game_are_not_counted():
+    stats = EpisodeStats(1)
+    stats.update(np.array([False]), [{}])
+    stats.update(np.array([True]), [{'game_lost': True, 'TimeLimit.truncated': True}])
+    assert stats.episodes == 0
+    finish(stats, 0, steps=2, success=True)
+    assert stats.length_mean() == 2.0
@@ -0,0 +1,91 @@
+import asyncio
+
+import numpy as np
+
+from maze_bridge import GameSlot, PendingRequest, StepChannel
+from maze_protocol import decode_frame, encode_frame
+
+def pending(slot, seq, kind='step', on_reply=None):
+    request = PendingRequest(seq, kind, "", on_reply)
+    slot.in_flight[seq] = request
+    return request
+
+def test_replies_are_matched_by_seq():
+    slot = GameSlot(0)
+    first, second = pending(slot, 10), pending(slot, 11)
+    assert slot.take_request(11) is second
+    assert slot.take_request(10) is first
+    assert not slot.in_flight
+
+def test_unknown_and_repeated_seqs_are_stale():
+    slot = GameSlot(0)
+    request = pending(slot, 10)
+    assert slot.take_request(99) is None
+    assert slot.take_request(10) is request
+    assert slot.take_request(10) is None  # a resend answered twice
+    assert slot.stale_replies == 2
+
+def test_replies_without_seq_answer_the_oldest_request():
+    slot = GameSlot(0)
+    first, second = pending(slot, 10), pending(slot, 11)
+    assert slot.take_request(None) is first
+    assert slot.take_request(0) is second
+    assert slot.take_request(None) is None
+
+def channel_for(*slots):
+    channel = StepChannel(None, list(slots))
+    channel._outstanding = len(slots)
+    return channel
+
+def test_step_replies_land_in_their_slots_rows():
+    single, batch = GameSlot(0), GameSlot(1, num_envs=2)
+    batch.step_batch = True
+    channel = channel_for(single, batch)
+    obs = np.full((2, 16), 0.5, dtype=np.float32)
+    asyncio.run(channel.on_step_reply(batch, PendingRequest(2, 'step_batch', "", None), {
+        'observations': obs.tolist(), 'rewards': [1.0, 2.0], 'dones': [False, False], 'infos': [{}, {'x': 1}]}))
+    asyncio.run(channel.on_step_reply(single, PendingRequest(1, 'step', "", None), {
+        'observation': [0.25] * 16, 'reward': -1.0, 'done': False, 'info': {'goal_reached': False}}))
+    np.testing.assert_array_equal(channel.obs[0], 0.25)
+    np.testing.assert_array_equal(channel.obs[1:], obs)
+    np.testing.assert_array_equal(channel.rewards, [-1.0, 1.0, 2.0])
+    assert channel.infos[2] == {'x': 1}
+    assert channel._ready.is_set()
+
+def test_binary_step_replies():
+    slot = GameSlot(0, num_envs=2)
+    slot.step_batch = True
+    channel = channel_for(slot)
+    frame = encode_frame(np.ones((2, 16)), rewards=[0.5, 0.25], distances=[3.0, 4.0])
+    _, records = decode_frame(frame)
+    asyncio.run(channel.on_step_reply(slot, PendingRequest(1, 'step_batch', "", None), records))
+    np.testing.assert_array_equal(channel.obs, 1.0)
+    np.testing.assert_array_equal(channel.rewards, [0.5, 0.25])
+    assert channel.infos[1] == {'goal_reached': False, 'distance_to_goal': 4.0}
+
+def test_giving_up_a_step_truncates_the_slots_episodes():
+    slot = GameSlot(0, num_envs=2)
+    channel = channel_for(slot)
+    channel.obs[:] = 0.75
+    pending(slot, 5, 'step_batch')
+    slot.give_up()
+    assert slot.lost
+    assert not slot.in_flight
+    assert channel._ready.is_set()
+    assert channel.dones.all()
+    np.testing.assert_array_equal(channel.rewards, 0.0)
+    for info in channel.infos:
+        assert info['TimeLimit.truncated'] and info['game_lost']
+        np.testing.assert_array_equal(info['terminal_observation'], 0.75)
+
+def test_lost_slots_idle_while_the_others_step():
+    lost, live = GameSlot(0), GameSlot(1)
+    lost.lost = True
+    channel = channel_for(lost, live)
+    channel._idle(lost)
+    assert not channel._ready.is_set()  # still waiting on the live slot
+    assert not channel.dones[0]
+    assert channel.infos[0] == {'game_lost': True}
+    assert not channel._all_lost()
+    live.lost = True
+    assert channel._all_lost()
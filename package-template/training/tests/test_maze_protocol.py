@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from maze_protocol import (FRAME_HEADER, FRAME_HEADER_V1, FRAME_MAGIC, OBS_DIM, decode_frame, encode_frame,
+                           record_dtype, record_infos)
+
+def test_frame_round_trip():
+    obs = np.arange(3 * OBS_DIM, dtype=np.float32).reshape(3, OBS_DIM) / 100
+    frame = encode_frame(obs, rewards=[1.0, -0.5, 0.0], dones=[False, True, False], distances=[3.0, 0.0, 1.5],
+                         goal_reached=[False, True, False], seq=42)
+    seq, records = decode_frame(frame)
+    assert seq == 42
+    np.testing.assert_array_equal(records['obs'], obs)
+    np.testing.assert_array_equal(records['reward'], [1.0, -0.5, 0.0])
+    np.testing.assert_array_equal(records['done'], [0, 1, 0])
+    np.testing.assert_array_equal(records['distance_to_goal'], [3.0, 0.0, 1.5])
+
+def test_records_are_aligned_and_zero_copy():
+    assert record_dtype().itemsize % 4 == 0
+    frame = encode_frame(np.ones((2, OBS_DIM)))
+    _, records = decode_frame(frame)
+    assert not records.flags.owndata
+    assert not records.flags.writeable  # a view of the received bytes
+
+def test_other_observation_sizes():
+    seq, records = decode_frame(encode_frame(np.zeros((1, 11)), seq=7))
+    assert seq == 7
+    assert records['obs'].shape == (1, 11)
+
+def test_version_1_frames_have_no_seq():
+    records = np.zeros(2, dtype=record_dtype())
+    records['reward'] = [0.25, 0.5]
+    frame = FRAME_HEADER_V1.pack(FRAME_MAGIC, 1, 0, 2, OBS_DIM) + records.tobytes()
+    seq, decoded = decode_frame(frame)
+    assert seq == 0
+    np.testing.assert_array_equal(decoded['reward'], [0.25, 0.5])
+
+@pytest.mark.parametrize("magic, version", [(b"XX", 2), (FRAME_MAGIC, 3)])
+def test_unknown_frames_are_rejected(magic, version):
+    frame = FRAME_HEADER.pack(magic, version, 0, 0, OBS_DIM, 0)
+    with pytest.raises(ValueError):
+        decode_frame(frame)
+
+def test_record_infos():
+    frame = encode_frame(np.zeros((2, OBS_DIM)), distances=[2.5, 0.0], goal_reached=[False, True])
+    _, records = decode_frame(frame)
+    assert record_infos(records) == [
+        {'goal_reached': False, 'distance_to_goal': 2.5},
+        {'goal_reached': True, 'distance_to_goal': 0.0},
+    ]
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from run_config import DEFAULTS, RunConfig, config_hash
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # RunConfig.load picks up run_config.json from the working directory
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def write_config(path, **values):
+    path.write_text(json.dumps(values), encoding="utf-8")
+    return str(path)
+
+def test_defaults(workdir):
+    config = RunConfig.load([], environ={})
+    assert config.to_dict() == DEFAULTS
+    assert config.source is None
+
+def test_layers_file_then_environment_then_cli(workdir):
+    path = write_config(workdir / "run.json", total_timesteps=1000, num_envs=4, port=9000)
+    environ = {"MAZE_CONFIG": path, "MAZE_NUM_ENVS": "8", "MAZE_PORT": "9100"}
+    config = RunConfig.load(["--port", "9200"], environ=environ)
+    assert config.source == path
+    assert config.total_timesteps == 1000
+    assert config.num_envs == 8
+    assert config.port == 9200
+
+def test_config_flag_beats_environment_file(workdir):
+    flag = write_config(workdir / "flag.json", total_timesteps=5)
+    env = write_config(workdir / "env.json", total_timesteps=6)
+    config = RunConfig.load(["--config", flag], environ={"MAZE_CONFIG": env})
+    assert config.total_timesteps == 5
+
+def test_default_file_in_working_directory(workdir):
+    write_config(workdir / "run_config.json", total_timesteps=5000000, maze_rooms=7)
+    config = RunConfig.load([], environ={})
+    assert config.source == "run_config.json"
+    assert (config.total_timesteps, config.maze_rooms) == (5000000, 7)
+
+def test_maze_rooms_keeps_its_old_environment_name(workdir):
+    assert RunConfig.load([], environ={"MAZE_ROOMS": "12"}).maze_rooms == 12
+    assert RunConfig.load([], environ={"MAZE_MAZE_ROOMS": "12"}).maze_rooms == DEFAULTS["maze_rooms"]
+
+@pytest.mark.parametrize("key, raw, expected", [
+    ("headless", "yes", True),
+    ("headless", "0", False),
+    ("num_envs", "16", 16),
+    ("learning_rate", "3e-4", 3e-4),
+    ("device", "cuda", "cuda"),
+    ("replay_dir", "", None),
+])
+def test_strings_are_coerced_to_the_default_type(workdir, key, raw, expected):
+    environ = {"MAZE_" + key.upper(): raw}
+    assert getattr(RunConfig.load([], environ=environ), key) == expected
+
+def test_json_values_keep_their_type(workdir):
+    path = write_config(workdir / "run.json", headless=True, learning_rate=0.5)
+    config = RunConfig.load(["--config", path], environ={})
+    assert config.headless is True
+    assert config.learning_rate == 0.5
+
+def test_boolean_flags(workdir):
+    config = RunConfig.load(["--headless", "--num-envs", "2"], environ={})
+    assert config.headless is True
+    assert config.num_envs == 2
+
+def test_unknown_keys_are_rejected():
+    with pytest.raises(ValueError, match="bogus"):
+        RunConfig(bogus=1)
+    with pytest.raises(AttributeError):
+        RunConfig().bogus
+
+def test_hash_covers_training_settings_only():
+    base = RunConfig()
+    assert base.hash() == RunConfig(port=9999, checkpoint_dir="elsewhere").hash()
+    assert base.hash() != RunConfig(learning_rate=0.001).hash()
+    assert base.hash() != RunConfig(num_envs=2).hash()
+    assert config_hash({"a": 1, "b": 2}) == config_hash({"b": 2, "a": 1})
+
+def test_bridge_and_ppo_kwargs():
+    config = RunConfig(stall_timeout=0, n_steps=128)
+    assert config.bridge_kwargs()["stall_timeout"] == 0
+    assert config.ppo_kwargs()["n_steps"] == 128
+    assert "port" not in config.ppo_kwargs()
+
+def test_save_and_reload(workdir):
+    RunConfig(total_timesteps=123, headless=True).save("saved.json")
+    config = RunConfig.load(["--config", "saved.json"], environ={})
+    assert config.to_dict() == RunConfig(total_timesteps=123, headless=True).to_dict()
@@ -1,244 +1,218 @@
 # train_maze_solver_enhanced.py - WITH WALL DETECTION & RESUME CAPABILITY
+from startup_timing import startup
 import asyncio
 import websockets
-import json
-import numpy as np
 import os
-import gymnasium as gym
-from gymnasium.spaces import Box, Discrete
 import threading
-import time
 import datetime
 import sys
 
-from stable_baselines3 import PPO
-from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.callbacks import BaseCallback
-from stable_baselines3.common.vec_env import DummyVecEnv
+# torch/SB3 are imported inside start_training, so the game socket is up first
+from maze_bridge import bridge_state, handler, wait_for_slots
+from metrics import MetricsReporter, MetricsServer
+from run_config import RunConfig
+from run_logging import start_run_logging, stop_run_logging
+startup.mark("light imports")
 
-# --- Paths for the enhanced model ---
-CHECKPOINT_DIR = "training/maze_solver_enhanced/"
-LOG_DIR = "training/logs/maze_solver_enhanced/"
-os.makedirs(CHECKPOINT_DIR, exist_ok=True)
-os.makedirs(LOG_DIR, exist_ok=True)
-
-# Create log file with timestamp
+# Budget, hyperparameters, ports and paths all come from the run config (see run_config.py)
 timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-LOG_FILE = f"training/logs/maze_solver_enhanced/training_{timestamp}.txt"
-os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
 
-class DualLogger:
-    """Log to both console and file"""
-    def __init__(self, filename):
-        self.console = sys.stdout
-        self.file = open(filename, 'w', encoding='utf-8')
-        
-    def write(self, message):
-        self.console.write(message)
-        self.file.write(message)
-        self.file.flush()
-        
-    def flush(self):
-        self.console.flush()
-        self.file.flush()
+# Set by start_logging; the buffered sink behind stdout and the JSONL metrics log
+log_sink = None
 
-# Redirect stdout to both console and file
-sys.stdout = DualLogger(LOG_FILE)
+def start_logging(config):
+    # Route stdout through the buffered log sink. Called from __main__ only, so
+    # SubprocVecEnv workers re-importing this module don't open their own log files.
+    global log_sink
+    os.makedirs(config.checkpoint_dir, exist_ok=True)
+    log_sink = start_run_logging(
+        config.log_dir, timestamp,
+        flush_interval=config.log_flush_interval,
+        max_bytes=config.log_max_bytes,
+        backups=config.log_backups,
+    )
 
-print(f" ENHANCED MAZE SOLVER TRAINING (WITH WALL DETECTION & RESUME)")
-print(f" Training started at {timestamp}")
-print(f" Log file: {LOG_FILE}")
+    print(f" ENHANCED MAZE SOLVER TRAINING (WITH WALL DETECTION & RESUME)")
+    print(f" Training started at {timestamp}")
+    print(f" Log file: {log_sink.text_path}")
+    print(f" Metrics log: {log_sink.jsonl_path}")
+    if config.source:
+        print(f" Run config: {config.source}")
 
-class TrainingState:
-    def __init__(self):
-        self.active_connection = None
-        self.game_ready = False
-        self.training_paused = False
-        self.remaining_timesteps = 20000
-        self.last_checkpoint = None
-        self.command_queue = asyncio.Queue()
-        self.result_queue = asyncio.Queue()
-        self.reconnect_event = asyncio.Event()
+def start_metrics_server(config):
+    """Serve live metrics on localhost from launch, so supervisors can probe the trainer before the model loads."""
+    if config.metrics_port:
+        try:
+            server = MetricsServer(host=config.host, port=config.metrics_port)
+            print(f" Metrics endpoint: {server.address} (JSON: {server.address}.json)")
+        except OSError as e:
+            print(f" Metrics endpoint disabled: {e}")
 
-training_state = TrainingState()
+def start_metrics(config):
+    """Log one JSON record per interval to the metrics log."""
+    # Without start_logging (e.g. imported by tools) the records just go nowhere
+    write_record = log_sink.emit_json if log_sink is not None else (lambda record: None)
+    return MetricsReporter(write_record, config.metrics_interval)
 
-class EnhancedMazeEnv(gym.Env):
-    """ Gym environment for the enhanced maze with 16D observation space. """
-    def __init__(self, loop):
-        super().__init__()
-        self.loop = loop
-        self.action_space = Discrete(7)
-        self.observation_space = Box(low=-1.0, high=1.0, shape=(16,), dtype=np.float32)
+def find_latest_checkpoint(manifest):
+    # The manifest answers from index.json and only rescans the directory when it is missing or stale
+    model_path, latest_timesteps = manifest.latest()
+    if model_path:
+        print(f" Found checkpoint: {os.path.basename(model_path)} ({latest_timesteps} timesteps)")
+    return model_path, latest_timesteps
 
-    def _send_command_and_wait(self, command):
-        async def _send_async():
-            await training_state.command_queue.put(command)
-            return await training_state.result_queue.get()
-        
-        future = asyncio.run_coroutine_threadsafe(_send_async(), self.loop)
-        return future.result()
+def run_record_dir(config):
+    # One recording per run, next to the others in record_dir
+    return os.path.join(config.record_dir, timestamp) if config.record_dir else None
 
-    def reset(self, seed=None, options=None):
-        while training_state.training_paused:
-            time.sleep(0.5)
-        result = self._send_command_and_wait({"type": "reset"})
-        obs = np.array(result['observation'], dtype=np.float32)
-        return obs, {}
+def split_groups(items, groups):
+    """`items` in `groups` contiguous, near-equal parts (fewer if there aren't enough items)."""
+    groups = max(1, min(groups, len(items)))
+    size, extra = divmod(len(items), groups)
+    parts, start = [], 0
+    for g in range(groups):
+        end = start + size + (1 if g < extra else 0)
+        parts.append(items[start:end])
+        start = end
+    return parts
 
-    def step(self, action):
-        while training_state.training_paused:
-            time.sleep(0.5)
-        result = self._send_command_and_wait({"type": "step", "action": int(action)})
-        obs = np.array(result['observation'], dtype=np.float32)
-        reward = result['reward']
-        terminated = result['done']
-        info = result.get('info', {})
-        return obs, reward, terminated, False, info
+def wait_for_game_env(loop, num_envs, record_dir=None, groups=1):
+    # One VecMonitor(MazeVecEnv) per rollout group; a single group is the plain lockstep env
+    from stable_baselines3.common.vec_env import VecMonitor
+    from maze_envs import EnhancedMazeEnv, MazeVecEnv
 
-class MazeTrainingCallback(BaseCallback):
-    def __init__(self, check_freq, save_path, verbose=0):
-        super().__init__(verbose)
-        self.check_freq = check_freq
-        self.save_path = save_path
-        self.episode_successes = []
-        
-    def _on_step(self):
-        if self.num_timesteps > 0 and self.num_timesteps % self.check_freq == 0:
-            total_steps = self.model.num_timesteps + (20000 - training_state.remaining_timesteps)
-            path = os.path.join(self.save_path, f"maze_model_enhanced_{total_steps}")
-            self.model.save(path)
-            training_state.last_checkpoint = path
-            
-            if len(self.episode_successes) > 0:
-                success_rate = np.mean(self.episode_successes[-20:])
-                print(f"💾 Checkpoint: {total_steps}/20000 | Success: {success_rate:.1%}")
-                
-        return True
-    
-    def _on_rollout_end(self):
-        if hasattr(self.model, 'env'):
-            try:
-                infos = self.model.env.get_attr('info')
-                if infos and infos[0] and infos[0][-1].get('goal_reached'):
-                     self.episode_successes.append(1)
-                else:
-                     self.episode_successes.append(0)
-            except:
-                pass
+    print(f" Waiting for {num_envs} game env(s)...")
+    slots = wait_for_slots(bridge_state, num_envs)
+    parts = split_groups(slots, groups)
+    envs = []
+    for g, part in enumerate(parts):
+        group_record_dir = os.path.join(record_dir, f"group_{g}") if record_dir and len(parts) > 1 else record_dir
+        envs.append(VecMonitor(MazeVecEnv([EnhancedMazeEnv(loop, slot) for slot in part], loop, group_record_dir)))
+    print(f" Training on {sum(env.num_envs for env in envs)} env(s) across {len(slots)} game slot(s)")
+    if record_dir:
+        print(f" Recording experience to {record_dir}")
+    return envs
 
-async def handler(websocket):
-    training_state.active_connection = websocket
-    training_state.training_paused = False
-    print(">>> Enhanced maze environment connected!")
-    
-    try:
-        ready_message = await websocket.recv()
-        if json.loads(ready_message).get('type') == 'game_ready':
-            training_state.game_ready = True
-            print(" Maze ready! Training active.")
-            training_state.reconnect_event.set()
-        
-        async for message in websocket:
-            data = json.loads(message)
-            if 'observation' in data:
-                await training_state.result_queue.put(data)
-            
-    except websockets.exceptions.ConnectionClosed:
-        print(" Game disconnected! Training paused...")
-        training_state.training_paused = True
-        training_state.game_ready = False
-        training_state.active_connection = None
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-        training_state.training_paused = True
-        training_state.game_ready = False
-        training_state.active_connection = None
+def start_training(loop, config):
+    # Deferred heavy imports: in game mode the socket already accepts connections while these load
+    from stable_baselines3 import PPO
+    from stable_baselines3.common.callbacks import CallbackList
+    from stable_baselines3.common.utils import configure_logger
+    from stable_baselines3.common.vec_env import SubprocVecEnv, VecMonitor
 
-async def command_sender():
-    while True:
-        command = await training_state.command_queue.get()
-        
-        while training_state.training_paused or not training_state.game_ready:
-            print("Waiting for game reconnection...")
-            await training_state.reconnect_event.wait()
-            training_state.reconnect_event.clear()
-            
-        if training_state.active_connection:
-            try:
-                await training_state.active_connection.send(json.dumps(command))
-            except websockets.exceptions.ConnectionClosed:
-                print(" Connection lost during send, requeuing command...")
-                training_state.training_paused = True
-                training_state.game_ready = False
-                await training_state.command_queue.put(command)
-                await asyncio.sleep(1)
+    from checkpointing import CheckpointManifest, CheckpointWriter
+    from curriculum import CurriculumScheduler
+    from maze_envs import ReplayVecEnv, endpoint_env_fns
+    from maze_sim import HeadlessMazeVecEnv
+    from pipelined_rollouts import PipelinedPPO, SplitVecEnv
+    from preprocessing import PreprocessedVecEnv, load_pipeline, pipeline_from_config
+    from training_callbacks import (CurriculumCallback, JSONLOutputFormat, MazeTrainingCallback, MetricsCallback,
+                                    WorkerThroughputCallback, training_state)
+    startup.mark("torch/SB3 imported")
 
-def find_latest_checkpoint():
-    if not os.path.exists(CHECKPOINT_DIR):
-        return None, 0
-    
-    checkpoint_files = []
-    for file in os.listdir(CHECKPOINT_DIR):
-        if file.startswith("maze_model_enhanced_") and file.endswith(".zip"):
-            try:
-                timesteps = int(file.split('_')[-1].split('.')[0])
-                checkpoint_files.append((timesteps, file))
-            except:
-                continue
-    
-    if checkpoint_files:
-        latest_timesteps, latest_file = max(checkpoint_files)
-        model_path = os.path.join(CHECKPOINT_DIR, latest_file)
-        print(f" Found checkpoint: {latest_file} ({latest_timesteps} timesteps)")
-        return model_path, latest_timesteps
-    
-    return None, 0
-
-def start_training(loop):
     print(" Checking for existing checkpoints...")
-    latest_checkpoint, completed_timesteps = find_latest_checkpoint()
-    
-    print(" Waiting for initial game connection...")
-    while not training_state.game_ready:
-        time.sleep(1)
+    manifest = CheckpointManifest(config.checkpoint_dir)
+    latest_checkpoint, completed_timesteps = find_latest_checkpoint(manifest)
+    training_state.total_timesteps = config.total_timesteps
     
-    env = DummyVecEnv([lambda: Monitor(EnhancedMazeEnv(loop))])
+    if config.headless:
+        groups = [VecMonitor(HeadlessMazeVecEnv(config.num_envs, rooms=config.maze_rooms))]
+        print(f" Training HEADLESS on {config.num_envs} simulated maze(s) with {config.maze_rooms} room(s)")
+    elif config.replay_dir:
+        groups = [VecMonitor(ReplayVecEnv(config.replay_dir))]
+        print(f" Training on a REPLAY of {config.replay_dir} ({groups[0].num_envs} env(s), open loop)")
+    elif config.workers:
+        record_dir = run_record_dir(config)
+        env_fns = endpoint_env_fns(config.workers, config.base_port, config.socket_dir, config.host, record_dir,
+                                   config.bridge_kwargs())
+        groups = [VecMonitor(SubprocVecEnv(fns)) for fns in split_groups(env_fns, config.rollout_groups)]
+        if config.socket_dir:
+            where = f"Unix sockets in {config.socket_dir}"
+        else:
+            where = f"ports {config.base_port}-{config.base_port + config.workers - 1}"
+        print(f" Training on {config.workers} worker process(es), one game endpoint each on {where}")
+        if record_dir:
+            print(f" Recording experience to {record_dir}/worker_<i>")
+    else:
+        groups = wait_for_game_env(loop, config.num_envs, run_record_dir(config), config.rollout_groups)
+    if config.rollout_groups > 1 and (config.headless or config.replay_dir):
+        print(" rollout_groups ignored: the simulator and replays step in-process, there is no game latency to hide")
     
+    # A resumed run keeps the preprocessing (and statistics) it was trained with
+    if latest_checkpoint:
+        pipeline = load_pipeline(latest_checkpoint, groups[0].num_envs, training=True)
+    else:
+        pipeline = pipeline_from_config(config, groups[0].num_envs)
+    if pipeline is not None:
+        # Every group gets its own frame stacks but they all update one set of statistics
+        groups = [PreprocessedVecEnv(group, pipeline if g == 0 else pipeline.fork(group.num_envs))
+                  for g, group in enumerate(groups)]
+        print(f" Observation preprocessing: normalize={pipeline.normalize} frame_stack={pipeline.frame_stack} "
+              f"augment={pipeline.augment} ({pipeline.output_dim}-D)")
+
+    if len(groups) > 1:
+        env = SplitVecEnv(groups)
+        algorithm = PipelinedPPO
+        print(f" Pipelined rollouts over {len(groups)} env groups: "
+              f"{', '.join(str(group.num_envs) for group in groups)} env(s)")
+    else:
+        env = groups[0]
+        algorithm = PPO
+
     if latest_checkpoint:
-        training_state.remaining_timesteps = 20000 - completed_timesteps
+        print(f" Loading model: {latest_checkpoint}")
+        model = algorithm.load(latest_checkpoint, env=env)
+        # The checkpoint's own counter is authoritative; the manifest/filename is only used to pick the file
+        training_state.remaining_timesteps = config.total_timesteps - model.num_timesteps
         if training_state.remaining_timesteps <= 0:
-            print(" Training already completed.")
+            print(f" Training already completed ({model.num_timesteps}/{config.total_timesteps} timesteps).")
+            env.close()
             return
 
-        print(f" RESUMING from checkpoint: {completed_timesteps}/20000 timesteps")
-        print(f" Loading model: {latest_checkpoint}")
-        model = PPO.load(latest_checkpoint, env=env)
+        print(f" RESUMING from checkpoint: {model.num_timesteps}/{config.total_timesteps} timesteps")
     else:
-        training_state.remaining_timesteps = 20000
+        training_state.remaining_timesteps = config.total_timesteps
         print(" Starting NEW training...")
-        model = PPO(
+        model = algorithm(
             "MlpPolicy",
             env,
             verbose=1,
-            tensorboard_log=LOG_DIR,
-            device="cpu",
-            n_steps=2048,
-            learning_rate=0.0001,
-            batch_size=64,
-            gamma=0.995,
-            gae_lambda=0.95,
-            clip_range=0.2,
-            ent_coef=0.005,
-            n_epochs=10,
-            max_grad_norm=0.5,
+            tensorboard_log=config.log_dir,
+            **config.ppo_kwargs(),
         )
     
+    if log_sink is not None:
+        # Same stdout/TensorBoard outputs learn() would set up, plus SB3's stats as JSONL records
+        sb3_logger = configure_logger(verbose=1, tensorboard_log=config.log_dir, tb_log_name="PPO",
+                                      reset_num_timesteps=False)
+        sb3_logger.output_formats.append(JSONLOutputFormat(log_sink.emit_json))
+        model.set_logger(sb3_logger)
+
+    startup.mark("model ready")
+    if config.startup_report:
+        startup.report()
+
+    writer = CheckpointWriter(config.checkpoint_dir, keep_last=config.keep_checkpoints, manifest=manifest,
+                              pipeline=pipeline)
     callback = MazeTrainingCallback(
-        check_freq=2000,
-        save_path=CHECKPOINT_DIR,
-        verbose=0
+        check_freq=config.check_freq,
+        save_path=config.checkpoint_dir,
+        verbose=0,
+        writer=writer,
+        config_hash=config.hash()
     )
+    callbacks = [callback, MetricsCallback()]
+    curriculum = CurriculumScheduler.from_config(config)
+    if curriculum.enabled and config.replay_dir:
+        print(" Curriculum ignored: a replayed recording can't change maze size")
+    elif curriculum.enabled:
+        # Ahead of the checkpoint callback, so each save carries the latest level
+        callbacks.insert(0, CurriculumCallback(curriculum))
+    if config.workers:
+        callbacks.append(WorkerThroughputCallback())
+    callback = CallbackList(callbacks)
 
+    reporter = start_metrics(config)
     print(f" Training for {training_state.remaining_timesteps} timesteps...")
     print(" Stable-baselines3 progress reports will show below:")
     print("-" * 50)
@@ -249,13 +223,14 @@ def start_training(loop):
             callback=callback,
             reset_num_timesteps=False
         )
-        model.save(os.path.join(CHECKPOINT_DIR, "maze_solver_enhanced_final"))
-    except Exception as e:
-        print(f" Training error: {e}")
-        import traceback
-        traceback.print_exc()
+        writer.save(model, model.num_timesteps, name="maze_solver_enhanced_final", config_hash=config.hash())
+    finally:
+        writer.close()
+        reporter.close()
+        # Also writes out the last partial shard of an experience recording
+        env.close()
 
-    if training_state.training_paused:
+    if bridge_state.training_paused:
         print(" Training paused due to disconnection.")
         print(" Just refresh the game tab to resume automatically!")
     else:
@@ -263,25 +238,53 @@ def start_training(loop):
         print(" ENHANCED MAZE SOLVER TRAINING COMPLETED!")
         print("="*50)
 
-async def main():
-    asyncio.create_task(command_sender())
-    server = await websockets.serve(handler, "localhost", 8765)
-    print(">>> Enhanced training server started on localhost:8765")
+async def main(config):
+    bridge_state.configure(**config.bridge_kwargs())
+    server = await websockets.serve(handler, config.host, config.port)
+    startup.mark("server accepting")
+    print(f">>> Enhanced training server started on {config.host}:{config.port} ({startup.elapsed:.2f}s after launch)")
     
     loop = asyncio.get_event_loop()
-    training_thread = threading.Thread(target=lambda: start_training(loop))
+    finished = loop.create_future()
+
+    def run_training():
+        try:
+            start_training(loop, config)
+        except Exception as e:
+            loop.call_soon_threadsafe(finished.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(finished.set_result, None)
+
+    training_thread = threading.Thread(target=run_training)
     training_thread.daemon = True
     training_thread.start()
     
-    await asyncio.Future()
+    # The process ends with training, so a supervisor sees success (exit 0) or failure (exit 1)
+    try:
+        await finished
+    finally:
+        server.close()
 
 if __name__ == "__main__":
+    config = RunConfig.load(sys.argv[1:])
+    start_logging(config)
+    start_metrics_server(config)
+    exit_code = 0
     try:
-        asyncio.run(main())
+        if config.headless or config.replay_dir or config.workers:
+            # No shared server: train against the NumPy simulator or a recording, or worker processes host their own endpoints
+            start_training(None, config)
+        else:
+            asyncio.run(main(config))
     except KeyboardInterrupt:
         print("\n>>> Training interrupted by user.")
+        exit_code = 130
+    except Exception as e:
+        print(f" Training error: {e}")
+        import traceback
+        traceback.print_exc()
+        exit_code = 1
     finally:
-        if isinstance(sys.stdout, DualLogger):
-            sys.stdout.file.close()
-            sys.stdout = sys.stdout.console
+        stop_run_logging()
+    sys.exit(exit_code)
 
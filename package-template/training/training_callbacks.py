@@ -0,0 +1,295 @@
+# training_callbacks.py - SB3 CALLBACKS FOR THE MAZE TRAINER
+"""
+Checkpointing and progress callbacks used by `train_maze_solver.start_training`.
+Kept out of the entry script so it can bring its WebSocket server up before
+SB3 and torch are imported.
+"""
+import time
+
+import numpy as np
+from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.logger import KVWriter
+
+from checkpointing import CheckpointWriter
+from metrics import metrics
+
+INFERENCE_TIME = metrics.histogram("policy_inference_seconds", "Policy forward pass for one vector step during rollouts")
+ROLLOUT_TIME = metrics.histogram("ppo_rollout_seconds", "Collecting one PPO rollout")
+UPDATE_TIME = metrics.histogram("ppo_update_seconds", "One PPO update (all epochs) between rollouts")
+
+class JSONLOutputFormat(KVWriter):
+    """SB3 logger output that hands every dump (rollout/train stats) to `write_record` as one dict."""
+    def __init__(self, write_record):
+        self.write_record = write_record
+
+    def write(self, key_values, key_excluded, step=0):
+        record = {"type": "sb3", "step": int(step)}
+        for key, value in key_values.items():
+            excluded = key_excluded.get(key)
+            if excluded is not None and "json" in excluded:
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, (int, float, str, bool)):
+                record[key] = value
+        self.write_record(record)
+
+    def close(self):
+        pass
+
+class TrainingState:
+    def __init__(self):
+        self.total_timesteps = 0
+        self.remaining_timesteps = 0
+        self.last_checkpoint = None
+
+training_state = TrainingState()
+
+class EpisodeStats:
+    """
+    Finished episodes (success, length, return, final distance to goal) in
+    fixed-size NumPy ring buffers: the last `capacity` episodes overall and the
+    last `per_env_capacity` of each env. Fed from the `infos` of every vector
+    step, so reading it never costs an env round-trip.
+    """
+    def __init__(self, num_envs, capacity=1000, per_env_capacity=100):
+        self.num_envs = num_envs
+        self.capacity = capacity
+        self.per_env_capacity = per_env_capacity
+        self.success = np.zeros(capacity, dtype=bool)
+        self.length = np.zeros(capacity, dtype=np.int64)
+        self.distance = np.full(capacity, np.nan, dtype=np.float32)
+        self.reward = np.full(capacity, np.nan, dtype=np.float32)
+        self.episodes = 0
+        self.env_success = np.zeros((num_envs, per_env_capacity), dtype=bool)
+        self.env_length = np.zeros((num_envs, per_env_capacity), dtype=np.int64)
+        self.env_episodes = np.zeros(num_envs, dtype=np.int64)
+        self._running_length = np.zeros(num_envs, dtype=np.int64)
+
+    def update(self, dones, infos):
+        self._running_length += 1
+        for i in np.flatnonzero(dones):
+            info = infos[i]
+            if info.get('game_lost'):
+                # Cut short by the bridge, not played out: not the policy's result
+                self._running_length[i] = 0
+                continue
+            success = bool(info.get('goal_reached', False))
+            length = self._running_length[i]
+            slot = self.episodes % self.capacity
+            self.success[slot] = success
+            self.length[slot] = length
+            self.distance[slot] = info.get('distance_to_goal', np.nan)
+            # Episode return as VecMonitor reports it
+            self.reward[slot] = info.get('episode', {}).get('r', np.nan)
+            self.episodes += 1
+            env_slot = self.env_episodes[i] % self.per_env_capacity
+            self.env_success[i, env_slot] = success
+            self.env_length[i, env_slot] = length
+            self.env_episodes[i] += 1
+            self._running_length[i] = 0
+
+    def _last(self, column, n):
+        """The newest `n` (default: all buffered) values of a ring-buffer column."""
+        size = min(self.episodes, self.capacity)
+        n = size if n is None else min(n, size)
+        if n == 0:
+            return column[:0]
+        end = self.episodes % self.capacity
+        if n <= end:
+            return column[end - n:end]
+        return np.concatenate([column[self.capacity - (n - end):], column[:end]])
+
+    def success_rate(self, n=None):
+        values = self._last(self.success, n)
+        return float(values.mean()) if len(values) else None
+
+    def length_mean(self, n=None):
+        values = self._last(self.length, n)
+        return float(values.mean()) if len(values) else None
+
+    def distance_mean(self, n=None):
+        return self._nanmean(self._last(self.distance, n))
+
+    def reward_mean(self, n=None):
+        return self._nanmean(self._last(self.reward, n))
+
+    @staticmethod
+    def _nanmean(values):
+        values = values[~np.isnan(values)]
+        return float(values.mean()) if len(values) else None
+
+    def per_env(self):
+        """Success rate and mean length of each env over its buffered episodes (None before its first episode)."""
+        breakdown = []
+        for i in range(self.num_envs):
+            n = min(self.env_episodes[i], self.per_env_capacity)
+            if n == 0:
+                breakdown.append({"episodes": 0, "success_rate": None, "length_mean": None})
+                continue
+            # Order within the buffer doesn't matter for means
+            breakdown.append({"episodes": int(self.env_episodes[i]),
+                              "success_rate": float(self.env_success[i, :n].mean()),
+                              "length_mean": float(self.env_length[i, :n].mean())})
+        return breakdown
+
+class MazeTrainingCallback(BaseCallback):
+    def __init__(self, check_freq, save_path, verbose=0, writer=None, config_hash=None, success_window=100):
+        super().__init__(verbose)
+        self.config_hash = config_hash
+        self.check_freq = check_freq
+        self.save_path = save_path
+        # Snapshots are serialized on the writer thread so rollouts don't stall on zip/disk I/O
+        self.writer = writer or CheckpointWriter(save_path)
+        # Checkpoint success rate is over the last `success_window` finished episodes
+        self.success_window = success_window
+        self.episode_stats = None
+        self.next_checkpoint = check_freq
+
+    def _init_callback(self):
+        self.episode_stats = EpisodeStats(self.training_env.num_envs)
+        stats = self.episode_stats
+        window = self.success_window
+        metrics.gauge("episode_success_rate", lambda: stats.success_rate(window),
+                      f"Goal reached, over the last {window} episodes")
+        metrics.gauge("episode_length_mean", lambda: stats.length_mean(window),
+                      f"Steps per episode, over the last {window} episodes")
+        metrics.gauge("episode_final_distance_mean", lambda: stats.distance_mean(window),
+                      f"Distance to goal when the episode ended, over the last {window} episodes")
+        metrics.gauge("episode_reward_mean", lambda: stats.reward_mean(window),
+                      f"Episode return, over the last {window} episodes")
+        
+    def _on_training_start(self):
+        # With N envs num_timesteps advances by N per call, so track the next boundary instead of using modulo
+        self.next_checkpoint = (self.model.num_timesteps // self.check_freq + 1) * self.check_freq
+        
+    def _on_step(self):
+        self.episode_stats.update(self.locals['dones'], self.locals['infos'])
+        if self.num_timesteps >= self.next_checkpoint:
+            self.next_checkpoint += self.check_freq
+            # Resumed models keep their num_timesteps (reset_num_timesteps=False), so this is the run total
+            total_steps = self.model.num_timesteps
+            success_rate = self.episode_stats.success_rate(self.success_window)
+            path = self.writer.save(self.model, total_steps, success_rate, config_hash=self.config_hash)
+            training_state.last_checkpoint = path
+            
+            if success_rate is not None:
+                print(f"💾 Checkpoint: {total_steps}/{training_state.total_timesteps} | Success: {success_rate:.1%}")
+                
+        return True
+    
+    def _on_training_end(self):
+        self.writer.flush()
+
+    def _on_rollout_end(self):
+        stats = self.episode_stats
+        if stats.episodes == 0:
+            return
+        window = self.success_window
+        self.logger.record("episodes/success_rate", stats.success_rate(window))
+        self.logger.record("episodes/length_mean", stats.length_mean(window))
+        distance = stats.distance_mean(window)
+        if distance is not None:
+            self.logger.record("episodes/final_distance_mean", distance)
+        # Per-env rates go to TensorBoard/JSONL only; with many envs they'd swamp the console table
+        for i, env in enumerate(stats.per_env()):
+            if env["success_rate"] is not None:
+                self.logger.record(f"episodes/env_{i}_success_rate", env["success_rate"], exclude="stdout")
+
+class CurriculumCallback(BaseCallback):
+    """Feed finished episodes to a `curriculum.CurriculumScheduler` and resize the envs' mazes when it says so."""
+    def __init__(self, scheduler, verbose=0):
+        super().__init__(verbose)
+        self.scheduler = scheduler
+
+    def _on_training_start(self):
+        # A resumed model carries the curriculum state it was saved with
+        state = getattr(self.model, 'curriculum', None)
+        if state and self.scheduler.load_state_dict(state):
+            print(f"📈 Curriculum resumed at {self.scheduler.rooms} room(s) "
+                  f"({len(self.scheduler.history) - 1} level change(s) so far)")
+        else:
+            print(f"📈 Curriculum ({self.scheduler.schedule}) starting at {self.scheduler.rooms} room(s)")
+        self.training_env.env_method('set_rooms', self.scheduler.rooms)
+        self.model.curriculum = self.scheduler.state_dict()
+
+    def _on_step(self):
+        dones = self.locals['dones']
+        if not dones.any():
+            return True
+        infos = self.locals['infos']
+        # Episodes the bridge cut short (game lost) say nothing about the level
+        successes = [infos[i].get('goal_reached', False) for i in np.flatnonzero(dones)
+                     if not infos[i].get('game_lost')]
+        rooms = self.scheduler.record_episodes(successes, self.num_timesteps)
+        if rooms is not None:
+            previous = self.scheduler.history[-2]["rooms"]
+            self.training_env.env_method('set_rooms', rooms)
+            rate = self.scheduler.history[-1]["success_rate"]
+            reason = f" (success {rate:.0%} over {self.scheduler.window} episodes)" if rate is not None else ""
+            print(f"📈 Curriculum: {previous} -> {rooms} room(s) at {self.num_timesteps} timesteps{reason}")
+        # Stored on the model so every checkpoint zip carries it
+        self.model.curriculum = self.scheduler.state_dict()
+        return True
+
+    def _on_rollout_end(self):
+        self.logger.record("curriculum/rooms", self.scheduler.rooms)
+        if self.scheduler.success_rate() is not None:
+            self.logger.record("curriculum/success_rate", self.scheduler.success_rate())
+
+class WorkerThroughputCallback(BaseCallback):
+    """Print each worker endpoint's steps/sec at the end of every rollout."""
+    def _on_step(self):
+        return True
+
+    def _on_rollout_end(self):
+        rates = self.training_env.env_method('throughput')
+        summary = " | ".join(f"w{i}: {rate:,.0f}" for i, rate in enumerate(rates))
+        print(f" Worker steps/sec: {summary} | total: {sum(rates):,.0f}")
+
+class MetricsCallback(BaseCallback):
+    """Feed policy inference and PPO rollout/update phase times into metrics."""
+    def __init__(self, verbose=0):
+        super().__init__(verbose)
+        self._forward = None
+        self._rollout_started = 0
+        self._update_started = 0
+
+    def _on_training_start(self):
+        # What supervisor.py's liveness probe watches: a trainer whose count stops moving is hung
+        metrics.gauge("training_timesteps", lambda: self.model.num_timesteps, "Timesteps the model has trained on")
+        policy = self.model.policy
+        self._forward = forward = policy.forward
+
+        def timed_forward(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return forward(*args, **kwargs)
+            finally:
+                INFERENCE_TIME.observe_ns(started)
+
+        # nn.Module.__call__ looks forward up on the instance, so this wraps every rollout inference
+        policy.forward = timed_forward
+
+    def _on_rollout_start(self):
+        now = time.perf_counter_ns()
+        if self._update_started:
+            UPDATE_TIME.observe_ns(self._update_started, now)
+            self._update_started = 0
+        self._rollout_started = now
+
+    def _on_rollout_end(self):
+        now = time.perf_counter_ns()
+        ROLLOUT_TIME.observe_ns(self._rollout_started, now)
+        self._update_started = now
+
+    def _on_step(self):
+        return True
+
+    def _on_training_end(self):
+        if self._update_started:
+            UPDATE_TIME.observe_ns(self._update_started)
+            self._update_started = 0
+        if self._forward is not None:
+            del self.model.policy.forward
+            self._forward = None